@@ -23,12 +23,43 @@ import whois
 import ssl
 import subprocess
 import ipaddress
+import argparse
+import atexit
+import cProfile
+import pstats
+import tracemalloc
+import http.server
+import socketserver
+import email.utils
+import queue
+import concurrent.futures
+import multiprocessing
+import hashlib
+import hmac
+import math
+import itertools
+import errno
+import selectors
+import functools
+import bisect
+import mmap
+import struct
+import zlib
+import importlib
+import importlib.util
+import importlib.metadata
+import urllib.robotparser
+import xml.etree.ElementTree as ET
 import nmap
 import builtwith
 import phonenumbers
 from bs4 import BeautifulSoup
 from datetime import datetime
-from urllib.parse import urlparse, quote, unquote, parse_qs
+from contextlib import contextmanager
+from collections import OrderedDict
+from multiprocessing import shared_memory
+from dataclasses import dataclass, fields, is_dataclass
+from urllib.parse import urlparse, quote, unquote, parse_qs, parse_qsl, urljoin, urlencode, urlunparse
 from fake_useragent import UserAgent
 import urllib3
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -41,6 +72,13 @@ try:
 except ImportError:
     ARABIC_SUPPORT = False
 
+# Use zstandard for the blob store if available, zlib otherwise
+try:
+    import zstandard
+    ZSTD_SUPPORT = True
+except ImportError:
+    ZSTD_SUPPORT = False
+
 # ANSI colors for professional UI
 class Colors:
     RED = "\033[91m"
@@ -66,32 +104,149 @@ class Colors:
 def clear_screen():
     os.system('clear' if os.name != 'nt' else 'cls')
 
+# ==================== OUTPUT RENDERERS ====================
+ANSI_ESCAPE = re.compile(r'\033\[[0-9;]*m')
+DIAGNOSTICS = ('warning', 'error', 'critical')
+
+class TTYRenderer:
+    """Human-readable output. Lines are collected and written in batches; colours are
+    dropped when stdout is not a terminal. Interactive terminals get each line at once
+    unless inside batch()."""
+    structured = False
+
+    def __init__(self, stream=None, color=None, buffer_size=65536, flush_interval=1.0):
+        self.stream = stream or sys.stdout
+        self.interactive = self.stream.isatty()
+        self.color = self.interactive if color is None else color
+        self.buffer_size = buffer_size
+        self.flush_interval = 0 if self.interactive else flush_interval
+        self.buffer = []
+        self.pending = 0
+        self.depth = 0
+        self.last_flush = time.monotonic()
+        self.lock = threading.RLock()
+
+    def write(self, kind, text):
+        if not self.color:
+            text = ANSI_ESCAPE.sub('', text)
+        with self.lock:
+            self.buffer.append(text)
+            self.buffer.append('\n')
+            self.pending += len(text) + 1
+            if self.pending >= self.buffer_size or \
+                    (self.depth == 0 and time.monotonic() - self.last_flush >= self.flush_interval):
+                self.flush()
+
+    def emit(self, kind, data, human, to_record=None):
+        """Output one result: human(data) here, to_record(data) for structured renderers"""
+        human(data)
+
+    def flush(self):
+        with self.lock:
+            if self.buffer:
+                self.stream.write(''.join(self.buffer))
+                self.buffer = []
+                self.pending = 0
+            self.stream.flush()
+            self.last_flush = time.monotonic()
+
+    @contextmanager
+    def batch(self):
+        """Hold output written inside the block and write it in as few calls as possible"""
+        with self.lock:
+            self.depth += 1
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.depth -= 1
+                if self.depth == 0:
+                    self.flush()
+
+    def close(self):
+        self.flush()
+
+class QuietRenderer(TTYRenderer):
+    """--quiet: only warnings and errors, on stderr"""
+
+    def __init__(self):
+        super().__init__(sys.stderr)
+
+    def write(self, kind, text):
+        if kind in DIAGNOSTICS:
+            super().write(kind, text)
+
+    def emit(self, kind, data, human, to_record=None):
+        pass
+
+class JSONRenderer(TTYRenderer):
+    """--json / --jsonl: results as {"type": ..., "data": ...} objects on stdout, either one
+    JSON array or one object per line. Other messages are dropped except warnings and
+    errors, which go to stderr."""
+    structured = True
+
+    def __init__(self, lines=False):
+        super().__init__(sys.stdout, color=False)
+        self.interactive = False
+        self.flush_interval = 1.0
+        self.lines = lines
+        self.count = 0
+        self.closed = False
+        self.diagnostics = TTYRenderer(sys.stderr)
+
+    def write(self, kind, text):
+        if kind in DIAGNOSTICS:
+            self.diagnostics.write(kind, text)
+
+    def emit(self, kind, data, human, to_record=None):
+        record = json.dumps({'type': kind, 'data': to_record(data) if to_record else data},
+                            separators=(',', ':'), default=_json_default)
+        with self.lock:
+            if not self.lines:
+                record = ('[' if self.count == 0 else ',') + record
+            self.count += 1
+            super().write(kind, record)
+
+    def close(self):
+        with self.lock:
+            if not self.lines and not self.closed:
+                self.buffer.append('[]\n' if self.count == 0 else ']\n')
+            self.closed = True
+            self.flush()
+        self.diagnostics.flush()
+
+RENDERER = TTYRenderer()
+atexit.register(lambda: RENDERER.close())
+
 def print_header(text):
-    print(f"\n{Colors.BG_BLUE}{Colors.WHITE}{Colors.BOLD} {text} {Colors.RESET}")
+    RENDERER.write('header', f"\n{Colors.BG_BLUE}{Colors.WHITE}{Colors.BOLD} {text} {Colors.RESET}")
 
 def print_section(text):
-    print(f"\n{Colors.BG_GRAY}{Colors.WHITE}{Colors.BOLD} {text} {Colors.RESET}")
+    RENDERER.write('section', f"\n{Colors.BG_GRAY}{Colors.WHITE}{Colors.BOLD} {text} {Colors.RESET}")
 
 def print_subsection(text):
-    print(f"\n{Colors.CYAN}{Colors.BOLD} {text} {Colors.RESET}")
+    RENDERER.write('subsection', f"\n{Colors.CYAN}{Colors.BOLD} {text} {Colors.RESET}")
 
 def print_info(label, value):
-    print(f"{Colors.GREEN}{label}:{Colors.RESET} {Colors.WHITE}{value}{Colors.RESET}")
+    RENDERER.write('info', f"{Colors.GREEN}{label}:{Colors.RESET} {Colors.WHITE}{value}{Colors.RESET}")
 
 def print_warning(text):
-    print(f"{Colors.YELLOW}[!] {text}{Colors.RESET}")
+    RENDERER.write('warning', f"{Colors.YELLOW}[!] {text}{Colors.RESET}")
 
 def print_error(text):
-    print(f"{Colors.RED}[✗] {text}{Colors.RESET}")
+    RENDERER.write('error', f"{Colors.RED}[✗] {text}{Colors.RESET}")
 
 def print_success(text):
-    print(f"{Colors.GREEN}[✓] {text}{Colors.RESET}")
+    RENDERER.write('success', f"{Colors.GREEN}[✓] {text}{Colors.RESET}")
 
 def print_critical(text):
-    print(f"{Colors.BG_RED}{Colors.WHITE}[!] {text}{Colors.RESET}")
+    RENDERER.write('critical', f"{Colors.BG_RED}{Colors.WHITE}[!] {text}{Colors.RESET}")
 
 def print_bullet(text):
-    print(f"{Colors.WHITE}• {text}{Colors.RESET}")
+    RENDERER.write('bullet', f"{Colors.WHITE}• {text}{Colors.RESET}")
+
+def print_line(text=''):
+    RENDERER.write('text', text)
 
 def format_arabic(text):
     if ARABIC_SUPPORT and any('\u0600' <= c <= '\u06FF' for c in text):
@@ -100,6 +255,9 @@ def format_arabic(text):
     return text
 
 def loading_animation(text, duration=2):
+    if not RENDERER.interactive:
+        return
+    RENDERER.flush()
     end_time = time.time() + duration
     symbols = ['⣾', '⣽', '⣻', '⢿', '⡿', '⣟', '⣯', '⣷']
     i = 0
@@ -146,8 +304,18 @@ def get_random_headers():
     }
 
 # Database setup for storing collected information
-def setup_database():
-    conn = sqlite3.connect('osint_data.db')
+DATABASE_PATH = 'osint_data.db'
+
+def add_missing_columns(c, table, columns):
+    """ALTER TABLE ... ADD COLUMN for each (name, type) the table does not have yet"""
+    c.execute(f"PRAGMA table_info({table})")
+    existing = {row[1] for row in c.fetchall()}
+    for name, column_type in columns:
+        if name not in existing:
+            c.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+
+def setup_database(path=None, check_same_thread=True):
+    conn = sqlite3.connect(path or DATABASE_PATH, timeout=30, check_same_thread=check_same_thread)
     c = conn.cursor()
     
     # Create tables for different platforms
@@ -191,6 +359,75 @@ def setup_database():
                  subdomains TEXT, directories TEXT, ports TEXT, cms TEXT,
                  waf TEXT, framework TEXT, extracted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
     
+    # Columns added after the table was first released go at the end, for old and new databases alike
+    add_missing_columns(c, 'website_data', [('geoip', 'TEXT'), ('status', 'TEXT'), ('incomplete_phases', 'TEXT'),
+                                          ('ip_addresses', 'TEXT'), ('address_family', 'TEXT')])
+    
+    c.execute('''CREATE TABLE IF NOT EXISTS ip_scans
+                 (id INTEGER PRIMARY KEY, ip TEXT, kind TEXT, key TEXT, result TEXT,
+                 scanned_at REAL, UNIQUE (ip, kind, key))''')
+    c.execute('''CREATE TABLE IF NOT EXISTS website_ip_scans
+                 (website_id INTEGER, ip_scan_id INTEGER, PRIMARY KEY (website_id, ip_scan_id))''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_website_ip_scans ON website_ip_scans (ip_scan_id)')
+    
+    c.execute('''CREATE TABLE IF NOT EXISTS ptr_records
+                 (ip TEXT PRIMARY KEY, hostname TEXT, names TEXT, status TEXT, resolved_at REAL)''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_ptr_records_hostname ON ptr_records (hostname)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_ptr_records_status ON ptr_records (status)')
+    
+    c.execute('''CREATE TABLE IF NOT EXISTS scan_spans
+                 (id INTEGER PRIMARY KEY, website_id INTEGER, url TEXT, name TEXT,
+                 parent TEXT, started_at REAL, wall_time REAL, cpu_time REAL,
+                 bytes INTEGER, extracted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    
+    c.execute('''CREATE TABLE IF NOT EXISTS memory_usage
+                 (id INTEGER PRIMARY KEY, website_id INTEGER, url TEXT, phase TEXT,
+                 peak_bytes INTEGER, retained_bytes INTEGER, over_budget INTEGER,
+                 top_sites TEXT, extracted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    
+    c.execute('''CREATE TABLE IF NOT EXISTS scan_jobs
+                 (id INTEGER PRIMARY KEY, target TEXT, phases TEXT, status TEXT,
+                 worker TEXT, lease_expires REAL, attempts INTEGER, website_id INTEGER,
+                 error TEXT, created_at REAL, updated_at REAL)''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_scan_jobs_status ON scan_jobs (status, id)')
+    
+    c.execute('''CREATE TABLE IF NOT EXISTS batch_runs
+                 (id INTEGER PRIMARY KEY, source TEXT, phases TEXT, options TEXT, status TEXT,
+                 started_at REAL, updated_at REAL)''')
+    c.execute('''CREATE TABLE IF NOT EXISTS batch_progress
+                 (run_id INTEGER, seq INTEGER, target TEXT, status TEXT, phases_done TEXT,
+                 checkpoint BLOB, website_id INTEGER, error TEXT, updated_at REAL,
+                 PRIMARY KEY (run_id, seq))''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_batch_progress_status ON batch_progress (run_id, status)')
+    
+    c.execute('''CREATE TABLE IF NOT EXISTS crawls
+                 (id INTEGER PRIMARY KEY, seed TEXT, max_depth INTEGER, max_pages INTEGER,
+                 pages INTEGER, started_at REAL, finished_at REAL)''')
+    c.execute('''CREATE TABLE IF NOT EXISTS crawl_frontier
+                 (id INTEGER PRIMARY KEY, crawl_id INTEGER, url TEXT, depth INTEGER)''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_crawl_frontier ON crawl_frontier (crawl_id, id)')
+    c.execute('''CREATE TABLE IF NOT EXISTS crawl_seen
+                 (crawl_id INTEGER, url_hash BLOB, PRIMARY KEY (crawl_id, url_hash)) WITHOUT ROWID''')
+    c.execute('''CREATE TABLE IF NOT EXISTS crawl_pages
+                 (id INTEGER PRIMARY KEY, crawl_id INTEGER, url TEXT, depth INTEGER,
+                 status INTEGER, title TEXT, error TEXT, extracted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    c.execute('''CREATE TABLE IF NOT EXISTS crawl_assets
+                 (crawl_id INTEGER, kind TEXT, value TEXT, first_url TEXT, count INTEGER,
+                 PRIMARY KEY (crawl_id, kind, value))''')
+    
+    c.execute('''CREATE TABLE IF NOT EXISTS blobs
+                 (sha256 TEXT PRIMARY KEY, size INTEGER, refs INTEGER, created_at REAL)''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_blobs_refs ON blobs (refs)')
+    
+    c.execute('''CREATE TABLE IF NOT EXISTS script_urls
+                 (url TEXT PRIMARY KEY, sha256 TEXT, fetched_at REAL)''')
+    c.execute('''CREATE TABLE IF NOT EXISTS script_assets
+                 (sha256 TEXT PRIMARY KEY, size INTEGER, libraries TEXT, analyzed_at REAL)''')
+    
+    c.execute('''CREATE TABLE IF NOT EXISTS robots_data
+                 (id INTEGER PRIMARY KEY, url TEXT, robots_txt TEXT, sitemaps TEXT,
+                 crawl_delay REAL, sitemap_urls INTEGER, extracted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    
     c.execute('''CREATE TABLE IF NOT EXISTS password_patterns
                  (id INTEGER PRIMARY KEY, username TEXT, platform TEXT, pattern TEXT,
                  generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
@@ -213,6 +450,1179 @@ def setup_database():
     conn.commit()
     return conn
 
+# ==================== SCAN TRACING & PROFILING ====================
+class ScanTracer:
+    """Collects per-phase timing spans for scans and the whole run"""
+
+    def __init__(self):
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+        self.record_events = False
+        self.trace_events = []
+
+    def begin_scan(self, target):
+        """Start collecting spans for a scan running in the current thread"""
+        self.local.target = target
+        self.local.spans = []
+        self.local.stack = []
+
+    def end_scan(self):
+        """Stop collecting spans for the current thread and return them"""
+        spans = getattr(self.local, 'spans', None) or []
+        self.local.spans = None
+        self.local.stack = []
+        return sorted(spans, key=lambda span: span['started_at'])
+
+    def suspend(self):
+        """Detach the current thread's scan so another thread can resume() it"""
+        state = (getattr(self.local, 'target', None), getattr(self.local, 'spans', None))
+        self.local.spans = None
+        self.local.stack = []
+        return state
+
+    def resume(self, state):
+        self.local.target, self.local.spans = state
+        self.local.stack = []
+
+    @contextmanager
+    def span(self, name):
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        span = {
+            'name': name,
+            'parent': stack[-1]['name'] if stack else None,
+            'started_at': time.time(),
+            'wall_time': 0.0,
+            'cpu_time': 0.0,
+            'bytes': 0
+        }
+        stack.append(span)
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield span
+        finally:
+            span['wall_time'] = time.perf_counter() - wall_start
+            span['cpu_time'] = time.thread_time() - cpu_start
+            stack.pop()
+            if stack:
+                stack[-1]['bytes'] += span['bytes']
+            spans = getattr(self.local, 'spans', None)
+            if spans is not None:
+                spans.append(span)
+            if self.record_events:
+                self._add_trace_event(span, wall_start)
+
+    def _add_trace_event(self, span, wall_start):
+        event = {
+            'name': span['name'],
+            'cat': 'scan',
+            'ph': 'X',
+            'ts': int((wall_start - self.origin) * 1000000),
+            'dur': int(span['wall_time'] * 1000000),
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': {
+                'target': getattr(self.local, 'target', None),
+                'cpu_ms': round(span['cpu_time'] * 1000, 3),
+                'bytes': span['bytes']
+            }
+        }
+        with self.lock:
+            self.trace_events.append(event)
+
+    def write_chrome_trace(self, path):
+        """Write collected spans in Chrome trace-event format (chrome://tracing, Perfetto)"""
+        with self.lock:
+            events = list(self.trace_events)
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+TRACER = ScanTracer()
+
+class MemoryAccountant:
+    """Attributes tracemalloc growth to scan phases and targets (opt-in via --memory)"""
+
+    def __init__(self):
+        self.enabled = False
+        self.budget = 256 * 1024 * 1024
+        self.top_n = 10
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def enable(self, budget_mb=256, top_n=10):
+        self.enabled = True
+        self.budget = int(budget_mb * 1024 * 1024)
+        self.top_n = top_n
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>")
+        ))
+
+    def begin_target(self, target):
+        if not self.enabled:
+            return
+        self.local.target = target
+        self.local.phases = []
+        self.local.start_memory = tracemalloc.get_traced_memory()[0]
+        self.local.start_snapshot = self._snapshot()
+
+    @contextmanager
+    def phase(self, name):
+        if not self.enabled or getattr(self.local, 'phases', None) is None:
+            yield
+            return
+        before = tracemalloc.get_traced_memory()[0]
+        with self.lock:
+            tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            self.local.phases.append({
+                'phase': name,
+                'peak_bytes': max(0, peak - before),
+                'retained_bytes': current - before
+            })
+
+    def end_target(self):
+        """Finish accounting for the current target and return its memory report"""
+        phases = getattr(self.local, 'phases', None)
+        if not self.enabled or phases is None:
+            return None
+        current = tracemalloc.get_traced_memory()[0]
+        stats = self._snapshot().compare_to(self.local.start_snapshot, 'lineno')
+        top_sites = [
+            {'site': str(stat.traceback), 'size_diff': stat.size_diff, 'count_diff': stat.count_diff}
+            for stat in stats[:self.top_n]
+        ]
+        peak = max([p['peak_bytes'] for p in phases] or [0])
+        report = {
+            'target': self.local.target,
+            'phases': phases,
+            'peak_bytes': peak,
+            'retained_bytes': current - self.local.start_memory,
+            'top_sites': top_sites,
+            'over_budget': peak > self.budget
+        }
+        self.local.phases = None
+        self.local.start_snapshot = None
+        return report
+
+    def suspend(self):
+        """Detach the current thread's target so another thread can resume() it"""
+        state = tuple(getattr(self.local, name, None) for name in ('target', 'phases', 'start_memory', 'start_snapshot'))
+        self.local.phases = None
+        self.local.start_snapshot = None
+        return state
+
+    def resume(self, state):
+        self.local.target, self.local.phases, self.local.start_memory, self.local.start_snapshot = state
+
+MEMORY = MemoryAccountant()
+
+def memory_workers(workers):
+    """Worker count to use under --memory: tracemalloc counts the whole process, so
+    phases of concurrent scans would be charged to each other"""
+    if MEMORY.enabled and workers > 1:
+        print_warning(f"--memory measures the whole process; running 1 worker instead of {workers}")
+        return 1
+    return workers
+
+@contextmanager
+def trace_span(name):
+    """Context manager timing one scan phase; add transferred bytes to span['bytes']"""
+    span = None
+    try:
+        with TRACER.span(name) as span:
+            if MEMORY.enabled and span['parent'] is None:
+                with MEMORY.phase(name):
+                    yield span
+            else:
+                yield span
+    finally:
+        if span is not None:
+            METRICS.observe('omar_phase_duration_seconds', span['wall_time'], phase=name)
+
+def response_size(response):
+    """Approximate bytes transferred for a requests response"""
+    header_bytes = sum(len(k) + len(v) + 4 for k, v in response.headers.items())
+    return len(response.content) + header_bytes
+
+def save_scan_spans(c, website_id, url, spans):
+    for span in spans:
+        c.execute('''INSERT INTO scan_spans
+                    (website_id, url, name, parent, started_at, wall_time, cpu_time, bytes)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+                    (website_id, url, span['name'], span['parent'], span['started_at'],
+                     span['wall_time'], span['cpu_time'], span['bytes']))
+
+def print_scan_spans(spans):
+    print_subsection("Scan timing")
+    for span in spans:
+        indent = "  " if span['parent'] else ""
+        print_info(f"{indent}{span['name']}",
+                   f"{span['wall_time'] * 1000:.1f} ms wall, {span['cpu_time'] * 1000:.1f} ms CPU, {span['bytes']} bytes")
+
+def save_memory_report(c, website_id, report):
+    for phase in report['phases']:
+        c.execute('''INSERT INTO memory_usage
+                    (website_id, url, phase, peak_bytes, retained_bytes, over_budget, top_sites)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                    (website_id, report['target'], phase['phase'], phase['peak_bytes'],
+                     phase['retained_bytes'], 0, None))
+    c.execute('''INSERT INTO memory_usage
+                (website_id, url, phase, peak_bytes, retained_bytes, over_budget, top_sites)
+                VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                (website_id, report['target'], 'total', report['peak_bytes'],
+                 report['retained_bytes'], int(report['over_budget']), json.dumps(report['top_sites'])))
+
+def print_memory_report(report):
+    print_subsection("Memory usage")
+    for phase in report['phases']:
+        print_info(phase['phase'], f"peak {phase['peak_bytes'] / 1024:.1f} KiB, retained {phase['retained_bytes'] / 1024:.1f} KiB")
+    print_info("Target peak", f"{report['peak_bytes'] / 1024:.1f} KiB")
+    print_info("Target retained", f"{report['retained_bytes'] / 1024:.1f} KiB")
+    print_info("Scope", "whole process (includes allocations by background threads)")
+    for site in report['top_sites'][:5]:
+        print_bullet(f"{site['site']}: {site['size_diff'] / 1024:+.1f} KiB ({site['count_diff']:+d} blocks)")
+    if report['over_budget']:
+        print_critical(f"Memory budget of {MEMORY.budget / 1024 / 1024:.1f} MiB exceeded for {report['target']}")
+
+def run_profiled(func, prefix='omar_profile'):
+    """Run func under cProfile and dump pstats output plus a Chrome trace"""
+    TRACER.record_events = True
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        return func()
+    finally:
+        profiler.disable()
+        profiler.dump_stats(f"{prefix}.pstats")
+        with open(f"{prefix}.txt", 'w') as f:
+            stats = pstats.Stats(profiler, stream=f)
+            stats.sort_stats('cumulative').print_stats(50)
+        TRACER.write_chrome_trace(f"{prefix}_trace.json")
+        print_success(f"Profile written to {prefix}.pstats, {prefix}.txt and {prefix}_trace.json")
+
+# ==================== METRICS ====================
+class MetricsRegistry:
+    """In-process counters, gauges and histograms with Prometheus text and JSON export"""
+
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self.collectors = []
+        self.started = time.time()
+        self.last_snapshot = None
+
+    def register(self, name, kind, help_text, buckets=None):
+        with self.lock:
+            if name not in self.metrics:
+                self.metrics[name] = {
+                    'type': kind,
+                    'help': help_text,
+                    'buckets': tuple(buckets or self.DEFAULT_BUCKETS) if kind == 'histogram' else None,
+                    'values': {}
+                }
+
+    def add_collector(self, func):
+        """Register a callable run before every export to refresh derived gauges"""
+        self.collectors.append(func)
+
+    def _series(self, name, labels, default):
+        metric = self.metrics[name]
+        key = tuple(sorted(labels.items()))
+        if key not in metric['values']:
+            metric['values'][key] = default() if callable(default) else default
+        return metric, key
+
+    def inc(self, name, value=1, **labels):
+        with self.lock:
+            metric, key = self._series(name, labels, 0)
+            metric['values'][key] += value
+
+    def set(self, name, value, **labels):
+        with self.lock:
+            metric, key = self._series(name, labels, 0)
+            metric['values'][key] = value
+
+    def observe(self, name, value, **labels):
+        with self.lock:
+            metric = self.metrics[name]
+            buckets = metric['buckets']
+            metric, key = self._series(name, labels,
+                                       lambda: {'buckets': [0] * len(buckets), 'sum': 0.0, 'count': 0})
+            series = metric['values'][key]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    series['buckets'][i] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def get(self, name, **labels):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if not metric:
+                return None
+            return metric['values'].get(tuple(sorted(labels.items())))
+
+    def _collect(self):
+        for func in self.collectors:
+            try:
+                func(self)
+            except Exception:
+                pass
+
+    @staticmethod
+    def _format_labels(key, extra=None):
+        labels = list(key) + list(extra or [])
+        if not labels:
+            return ""
+        escaped = []
+        for k, v in labels:
+            value = str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            escaped.append(f'{k}="{value}"')
+        return "{" + ",".join(escaped) + "}"
+
+    def render_prometheus(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        self._collect()
+        lines = []
+        with self.lock:
+            for name, metric in sorted(self.metrics.items()):
+                lines.append(f"# HELP {name} {metric['help']}")
+                lines.append(f"# TYPE {name} {metric['type']}")
+                for key, value in sorted(metric['values'].items()):
+                    if metric['type'] != 'histogram':
+                        lines.append(f"{name}{self._format_labels(key)} {value}")
+                        continue
+                    for bound, count in zip(metric['buckets'], value['buckets']):
+                        lines.append(f"{name}_bucket{self._format_labels(key, [('le', bound)])} {count}")
+                    lines.append(f"{name}_bucket{self._format_labels(key, [('le', '+Inf')])} {value['count']}")
+                    lines.append(f"{name}_sum{self._format_labels(key)} {value['sum']}")
+                    lines.append(f"{name}_count{self._format_labels(key)} {value['count']}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """Return a JSON-serialisable view of all metrics"""
+        self._collect()
+        now = time.time()
+        with self.lock:
+            metrics = {}
+            for name, metric in self.metrics.items():
+                series = []
+                for key, value in metric['values'].items():
+                    if metric['type'] == 'histogram':
+                        value = {
+                            'buckets': dict(zip([str(b) for b in metric['buckets']], value['buckets'])),
+                            'sum': value['sum'],
+                            'count': value['count']
+                        }
+                    series.append({'labels': dict(key), 'value': value})
+                metrics[name] = {'type': metric['type'], 'series': series}
+        requests_total = sum(s['value'] for s in metrics.get('omar_http_requests_total', {}).get('series', []))
+        rates = {'http_requests_per_second': requests_total / max(now - self.started, 1e-9)}
+        if self.last_snapshot:
+            last_time, last_requests = self.last_snapshot
+            rates['http_requests_per_second_recent'] = (requests_total - last_requests) / max(now - last_time, 1e-9)
+        self.last_snapshot = (now, requests_total)
+        return {
+            'timestamp': now,
+            'uptime_seconds': now - self.started,
+            'rates': rates,
+            'metrics': metrics
+        }
+
+METRICS = MetricsRegistry()
+METRICS.register('omar_targets_completed_total', 'counter', "Website scans completed")
+METRICS.register('omar_targets_failed_total', 'counter', "Website scans that failed")
+METRICS.register('omar_targets_partial_total', 'counter', "Website scans that ran out of time budget and were saved partial")
+METRICS.register('omar_scans_in_flight', 'gauge', "Website scans currently running")
+METRICS.register('omar_http_requests_total', 'counter', "Outbound HTTP requests by status code")
+METRICS.register('omar_phase_duration_seconds', 'histogram', "Scan phase latency (fetch, dns_resolve, whois, ssl_handshake, ...)")
+METRICS.register('omar_cache_requests_total', 'counter', "Cache lookups by cache and result (hit/miss)")
+METRICS.register('omar_cache_hit_ratio', 'gauge', "Cache hit ratio by cache")
+
+def record_cache_lookup(cache, hit):
+    METRICS.inc('omar_cache_requests_total', cache=cache, result='hit' if hit else 'miss')
+
+def _collect_cache_ratios(registry):
+    totals = {}
+    for key, value in list(registry.metrics['omar_cache_requests_total']['values'].items()):
+        labels = dict(key)
+        hits, total = totals.get(labels['cache'], (0, 0))
+        totals[labels['cache']] = (hits + (value if labels['result'] == 'hit' else 0), total + value)
+    try:
+        cache = dns.resolver.get_default_resolver().cache
+        if cache is not None:
+            totals['dns'] = (cache.hits(), cache.hits() + cache.misses())
+    except Exception:
+        pass
+    for cache, (hits, total) in totals.items():
+        registry.set('omar_cache_hit_ratio', hits / total if total else 0.0, cache=cache)
+
+METRICS.add_collector(_collect_cache_ratios)
+
+def enable_dns_cache():
+    """Give the default dnspython resolver an LRU cache so repeated lookups are served locally"""
+    try:
+        resolver = dns.resolver.get_default_resolver()
+        if resolver.cache is None:
+            resolver.cache = dns.resolver.LRUCache()
+    except Exception as e:
+        print_warning(f"DNS cache unavailable: {str(e)}")
+
+def start_metrics_server(port, host='127.0.0.1'):
+    """Serve /metrics (Prometheus text) and /metrics.json on a local HTTP port"""
+    class MetricsHandler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith('/metrics.json'):
+                body = json.dumps(METRICS.snapshot()).encode()
+                content_type = 'application/json'
+            elif self.path.startswith('/metrics'):
+                body = METRICS.render_prometheus().encode()
+                content_type = 'text/plain; version=0.0.4; charset=utf-8'
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def start_metrics_snapshots(path, interval=30):
+    """Append a JSON metrics snapshot to path every interval seconds"""
+    def writer():
+        while True:
+            time.sleep(interval)
+            try:
+                with open(path, 'a') as f:
+                    f.write(json.dumps(METRICS.snapshot()) + "\n")
+            except OSError as e:
+                print_warning(f"Could not write metrics snapshot: {str(e)}")
+
+    thread = threading.Thread(target=writer, daemon=True)
+    thread.start()
+    return thread
+
+# ==================== REQUEST SCHEDULER ====================
+# Per-host state kept by the scheduler and the circuit breaker; the least recently used
+# hosts are forgotten beyond this, so a million-target batch does not grow it without bound
+HOST_STATE_SIZE = 10000
+
+class LRUDict(OrderedDict):
+    """Dict holding at most maxsize keys; reads and writes mark a key as recently used
+    and the least recently used key is evicted on overflow"""
+
+    def __init__(self, maxsize):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+
+class TokenBucket:
+    """Thread-safe token bucket; reserve() returns how long the caller must wait"""
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class PolitenessScheduler:
+    """Gatekeeper for outbound HTTP/DNS/TLS requests: per-host and per-IP token buckets,
+    Retry-After and exponential backoff on 429/503, and a global concurrency limit.
+
+    Callers wait for a throttled host *before* taking a global slot, so other hosts keep
+    the global concurrency saturated while one host is backing off."""
+
+    def __init__(self, host_rate=2.0, host_burst=4, ip_rate=5.0, ip_burst=10, dns_rate=50.0,
+                 max_concurrency=32, max_retries=3, base_backoff=1.0, max_backoff=120.0):
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self.ip_rate = ip_rate
+        self.ip_burst = ip_burst
+        self.dns_rate = dns_rate
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.global_slots = threading.BoundedSemaphore(max_concurrency)
+        self.lock = threading.Lock()
+        # An evicted bucket is idle and refills to its burst anyway
+        self.buckets = LRUDict(HOST_STATE_SIZE)
+        self.blocked_until = LRUDict(HOST_STATE_SIZE)
+        self.ip_cache = LRUDict(HOST_STATE_SIZE)
+
+    def configure(self, host_rate=None, host_burst=None, ip_rate=None, ip_burst=None, max_concurrency=None):
+        with self.lock:
+            self.host_rate = host_rate or self.host_rate
+            self.host_burst = host_burst or self.host_burst
+            self.ip_rate = ip_rate or self.ip_rate
+            self.ip_burst = ip_burst or self.ip_burst
+            self.buckets = LRUDict(HOST_STATE_SIZE)
+        if max_concurrency:
+            self.global_slots = threading.BoundedSemaphore(max_concurrency)
+
+    def _bucket(self, key):
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                kind = key[0]
+                if kind == 'ip':
+                    bucket = TokenBucket(self.ip_rate, self.ip_burst)
+                elif kind == 'dns':
+                    bucket = TokenBucket(self.dns_rate, self.dns_rate)
+                else:
+                    bucket = TokenBucket(self.host_rate, self.host_burst)
+                self.buckets[key] = bucket
+            return bucket
+
+    def resolve_ip(self, host):
+        """Cached address for host, used to key the per-IP bucket"""
+        with self.lock:
+            if host in self.ip_cache:
+                return self.ip_cache[host]
+        try:
+            ip = socket.getaddrinfo(host, None)[0][4][0]
+        except (socket.gaierror, UnicodeError, IndexError):
+            ip = None
+        with self.lock:
+            self.ip_cache[host] = ip
+        return ip
+
+    def _keys(self, host, ip, kind):
+        if kind == 'dns':
+            return [('dns', 'resolver')]
+        if kind == 'whois':
+            return [('whois', host)]
+        keys = [('host', host)]
+        if ip:
+            keys.append(('ip', ip))
+        return keys
+
+    def wait_turn(self, host, ip=None, kind='http'):
+        """Block until host (and its IP) may be contacted again. Raises DeadlineExceeded
+        instead of waiting past the current target's deadline."""
+        keys = self._keys(host, ip, kind)
+        while True:
+            with self.lock:
+                blocked = max([self.blocked_until.get(key, 0) for key in keys])
+            delay = blocked - time.time()
+            if delay <= 0:
+                break
+            remaining = time_left()
+            if remaining is not None and delay > remaining:
+                raise DeadlineExceeded()
+            time.sleep(min(delay, 1.0))
+        delay = max(self._bucket(key).reserve() for key in keys)
+        if delay > 0:
+            remaining = time_left()
+            if remaining is not None and delay > remaining:
+                raise DeadlineExceeded()
+            time.sleep(delay)
+
+    @contextmanager
+    def slot(self, host, ip=None, kind='http'):
+        self.wait_turn(host, ip, kind)
+        if not self.global_slots.acquire(timeout=time_left()):
+            raise DeadlineExceeded()
+        try:
+            yield
+        finally:
+            self.global_slots.release()
+
+    def backoff(self, host, ip=None, attempt=0, retry_after=None):
+        """Pause all requests to host/ip for Retry-After or an exponential, jittered delay"""
+        if retry_after is None:
+            retry_after = min(self.max_backoff, self.base_backoff * (2 ** attempt))
+            retry_after = random.uniform(retry_after / 2, retry_after)
+        until = time.time() + min(retry_after, self.max_backoff)
+        with self.lock:
+            for key in self._keys(host, ip, 'http'):
+                self.blocked_until[key] = max(self.blocked_until.get(key, 0), until)
+        return retry_after
+
+    def request(self, method, url, **kwargs):
+        """dual_stack_request() through the scheduler, retrying 429/503 responses"""
+        host = urlparse(url).hostname or ''
+        ip = self.resolve_ip(host)
+        for attempt in range(self.max_retries + 1):
+            with self.slot(host, ip), LIMITERS['http'].slot() as outcome:
+                response = dual_stack_request(method, url, **kwargs)
+                outcome['error'] = response.status_code >= 500 or response.status_code == 429
+            METRICS.inc('omar_http_requests_total', status=response.status_code)
+            if response.status_code not in (429, 503) or attempt == self.max_retries:
+                return response
+            delay = self.backoff(host, ip, attempt, parse_retry_after(response.headers.get('Retry-After')))
+            METRICS.inc('omar_http_backoffs_total', status=response.status_code)
+            print_warning(f"{host} answered {response.status_code}, backing off {delay:.1f}s")
+        return response
+
+SCHEDULER = PolitenessScheduler()
+METRICS.register('omar_http_backoffs_total', 'counter', "Backoffs triggered by 429/503 responses")
+
+# ==================== ADAPTIVE CONCURRENCY ====================
+class AdaptiveLimiter:
+    """AIMD in-flight limit: grows by one per window of healthy completions and halves on
+    timeouts, error bursts or RTT inflation over the observed baseline"""
+
+    def __init__(self, name, initial=8, minimum=1, maximum=128, decrease=0.5,
+                 latency_tolerance=2.5, error_threshold=0.2, window=20):
+        self.name = name
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.error_threshold = error_threshold
+        self.window = window
+        self.in_flight = 0
+        self.baseline_rtt = None
+        self.outcomes = []
+        self.last_decrease = 0.0
+        self.condition = threading.Condition()
+        self._publish()
+
+    def _publish(self):
+        METRICS.set('omar_concurrency_limit', int(self.limit), limiter=self.name)
+        METRICS.set('omar_concurrency_in_flight', self.in_flight, limiter=self.name)
+
+    def acquire(self):
+        """Take an in-flight slot, waiting no longer than the current deadline allows"""
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                self.condition.wait(time_left())
+            self.in_flight += 1
+            self._publish()
+
+    def release(self, rtt, error=False):
+        """Record one completed operation; error covers timeouts and failed requests"""
+        with self.condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            self.outcomes.append(bool(error))
+            if len(self.outcomes) > self.window:
+                self.outcomes.pop(0)
+            if not error:
+                if self.baseline_rtt is None or rtt < self.baseline_rtt:
+                    self.baseline_rtt = rtt
+                else:
+                    # Let the baseline drift up slowly so a route change is not congestion forever
+                    self.baseline_rtt += (rtt - self.baseline_rtt) * 0.01
+            error_rate = sum(self.outcomes) / len(self.outcomes)
+            congested = error or (
+                self.baseline_rtt is not None
+                and rtt > max(self.baseline_rtt * self.latency_tolerance, self.baseline_rtt + 0.05)
+            )
+            # Decrease at most once per RTT so one burst of losses is one congestion signal
+            cooldown = max(self.baseline_rtt or 0.1, 0.1)
+            if congested and (error_rate >= self.error_threshold or not error) and now - self.last_decrease > cooldown:
+                self.limit = max(self.minimum, self.limit * self.decrease)
+                self.last_decrease = now
+            elif not congested:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._publish()
+            self.condition.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """Hold one in-flight slot; set outcome['error'] = True to report a failure"""
+        self.acquire()
+        outcome = {'error': False}
+        start = time.monotonic()
+        try:
+            yield outcome
+        except Exception:
+            outcome['error'] = True
+            raise
+        finally:
+            self.release(time.monotonic() - start, outcome['error'])
+
+METRICS.register('omar_concurrency_limit', 'gauge', "Current adaptive in-flight limit by limiter")
+METRICS.register('omar_concurrency_in_flight', 'gauge', "Operations in flight by limiter")
+METRICS.register('omar_adaptive_task_errors_total', 'counter', "Adaptive tasks that raised instead of reporting an error")
+
+LIMITERS = {
+    'http': AdaptiveLimiter('http', initial=8, maximum=64),
+    'ports': AdaptiveLimiter('ports', initial=16, maximum=512),
+    'subdomains': AdaptiveLimiter('subdomains', initial=16, maximum=256),
+    'paths': AdaptiveLimiter('paths', initial=8, maximum=64)
+}
+
+def run_adaptive(limiter, func, items):
+    """Call func(item) for every item with in-flight work bounded by limiter; yields
+    (item, result) as tasks finish. func reports failures by returning (result, error).
+    An exception it raises counts as an error too: DeadlineExceeded is re-raised here
+    once running tasks have finished, anything else is counted and yields (item, None)."""
+    def task(item):
+        start = time.monotonic()
+        error = True
+        try:
+            result, error = func(item)
+            return result
+        finally:
+            limiter.release(time.monotonic() - start, error)
+
+    running = {}
+
+    def collect(future):
+        item = running.pop(future)
+        try:
+            return item, future.result()
+        except DeadlineExceeded:
+            raise
+        except Exception:
+            METRICS.inc('omar_adaptive_task_errors_total', limiter=limiter.name)
+            return item, None
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=limiter.maximum) as executor:
+        for item in items:
+            limiter.acquire()
+            running[executor.submit(task, item)] = item
+            for future in [future for future in running if future.done()]:
+                yield collect(future)
+        while running:
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                yield collect(future)
+
+def print_concurrency_limits():
+    print_subsection("Adaptive concurrency")
+    for name, limiter in LIMITERS.items():
+        baseline = f"{limiter.baseline_rtt * 1000:.1f} ms" if limiter.baseline_rtt is not None else "n/a"
+        print_info(name, f"limit {int(limiter.limit)}, baseline RTT {baseline}")
+
+# ==================== RESILIENCE ====================
+class HostUnavailable(Exception):
+    """Raised instead of contacting a host whose circuit breaker is open"""
+
+TRANSIENT_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    socket.timeout,
+    ConnectionError,
+    dns.resolver.LifetimeTimeout,
+    dns.resolver.NoNameservers
+)
+
+class DeadlineExceeded(Exception):
+    """Raised when the current target has used up its time budget"""
+
+_DEADLINE = threading.local()
+
+METRICS.register('omar_deadline_abandoned_calls_total', 'counter', "Blocking calls abandoned when a target's time budget ran out")
+
+@contextmanager
+def deadline_scope(deadline):
+    """Make deadline (a time.monotonic() value, or None for no limit) the budget for
+    every call made on this thread inside the block"""
+    previous = getattr(_DEADLINE, 'at', None)
+    _DEADLINE.at = deadline
+    try:
+        yield
+    finally:
+        _DEADLINE.at = previous
+
+def current_deadline():
+    return getattr(_DEADLINE, 'at', None)
+
+def deadline_passed():
+    deadline = current_deadline()
+    return deadline is not None and time.monotonic() >= deadline
+
+def time_left(timeout=None):
+    """Cap timeout to what is left of the current budget; raises DeadlineExceeded
+    once it is spent. Returns timeout unchanged when no deadline is set."""
+    deadline = current_deadline()
+    if deadline is None:
+        return timeout
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceeded()
+    return remaining if timeout is None else min(timeout, remaining)
+
+def bind_deadline(func):
+    """Carry the caller's deadline into func when it runs on a pool thread"""
+    deadline = current_deadline()
+
+    @functools.wraps(func)
+    def call(*args, **kwargs):
+        with deadline_scope(deadline):
+            return func(*args, **kwargs)
+    return call
+
+def until_deadline(func):
+    """Wrap a blocking call that takes no timeout (socket lookups, whois, ...) so the
+    caller stops waiting when the budget runs out. The call keeps running on its
+    daemon thread and its result is dropped."""
+    @functools.wraps(func)
+    def call(*args, **kwargs):
+        if current_deadline() is None:
+            return func(*args, **kwargs)
+        remaining = time_left()
+        outcome = {}
+
+        def run():
+            try:
+                outcome['value'] = func(*args, **kwargs)
+            except BaseException as e:
+                outcome['error'] = e
+
+        worker = threading.Thread(target=run, daemon=True)
+        worker.start()
+        worker.join(remaining)
+        if worker.is_alive():
+            METRICS.inc('omar_deadline_abandoned_calls_total', operation=getattr(func, '__name__', 'call'))
+            raise DeadlineExceeded()
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome['value']
+    return call
+
+def within_deadline(items):
+    """Yield items until the current budget runs out"""
+    for item in items:
+        if deadline_passed():
+            return
+        yield item
+
+def with_retries(func, *args, attempts=3, base_delay=0.5, max_delay=8.0, retry_on=TRANSIENT_ERRORS, **kwargs):
+    """Call func, retrying transient errors with exponential backoff and full jitter.
+    Raises DeadlineExceeded instead of sleeping past the current deadline."""
+    for attempt in range(attempts):
+        try:
+            return func(*args, **kwargs)
+        except HostUnavailable:
+            raise
+        except retry_on as e:
+            if attempt == attempts - 1:
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+            deadline = current_deadline()
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                # A budget cut-off, not a network failure; the phase is then marked incomplete
+                raise DeadlineExceeded() from e
+            METRICS.inc('omar_retries_total', operation=getattr(func, '__name__', 'call'))
+            time.sleep(delay)
+
+HOST_DOWN_ERRNOS = {errno.ECONNREFUSED, errno.ENETUNREACH, errno.EHOSTUNREACH, errno.EHOSTDOWN, errno.ETIMEDOUT}
+
+def error_causes(error):
+    """error followed by the exceptions it wraps (urllib3 reasons, __cause__, __context__)"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        wrapped = getattr(error, 'reason', None)
+        if not isinstance(wrapped, BaseException) and error.args and isinstance(error.args[0], BaseException):
+            wrapped = error.args[0]
+        if not isinstance(wrapped, BaseException):
+            wrapped = error.__cause__ or error.__context__
+        error = wrapped
+
+def is_host_down_error(error):
+    """True for errors meaning the host does not answer: refused, unreachable, unresolvable
+    or timed-out connections. TLS and certificate failures come from a live host and never count."""
+    if isinstance(error, HostUnavailable):
+        return True
+    if isinstance(error, DeadlineExceeded):
+        # Our own budget ran out, whatever network error it interrupted
+        return False
+    causes = list(error_causes(error))
+    if any(isinstance(cause, (ssl.SSLError, requests.exceptions.SSLError, urllib3.exceptions.SSLError))
+           for cause in causes):
+        return False
+    for cause in causes:
+        if isinstance(cause, (requests.Timeout, urllib3.exceptions.TimeoutError, socket.timeout, socket.gaierror)):
+            return True
+        if isinstance(cause, OSError) and cause.errno in HOST_DOWN_ERRNOS:
+            return True
+    return False
+
+class CircuitBreaker:
+    """Per-host breaker: opens after consecutive connect failures, lets a single probe
+    through after reset_timeout (half-open) and closes again on success"""
+
+    def __init__(self, failure_threshold=1, reset_timeout=300):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.lock = threading.Lock()
+        self.failures = LRUDict(HOST_STATE_SIZE)
+        self.opened_at = LRUDict(HOST_STATE_SIZE)
+        self.probing = set()
+
+    def allow(self, host):
+        with self.lock:
+            opened = self.opened_at.get(host)
+            if opened is None:
+                return True
+            if time.time() - opened >= self.reset_timeout and host not in self.probing:
+                self.probing.add(host)
+                return True
+            return False
+
+    def is_open(self, host):
+        with self.lock:
+            return host in self.opened_at
+
+    def check(self, host):
+        if not self.allow(host):
+            METRICS.inc('omar_circuit_rejections_total')
+            raise HostUnavailable(f"{host} is unreachable (circuit open)")
+
+    def record_success(self, host):
+        with self.lock:
+            self.failures.pop(host, None)
+            self.opened_at.pop(host, None)
+            self.probing.discard(host)
+
+    def record_failure(self, host):
+        with self.lock:
+            self.probing.discard(host)
+            self.failures[host] = self.failures.get(host, 0) + 1
+            if self.failures[host] >= self.failure_threshold:
+                if host not in self.opened_at:
+                    METRICS.inc('omar_circuit_opened_total')
+                self.opened_at[host] = time.time()
+
+BREAKER = CircuitBreaker()
+METRICS.register('omar_retries_total', 'counter', "Retried operations after transient errors")
+METRICS.register('omar_circuit_opened_total', 'counter', "Hosts whose circuit breaker opened")
+METRICS.register('omar_circuit_rejections_total', 'counter', "Operations skipped because a circuit was open")
+
+def resilient_call(host, func, *args, **kwargs):
+    """with_retries() guarded by the host's circuit breaker. Every attempt counts toward
+    the breaker, and once it opens the error is raised as HostUnavailable, which is never
+    retried: a host that does not answer costs one connect timeout, not one per retry."""
+    def attempt(*args, **kwargs):
+        BREAKER.check(host)
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if is_host_down_error(e):
+                BREAKER.record_failure(host)
+                if BREAKER.is_open(host):
+                    raise HostUnavailable(f"{host} is unreachable: {str(e)}") from e
+            raise
+        BREAKER.record_success(host)
+        return result
+    attempt.__name__ = getattr(func, '__name__', 'call')
+    return with_retries(attempt, *args, **kwargs)
+
+def polite_get(url, **kwargs):
+    """GET through the politeness scheduler with retries and the host's circuit breaker"""
+    host = urlparse(url).hostname or ''
+    return resilient_call(host, SCHEDULER.request, 'GET', url, **kwargs)
+
+HOST_UNREACHABLE = "Skipped: host unreachable"
+
+# ==================== DUAL-STACK CONNECTIONS ====================
+# Happy Eyeballs v2 connection attempt delay (RFC 8305 section 5)
+CONNECTION_ATTEMPT_DELAY = 0.25
+
+METRICS.register('omar_connections_total', 'counter', "Dual-stack connections by the address family that answered")
+
+def address_family_name(family):
+    return 'IPv6' if family == socket.AF_INET6 else 'IPv4'
+
+def interleave_families(addresses):
+    """Alternate address families, IPv6 first (RFC 8305 section 4), dropping duplicates"""
+    seen = set()
+    by_family = ([a for a in addresses if a[0] == socket.AF_INET6], [a for a in addresses if a[0] != socket.AF_INET6])
+    ordered = []
+    for pair in itertools.zip_longest(*by_family):
+        for address in pair:
+            if address is not None and address[1] not in seen:
+                seen.add(address[1])
+                ordered.append(address)
+    return ordered
+
+def resolve_dual_stack(host, port=None):
+    """AAAA and A addresses of host as [(family, sockaddr)] in connection order. A single
+    getaddrinfo() call asks for both (the system resolver sends the two queries together);
+    raises socket.gaierror if neither family resolves."""
+    try:
+        literal = ipaddress.ip_address(host.strip('[]'))
+        family = socket.AF_INET6 if literal.version == 6 else socket.AF_INET
+        return [(family, (str(literal), port or 0))]
+    except ValueError:
+        pass
+    infos = socket.getaddrinfo(host, port, socket.AF_UNSPEC, socket.SOCK_STREAM)
+    return interleave_families([(info[0], info[4]) for info in infos
+                                if info[0] in (socket.AF_INET, socket.AF_INET6)])
+
+def connect_dual_stack(host, port, timeout=None, addresses=None, source_address=None, socket_options=None):
+    """Connect to host:port Happy Eyeballs style (RFC 8305): attempts over the resolved
+    addresses start CONNECTION_ATTEMPT_DELAY apart, or as soon as the previous one fails,
+    and the first to complete wins. Returns a blocking socket with timeout applied; its
+    family says which address family answered."""
+    if addresses is None:
+        addresses = resolve_dual_stack(host, port)
+    connect_timeout = time_left(timeout)
+    give_up = time.monotonic() + connect_timeout if connect_timeout is not None else None
+    pending = list(addresses)
+    attempts = []
+    selector = selectors.DefaultSelector()
+    error = None
+    next_attempt = 0.0
+    try:
+        while pending or attempts:
+            now = time.monotonic()
+            if give_up is not None and now >= give_up:
+                raise socket.timeout(f"Connection to {host}:{port} timed out")
+            if pending and now >= next_attempt:
+                family, sockaddr = pending.pop(0)
+                sock = socket.socket(family, socket.SOCK_STREAM)
+                try:
+                    for option in socket_options or ():
+                        sock.setsockopt(*option)
+                    if source_address:
+                        sock.bind(source_address)
+                    sock.setblocking(False)
+                    code = sock.connect_ex(sockaddr)
+                    if code not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+                        raise OSError(code, os.strerror(code))
+                except OSError as e:
+                    sock.close()
+                    error = e
+                    continue
+                selector.register(sock, selectors.EVENT_WRITE, sockaddr)
+                attempts.append(sock)
+                next_attempt = now + CONNECTION_ATTEMPT_DELAY
+                continue
+            wait = max(0, next_attempt - now) if pending else None
+            if give_up is not None:
+                wait = give_up - now if wait is None else min(wait, give_up - now)
+            for key, _ in selector.select(wait):
+                sock = key.fileobj
+                selector.unregister(sock)
+                attempts.remove(sock)
+                code = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if code:
+                    sock.close()
+                    error = OSError(code, f"{os.strerror(code)} ({key.data[0]})")
+                    next_attempt = 0.0
+                    continue
+                sock.setblocking(True)
+                sock.settimeout(timeout)
+                METRICS.inc('omar_connections_total', family=address_family_name(sock.family))
+                return sock
+        raise error or OSError(f"No addresses to connect to for {host}")
+    finally:
+        for sock in attempts:
+            sock.close()
+        selector.close()
+
+class DualStackConnectionMixin:
+    """Opens urllib3 connections with connect_dual_stack(), raising the errors urllib3's
+    own _new_conn() would. peer is the (address, family name) that answered."""
+    peer = (None, None)
+
+    def _new_conn(self):
+        timeout = self.timeout if isinstance(self.timeout, (int, float)) else socket.getdefaulttimeout()
+        try:
+            sock = connect_dual_stack(self._dns_host.strip('[]'), self.port, timeout,
+                                      source_address=self.source_address, socket_options=self.socket_options)
+            self.peer = (sock.getpeername()[0], address_family_name(sock.family))
+            return sock
+        except socket.gaierror as e:
+            raise urllib3.exceptions.NameResolutionError(self.host, self, e) from e
+        except socket.timeout as e:
+            raise urllib3.exceptions.ConnectTimeoutError(
+                self, f"Connection to {self.host} timed out. (connect timeout={timeout})") from e
+        except OSError as e:
+            raise urllib3.exceptions.NewConnectionError(self, f"Failed to establish a new connection: {e}") from e
+
+class DualStackHTTPConnection(DualStackConnectionMixin, urllib3.connection.HTTPConnection):
+    pass
+
+class DualStackHTTPSConnection(DualStackConnectionMixin, urllib3.connection.HTTPSConnection):
+    pass
+
+class DualStackHTTPConnectionPool(urllib3.HTTPConnectionPool):
+    ConnectionCls = DualStackHTTPConnection
+
+class DualStackHTTPSConnectionPool(urllib3.HTTPSConnectionPool):
+    ConnectionCls = DualStackHTTPSConnection
+
+class DualStackAdapter(requests.adapters.HTTPAdapter):
+    """requests adapter connecting over connect_dual_stack(); responses carry the
+    peer_address and address_family of the connection that answered"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': DualStackHTTPConnectionPool,
+                                                   'https': DualStackHTTPSConnectionPool}
+
+    def build_response(self, req, resp):
+        response = super().build_response(req, resp)
+        # The connection, not its socket: http.client drops the socket of a closing connection
+        response.peer_address, response.address_family = getattr(resp.connection, 'peer', (None, None))
+        return response
+
+def dual_stack_request(method, url, **kwargs):
+    """requests.request() over dual-stack connections. Only the tool's own requests go
+    through it; urllib3 is left untouched for everything else in the process."""
+    with requests.Session() as session:
+        adapter = DualStackAdapter()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session.request(method, url, **kwargs)
+
 # ==================== ADVANCED FACEBOOK MODULE ====================
 def facebook_module():
     print_header("FACEBOOK PENETRATION MODULE")
@@ -1033,6 +2443,152 @@ def view_instagram_data():
         print_info("Extracted At", row[19])
         print("-" * 80)
 
+# ==================== SCAN RESULT MODEL ====================
+DNS_RECORD_TYPES = ('A', 'MX', 'NS', 'TXT', 'CNAME')
+
+@dataclass(slots=True)
+class Header:
+    name: str
+    value: str
+
+@dataclass(slots=True)
+class DNSRecord:
+    rtype: str
+    value: str
+
+@dataclass(slots=True)
+class PortResult:
+    port: int
+    service: str
+    protocol: str = 'tcp'
+
+    def __str__(self):
+        return f"{self.port}/{self.protocol} - {self.service}"
+
+    @classmethod
+    def parse(cls, text):
+        """Inverse of str(): '443/tcp - HTTPS'"""
+        port, rest = text.split('/', 1)
+        protocol, service = rest.split(' - ', 1)
+        return cls(int(port), service, protocol)
+
+@dataclass(slots=True)
+class FormInput:
+    name: str
+    type: str
+    value: str
+
+@dataclass(slots=True)
+class Form:
+    action: str
+    method: str
+    inputs: list
+
+@dataclass(slots=True)
+class Link:
+    text: str
+    href: str
+
+def _json_default(value):
+    if is_dataclass(value):
+        return {f.name: getattr(value, f.name) for f in fields(value)}
+    return str(value)
+
+@dataclass(slots=True)
+class IPScan:
+    """Result of a phase that depends only on the address, shared by co-hosted targets"""
+    ip: str
+    kind: str
+    key: str
+    result: object
+    scanned_at: float
+
+@dataclass(slots=True)
+class ScanResult:
+    """Everything one website scan found, kept as native values until it is stored.
+    Fields left as None were not collected; strings in structured fields are status messages."""
+    url: str
+    title: str = None
+    ip_address: str = None
+    server: str = None
+    technologies: list = None
+    whois_data: dict = None
+    dns_records: list = None
+    ssl_info: dict = None
+    headers: list = None
+    cookies: dict = None
+    meta_tags: dict = None
+    scripts: list = None
+    forms: list = None
+    links: list = None
+    vulnerabilities: list = None
+    subdomains: list = None
+    directories: list = None
+    ports: list = None
+    cms: dict = None
+    waf: str = None
+    framework: str = None
+    geoip: dict = None
+    ip_addresses: list = None
+    address_family: str = None
+    status: str = None
+    incomplete_phases: list = None
+    ip_scans: list = None
+
+    def to_dict(self):
+        """Field values in the shapes stored in website_data (DNS records grouped by type,
+        ports as 'port/tcp - service'); dataclass records are left for _json_default"""
+        data = {}
+        for f in fields(self):
+            value = getattr(self, f.name)
+            if value is not None and not isinstance(value, str):
+                if f.name == 'headers':
+                    value = {header.name: header.value for header in value}
+                elif f.name == 'dns_records':
+                    grouped = {rtype: [] for rtype in DNS_RECORD_TYPES}
+                    for record in value:
+                        grouped.setdefault(record.rtype, []).append(record.value)
+                    value = grouped
+                elif f.name == 'ports':
+                    value = [str(port) for port in value]
+            data[f.name] = value
+        return data
+
+    def to_row(self):
+        """website_data column values; the one place the result is serialized (compact JSON)"""
+        return {name: value if value is None or isinstance(value, str)
+                else json.dumps(value, separators=(',', ':'), default=_json_default)
+                for name, value in self.to_dict().items()}
+
+    @classmethod
+    def from_row(cls, row):
+        """Rebuild a result from to_row() output (batch checkpoints). JSON columns are decoded
+        back into records; a string that is not JSON is a status message and kept as is."""
+        values = {}
+        for f in fields(cls):
+            value = row.get(f.name)
+            if isinstance(value, str) and f.type is not str:
+                try:
+                    value = json.loads(value)
+                except ValueError:
+                    pass
+            if value is not None and not isinstance(value, str):
+                if f.name == 'headers':
+                    value = [Header(name, header) for name, header in value.items()]
+                elif f.name == 'dns_records':
+                    value = [DNSRecord(rtype, record) for rtype, records in value.items() for record in records]
+                elif f.name == 'ports':
+                    value = [PortResult.parse(port) for port in value]
+                elif f.name == 'forms':
+                    value = [Form(form['action'], form['method'], [FormInput(**field) for field in form['inputs']])
+                             for form in value]
+                elif f.name == 'links':
+                    value = [Link(**link) for link in value]
+                elif f.name == 'ip_scans':
+                    value = [IPScan(**scan) for scan in value]
+            values[f.name] = value
+        return cls(**values)
+
 # ==================== ADVANCED WEBSITE PENETRATION MODULE ====================
 def website_module():
     print_header("WEBSITE PENETRATION MODULE")
@@ -1040,7 +2596,10 @@ def website_module():
     print("2. Advanced website reconnaissance")
     print("3. Vulnerability assessment")
     print("4. View saved website data")
-    print("5. Back to main menu{Colors.RESET}")
+    print("5. Crawl website")
+    print("6. Robots.txt & sitemap analysis")
+    print("7. Scan a network range or target list")
+    print("8. Back to main menu{Colors.RESET}")
     
     choice = input(f"\n{Colors.YELLOW}Select an option: {Colors.RESET}")
     
@@ -1066,6 +2625,21 @@ def website_module():
         view_website_data()
     
     elif choice == "5":
+        url = input(f"{Colors.YELLOW}Enter website URL: {Colors.RESET}")
+        if not url.startswith(('http://', 'https://')):
+            url = 'https://' + url
+        crawl_website_interactive(url)
+    
+    elif choice == "6":
+        url = input(f"{Colors.YELLOW}Enter website URL: {Colors.RESET}")
+        if not url.startswith(('http://', 'https://')):
+            url = 'https://' + url
+        robots_sitemap_interactive(url)
+    
+    elif choice == "7":
+        target_scan_interactive()
+    
+    elif choice == "8":
         return
     
     else:
@@ -1074,369 +2648,984 @@ def website_module():
     input(f"\n{Colors.YELLOW}Press Enter to continue...{Colors.RESET}")
     website_module()
 
-def penetrate_website(url):
-    """Perform comprehensive website penetration testing"""
-    loading_animation("Launching comprehensive website penetration attack", 10)
+def target_scan_interactive():
+    """Scan URLs, CIDRs, ranges or a target file, expanded lazily"""
+    print(f"{Colors.CYAN}Targets: URLs, hosts, addresses, CIDRs (10.0.0.0/24) or ranges (10.0.0.1-50),")
+    print(f"separated by spaces, or @file for a list. Only scan networks you are authorized to test.{Colors.RESET}")
+    specs = input(f"{Colors.YELLOW}Targets: {Colors.RESET}").split()
+    exclude = input(f"{Colors.YELLOW}Exclude (optional): {Colors.RESET}").split()
+    shuffle = input(f"{Colors.YELLOW}Shuffle address order? (y/N): {Colors.RESET}").strip().lower() == 'y'
     
-    data = {
-        'url': url,
-        'title': None,
-        'ip_address': None,
-        'server': None,
-        'technologies': None,
-        'whois_data': None,
-        'dns_records': None,
-        'ssl_info': None,
-        'headers': None,
-        'cookies': None,
-        'meta_tags': None,
-        'scripts': None,
-        'forms': None,
-        'links': None,
-        'vulnerabilities': None,
-        'subdomains': None,
-        'directories': None,
-        'ports': None,
-        'cms': None,
-        'waf': None,
-        'framework': None
-    }
+    def targets():
+        for spec in specs:
+            if spec.startswith('@'):
+                yield from read_targets(spec[1:])
+            else:
+                yield spec
     
     try:
-        # Phase 1: Basic information gathering
-        headers = get_random_headers()
-        response = requests.get(url, headers=headers, timeout=25, verify=False)
-        
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Extract title
-            title_tag = soup.find('title')
-            if title_tag:
-                data['title'] = title_tag.text.strip()
-            
-            # Extract server information
-            if 'server' in response.headers:
-                data['server'] = response.headers['server']
-            
-            # Extract headers
-            data['headers'] = json.dumps(dict(response.headers), indent=2)
-            
-            # Extract cookies
-            data['cookies'] = json.dumps(dict(response.cookies), indent=2)
-            
-            # Extract meta tags
-            meta_tags = {}
-            for meta in soup.find_all('meta'):
-                if meta.get('name'):
-                    meta_tags[meta['name']] = meta.get('content', '')
-                elif meta.get('property'):
-                    meta_tags[meta['property']] = meta.get('content', '')
-            data['meta_tags'] = json.dumps(meta_tags, indent=2)
-            
-            # Extract scripts
-            scripts = []
-            for script in soup.find_all('script'):
-                if script.get('src'):
-                    scripts.append(script['src'])
-            data['scripts'] = json.dumps(scripts, indent=2)
-            
-            # Extract forms
-            forms = []
-            for form in soup.find_all('form'):
-                form_info = {
-                    'action': form.get('action'),
-                    'method': form.get('method', 'GET'),
-                    'inputs': []
-                }
-                for input_tag in form.find_all('input'):
-                    form_info['inputs'].append({
-                        'name': input_tag.get('name'),
-                        'type': input_tag.get('type', 'text'),
-                        'value': input_tag.get('value')
-                    })
-                forms.append(form_info)
-            data['forms'] = json.dumps(forms, indent=2)
-            
-            # Extract links
-            links = []
-            for link in soup.find_all('a'):
-                if link.get('href'):
-                    links.append({
-                        'text': link.text.strip(),
-                        'href': link['href']
-                    })
-            data['links'] = json.dumps(links, indent=2)
-            
-            # Detect technologies
-            data['technologies'] = json.dumps(detect_technologies(response.text, response.headers), indent=2)
-        
-        # Phase 2: Network reconnaissance
-        loading_animation("Performing network reconnaissance", 5)
-        get_network_info(data)
-        
-        # Phase 3: Advanced reconnaissance
-        loading_animation("Executing advanced reconnaissance", 6)
-        get_advanced_website_info(data)
-        
-        # Phase 4: Vulnerability assessment
-        loading_animation("Running vulnerability assessment", 7)
-        get_website_vulnerabilities(data)
-        
-        # Save to database
-        conn = setup_database()
-        c = conn.cursor()
-        c.execute('''INSERT INTO website_data 
-                    (url, title, ip_address, server, technologies, whois_data, dns_records,
-                     ssl_info, headers, cookies, meta_tags, scripts, forms, links,
-                     vulnerabilities, subdomains, directories, ports, cms, waf, framework)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-                    (data['url'], data['title'], data['ip_address'], data['server'],
-                     data['technologies'], data['whois_data'], data['dns_records'],
-                     data['ssl_info'], data['headers'], data['cookies'], data['meta_tags'],
-                     data['scripts'], data['forms'], data['links'], data['vulnerabilities'],
-                     data['subdomains'], data['directories'], data['ports'], data['cms'],
-                     data['waf'], data['framework']))
+        scan_websites(targets(), workers=16, expander=TargetExpander(exclude, shuffle=shuffle))
+    except (OSError, ValueError) as e:
+        print_error(f"Target scan failed: {str(e)}")
+
+# ==================== SCAN PHASES ====================
+# Seconds of phase time each target may use before its remaining phases are cut off
+# and the result is saved as partial; 0 or None disables the budget
+DEFAULT_TARGET_BUDGET = 300
+
+@dataclass(slots=True)
+class ScanContext:
+    """State shared by the phases of one website scan; span is the running phase's trace span.
+    budget is the target's time budget in seconds, spent how much of it the phases have used."""
+    url: str
+    result: ScanResult
+    parser: object = None
+    response: object = None
+    assets: dict = None
+    span: dict = None
+    budget: float = None
+    spent: float = 0.0
+    peer_address: str = None
+
+@dataclass(slots=True)
+class ScanPhase:
+    """A registered website scan phase. inputs and outputs name ScanContext or ScanResult
+    attributes; cost is 'local' (no network), 'light' (a few requests) or 'heavy'."""
+    name: str
+    run: object
+    inputs: tuple = ()
+    outputs: tuple = ()
+    cost: str = 'light'
+    description: str = ''
+
+PHASE_COSTS = ('local', 'light', 'heavy')
+# A profile runs every phase up to its cost class, plus whatever those phases need
+PHASE_PROFILES = {'quick': 'local', 'standard': 'light', 'deep': 'heavy'}
+DEFAULT_SCAN_PROFILE = 'deep'
+# Phase names from before the phases were split up, still accepted in --phases and queued jobs
+PHASE_GROUPS = {
+    'network': ('dns', 'reverse_dns', 'whois', 'dns_records', 'ssl'),
+    'advanced': ('subdomains', 'directories', 'paths', 'ports', 'cms', 'waf', 'framework')
+}
+SCAN_PHASES = {}
+
+def register_phase(name, inputs=(), outputs=(), cost='light', description=None):
+    """Decorator registering func(scan) as a website scan phase; scan is a ScanContext.
+    Plugins use it the same way as the built-in phases below."""
+    if cost not in PHASE_COSTS:
+        raise ValueError(f"Phase {name}: cost must be one of {', '.join(PHASE_COSTS)}")
+    
+    def decorator(func):
+        SCAN_PHASES[name] = ScanPhase(name, func, tuple(inputs), tuple(outputs), cost,
+                                      description or (func.__doc__ or name).strip().splitlines()[0])
+        return func
+    return decorator
+
+def phase_providers():
+    """Output name -> the first registered phase producing it"""
+    providers = {}
+    for phase in SCAN_PHASES.values():
+        for output in phase.outputs:
+            providers.setdefault(output, phase.name)
+    return providers
+
+def resolve_phases(selection=None):
+    """Phase names to run, in registration order: the selected phases, groups and
+    profiles (the default profile if none) plus the phases producing their inputs"""
+    wanted = set()
+    for name in selection or (DEFAULT_SCAN_PROFILE,):
+        if name in PHASE_PROFILES:
+            limit = PHASE_COSTS.index(PHASE_PROFILES[name])
+            wanted.update(phase.name for phase in SCAN_PHASES.values() if PHASE_COSTS.index(phase.cost) <= limit)
+        elif name in PHASE_GROUPS:
+            wanted.update(PHASE_GROUPS[name])
+        elif name in SCAN_PHASES:
+            wanted.add(name)
+        else:
+            raise ValueError(f"Unknown phase or profile: {name}")
+    
+    providers = phase_providers()
+    needed = set()
+    
+    def visit(name, path):
+        if name in path:
+            raise ValueError(f"Phase dependency cycle: {' -> '.join(path + (name,))}")
+        if name in needed:
+            return
+        for value in SCAN_PHASES[name].inputs:
+            if value not in providers:
+                raise ValueError(f"Phase {name} needs {value}, which no phase provides")
+            if providers[value] != name:
+                visit(providers[value], path + (name,))
+        needed.add(name)
+    
+    for name in wanted:
+        visit(name, ())
+    # Providers are registered before the phases reading their outputs, plugins after both
+    return [name for name in SCAN_PHASES if name in needed]
+
+def skippable_phases(phases, done):
+    """Phases a resumed scan need not run again: the finished ones, except those whose
+    outputs live only in the ScanContext (the response, parsed assets) and are still
+    needed by a phase that has not run"""
+    context_only = {f.name for f in fields(ScanContext)} - {f.name for f in fields(ScanResult)}
+    providers = phase_providers()
+    skip = set(done) & set(phases)
+    changed = True
+    while changed:
+        changed = False
+        for name in phases:
+            if name in skip:
+                continue
+            for value in SCAN_PHASES[name].inputs:
+                if value in context_only and providers[value] in skip:
+                    skip.discard(providers[value])
+                    changed = True
+    return skip
+
+def load_plugins(specs):
+    """Import third-party phase modules: module names, paths to .py files, and packages
+    advertising an 'omar.phases' entry point. They call omar.register_phase()."""
+    # When omar.py runs as a script, 'import omar' in a plugin must get this module, not a second copy
+    sys.modules.setdefault('omar', sys.modules[__name__])
+    for spec in specs:
+        if spec.endswith('.py') or os.sep in spec:
+            name = f"omar_plugin_{os.path.splitext(os.path.basename(spec))[0]}"
+            module_spec = importlib.util.spec_from_file_location(name, spec)
+            if module_spec is None:
+                raise ImportError(f"Cannot load plugin {spec}")
+            module = importlib.util.module_from_spec(module_spec)
+            sys.modules[name] = module
+            module_spec.loader.exec_module(module)
+        else:
+            importlib.import_module(spec)
+    for entry_point in importlib.metadata.entry_points(group='omar.phases'):
+        entry_point.load()
+
+def print_phase(phase):
+    print_info(phase['name'], f"{phase['cost']} - {phase['description']}")
+    if phase['inputs']:
+        print_bullet(f"needs: {', '.join(phase['inputs'])}")
+    print_bullet(f"gives: {', '.join(phase['outputs']) or '-'}")
+
+def list_phases():
+    with RENDERER.batch():
+        for phase in SCAN_PHASES.values():
+            record = {'name': phase.name, 'cost': phase.cost, 'inputs': list(phase.inputs),
+                      'outputs': list(phase.outputs), 'description': phase.description}
+            RENDERER.emit('phase', record, print_phase)
+
+def extract_page_assets(soup):
+    """Extract meta tags, script sources, forms and links from a parsed page"""
+    meta_tags = {}
+    for meta in soup.find_all('meta'):
+        if meta.get('name'):
+            meta_tags[meta['name']] = meta.get('content', '')
+        elif meta.get('property'):
+            meta_tags[meta['property']] = meta.get('content', '')
+    
+    scripts = []
+    for script in soup.find_all('script'):
+        if script.get('src'):
+            scripts.append(script['src'])
+    
+    forms = []
+    for form in soup.find_all('form'):
+        inputs = [FormInput(input_tag.get('name'), input_tag.get('type', 'text'), input_tag.get('value'))
+                  for input_tag in form.find_all('input')]
+        forms.append(Form(form.get('action'), form.get('method', 'GET'), inputs))
+    
+    links = []
+    for link in soup.find_all('a'):
+        if link.get('href'):
+            links.append(Link(link.text.strip(), link['href']))
+    
+    return {'meta_tags': meta_tags, 'scripts': scripts, 'forms': forms, 'links': links}
+
+def insert_website_data(conn, data, blobs=None, commit=True):
+    c = conn.cursor()
+    data = pack_website_data(c, data, blobs)
+    c.execute('''INSERT INTO website_data 
+                (url, title, ip_address, server, technologies, whois_data, dns_records,
+                 ssl_info, headers, cookies, meta_tags, scripts, forms, links,
+                 vulnerabilities, subdomains, directories, ports, cms, waf, framework, geoip,
+                 status, incomplete_phases, ip_addresses, address_family)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                (data['url'], data['title'], data['ip_address'], data['server'],
+                 data['technologies'], data['whois_data'], data['dns_records'],
+                 data['ssl_info'], data['headers'], data['cookies'], data['meta_tags'],
+                 data['scripts'], data['forms'], data['links'], data['vulnerabilities'],
+                 data['subdomains'], data['directories'], data['ports'], data['cms'],
+                 data['waf'], data['framework'], data.get('geoip'),
+                 data.get('status'), data.get('incomplete_phases'), data.get('ip_addresses'),
+                 data.get('address_family')))
+    website_id = c.lastrowid
+    if data.get('ip_scans'):
+        save_ip_scans(c, website_id, json.loads(data['ip_scans']))
+    if commit:
         conn.commit()
-        conn.close()
+    return website_id
+
+def insert_scan_metadata(conn, website_id, url, spans, memory_report):
+    c = conn.cursor()
+    save_scan_spans(c, website_id, url, spans)
+    if memory_report:
+        save_memory_report(c, website_id, memory_report)
+    conn.commit()
+
+def decode_page(content, encoding):
+    """response.text for raw page bytes (or any buffer), guessing the charset if needed"""
+    if encoding is None:
+        response = requests.Response()
+        response._content = bytes(content)
+        return response.text
+    try:
+        return str(content, encoding, errors='replace')
+    except LookupError:
+        return str(content, 'utf-8', errors='replace')
+
+def parse_page(body, encoding, headers):
+    """CPU-bound part of a website scan: decode and parse the page, extract assets and
+    detect technologies. body is bytes, or (shared memory name, size) when the page was
+    handed over by process_page_parser(); arguments and result are picklable."""
+    with trace_span("html_parse"):
+        if isinstance(body, tuple):
+            text = _decode_shared_page(*body, encoding)
+        else:
+            text = decode_page(body, encoding)
+        soup = BeautifulSoup(text, 'html.parser')
+    
+    with trace_span("extract"):
+        title_tag = soup.find('title')
+        page = {
+            'title': title_tag.text.strip() if title_tag else None,
+            'assets': extract_page_assets(soup)
+        }
+    
+    with trace_span("detect_technologies"):
+        page['technologies'] = detect_technologies(text, headers)
+    return page
+
+def _decode_shared_page(name, size, encoding):
+    try:
+        shm = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching also registers with the resource tracker, which the
+        # pool shares with the creating process, so the creator's unlink() still settles it
+        shm = shared_memory.SharedMemory(name=name)
+    try:
+        view = shm.buf[:size]
+        try:
+            return decode_page(view, encoding)
+        finally:
+            view.release()
+    finally:
+        shm.close()
+
+SHARED_BODY_MIN = 256 * 1024
+
+def process_page_parser(executor, shared_min=SHARED_BODY_MIN):
+    """parse_page() replacement that runs on a ProcessPoolExecutor. Pages of shared_min
+    bytes or more are copied once into shared memory instead of being pickled."""
+    def parse(content, encoding, headers):
+        if len(content) < shared_min:
+            return executor.submit(parse_page, content, encoding, headers).result()
+        shm = shared_memory.SharedMemory(create=True, size=len(content))
+        try:
+            shm.buf[:len(content)] = content
+            return executor.submit(parse_page, (shm.name, len(content)), encoding, headers).result()
+        finally:
+            shm.close()
+            shm.unlink()
+    return parse
+
+@register_phase('fetch', outputs=('response', 'server', 'headers', 'cookies', 'address_family'), cost='light')
+def fetch_phase(scan):
+    """Fetch the page and record its headers and cookies"""
+    try:
+        response = polite_get(scan.url, headers=get_random_headers(), timeout=time_left(25), verify=False)
+        scan.span['bytes'] += response_size(response)
+    except Exception as e:
+        if not is_host_down_error(e):
+            raise
+        # Host is down: keep the DNS/WHOIS phases, skip everything that contacts it
+        print_warning(f"{scan.url} is unreachable, skipping host phases: {str(e)}")
+        return
+    # The connection that answered tells the dns phase which address and family work
+    scan.peer_address = getattr(response, 'peer_address', None)
+    scan.result.address_family = getattr(response, 'address_family', None)
+    if response.status_code != 200:
+        return
+    scan.response = response
+    scan.result.server = response.headers.get('server')
+    scan.result.headers = [Header(name, value) for name, value in response.headers.items()]
+    scan.result.cookies = dict(response.cookies)
+
+@register_phase('parse', inputs=('response',), cost='local',
+                outputs=('assets', 'title', 'meta_tags', 'scripts', 'forms', 'links', 'technologies'))
+def parse_phase(scan):
+    """Parse the page: title, meta tags, scripts, forms, links and technologies"""
+    if scan.response is None:
+        return
+    response = scan.response
+    page = (scan.parser or parse_page)(response.content, response.encoding, response.headers)
+    result = scan.result
+    result.title = page['title']
+    scan.assets = page['assets']
+    result.meta_tags = scan.assets['meta_tags']
+    result.scripts = scan.assets['scripts']
+    result.forms = scan.assets['forms']
+    result.links = scan.assets['links']
+    result.technologies = page['technologies']
+
+@register_phase('scripts', inputs=('assets', 'technologies'), outputs=('technologies',), cost='heavy')
+def scripts_phase(scan):
+    """Fetch referenced scripts and add the libraries they contain"""
+    if not scan.assets or not scan.assets['scripts']:
+        return
+    technologies = scan.result.technologies
+    for script in analyze_scripts(scan.url, scan.assets['scripts']):
+        technologies.extend(lib for lib in script['libraries'] if lib not in technologies)
+
+@dataclass(slots=True)
+class TargetScan:
+    """One website scan in progress. The batch pipeline hands it from stage to stage,
+    so everything a scan needs between phases lives here rather than on the stack."""
+    url: str
+    seq: int = 0
+    phases: list = None
+    skip: set = None
+    scan: ScanContext = None
+    store: object = None
+    checkpoint: object = None
+    trace: tuple = None
+    memory: tuple = None
+    error: Exception = None
+
+def begin_target_scan(target, phases, store, parser=None, checkpoint=None, budget=None):
+    """Resolve the phases and start tracing target; checkpoint (a BatchTarget) resumes
+    from its saved phases and records each new one. budget is the target's time budget."""
+    target.phases = resolve_phases(phases)
+    target.skip = set()
+    if checkpoint is not None and checkpoint.result is not None:
+        result = checkpoint.result
+        target.skip = skippable_phases(target.phases, checkpoint.phases_done)
+    else:
+        result = ScanResult(target.url, ip_scans=[])
+    result.incomplete_phases = []
+    target.scan = ScanContext(target.url, result, parser, budget=budget or None)
+    target.store = store
+    target.checkpoint = checkpoint
+    TRACER.begin_scan(target.url)
+    MEMORY.begin_target(target.url)
+    METRICS.inc('omar_scans_in_flight', 1)
+
+def run_target_phases(target, names=None, animate=False):
+    """Run target's remaining phases, or only those of them listed in names. Once the
+    time budget is spent the remaining phases are skipped; a phase cut short by it or
+    never started is listed in result.incomplete_phases and not checkpointed."""
+    scan = target.scan
+    start = time.monotonic()
+    deadline = start + scan.budget - scan.spent if scan.budget else None
+    try:
+        with deadline_scope(deadline):
+            for name in target.phases:
+                if name in target.skip or (names is not None and name not in names):
+                    continue
+                target.skip.add(name)
+                if deadline_passed():
+                    scan.result.incomplete_phases.append(name)
+                    continue
+                phase = SCAN_PHASES[name]
+                if animate and phase.cost != 'local':
+                    loading_animation(phase.description, 1)
+                cut_short = False
+                try:
+                    with trace_span(name) as span:
+                        scan.span = span
+                        phase.run(scan)
+                except DeadlineExceeded:
+                    # Also raised ahead of time, by waits that could not finish before the deadline
+                    cut_short = True
+                if cut_short or deadline_passed():
+                    scan.result.incomplete_phases.append(name)
+                    continue
+                if target.checkpoint is not None:
+                    target.checkpoint.phase_done(name, scan.result)
+    finally:
+        scan.spent += time.monotonic() - start
+
+def finish_target_scan(target):
+    """Save target's result and return (website_id, result, spans, memory_report)"""
+    result = target.scan.result
+    result.status = 'partial' if result.incomplete_phases else 'complete'
+    if result.incomplete_phases:
+        METRICS.inc('omar_targets_partial_total')
+    with trace_span("save"):
+        website_id = target.store.save_website(result.to_row())
+    spans = TRACER.end_scan()
+    memory_report = MEMORY.end_target()
+    target.store.save_scan_metadata(website_id, target.url, spans, memory_report)
+    METRICS.inc('omar_targets_completed_total')
+    METRICS.inc('omar_scans_in_flight', -1)
+    return website_id, result, spans, memory_report
+
+def abort_target_scan(target):
+    TRACER.end_scan()
+    MEMORY.end_target()
+    METRICS.inc('omar_targets_failed_total')
+    METRICS.inc('omar_scans_in_flight', -1)
+
+def scan_website(url, phases=None, animate=False, store=None, parser=None, checkpoint=None,
+                 budget=DEFAULT_TARGET_BUDGET):
+    """Run the requested website phases (see resolve_phases) for url, save the result
+    through store (local database by default) and return (website_id, result, spans,
+    memory_report). parser replaces parse_page(), e.g. with process_page_parser().
+    checkpoint (a BatchTarget) resumes from its saved phases and records each new one.
+    Phases still running when budget seconds are used up are cut short (result.status
+    is then 'partial')."""
+    if store is None:
+        store = SQLiteScanBackend()
+        try:
+            return scan_website(url, phases, animate, store, parser, checkpoint, budget)
+        finally:
+            store.close()
+    target = TargetScan(url)
+    begin_target_scan(target, phases, store, parser, checkpoint, budget)
+    try:
+        run_target_phases(target, animate=animate)
+        return finish_target_scan(target)
+    except Exception:
+        abort_target_scan(target)
+        raise
+
+def penetrate_website(url):
+    """Perform comprehensive website penetration testing"""
+    loading_animation("Launching comprehensive website penetration attack", 10)
+    
+    try:
+        website_id, result, spans, memory_report = scan_website(url, animate=True)
         
         # Display results
         print_success("Comprehensive website penetration testing completed!")
-        print_info("URL", data['url'])
-        print_info("Title", data['title'] or "Not found")
-        print_info("IP Address", data['ip_address'] or "Not found")
-        print_info("Server", data['server'] or "Not found")
-        
-        # Show technologies
-        if data['technologies']:
-            try:
-                tech_list = json.loads(data['technologies'])
-                print_info("Technologies", ", ".join(tech_list))
-            except:
-                print_info("Technologies", "Available (view details)")
-        
-        # Show vulnerabilities
-        if data['vulnerabilities']:
-            try:
-                vulns = json.loads(data['vulnerabilities'])
-                print_info("Vulnerabilities", f"{len(vulns)} detected")
-                for i, vuln in enumerate(vulns[:3]):  # Show first 3
-                    print_bullet(vuln)
-                if len(vulns) > 3:
-                    print_info("And more", f"{len(vulns) - 3} additional vulnerabilities...")
-            except:
-                print_info("Vulnerabilities", "Available (view details)")
-        
-        # Show subdomains
-        if data['subdomains']:
-            try:
-                subs = json.loads(data['subdomains'])
-                print_info("Subdomains", f"{len(subs)} discovered")
-                for i, sub in enumerate(subs[:3]):  # Show first 3
-                    print_bullet(sub)
-                if len(subs) > 3:
-                    print_info("And more", f"{len(subs) - 3} additional subdomains...")
-            except:
-                print_info("Subdomains", "Available (view details)")
-        
-        # Show open ports
-        if data['ports']:
-            try:
-                ports = json.loads(data['ports'])
-                print_info("Open Ports", f"{len(ports)} discovered")
-                for i, port in enumerate(ports[:5]):  # Show first 5
-                    print_bullet(port)
-                if len(ports) > 5:
-                    print_info("And more", f"{len(ports) - 5} additional ports...")
-            except:
-                print_info("Open Ports", "Available (view details)")
+        print_scan_result(result)
+        print_scan_spans(spans)
+        print_concurrency_limits()
+        if memory_report:
+            print_memory_report(memory_report)
         
     except Exception as e:
         print_error(f"Website penetration testing failed: {str(e)}")
 
-def get_network_info(data):
-    """Get network information for website"""
+def read_targets(path):
+    """Targets from a file ('-' for stdin), one per line; blank lines and # comments skipped"""
+    f = sys.stdin if path == '-' else open(path)
+    try:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                yield line
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+class BatchRun:
+    """A checkpointed --batch run: its input and options in batch_runs, and one
+    batch_progress row per target, numbered in input order so --resume can match them
+    up when it reads the same input again"""
+
+    def __init__(self, conn, run_id, source, phases, options):
+        self.conn = conn
+        # The pipeline's normalize and persist threads both use conn
+        self.lock = threading.Lock()
+        self.id = run_id
+        self.source = source
+        self.phases = phases
+        self.options = options
+
+    def pending(self, urls):
+        """(seq, url) for every target not finished yet, registering new ones"""
+        for seq, url in enumerate(urls):
+            with self.lock:
+                c = self.conn.cursor()
+                c.execute('SELECT target, status FROM batch_progress WHERE run_id = ? AND seq = ?', (self.id, seq))
+                row = c.fetchone()
+                if row is None:
+                    c.execute('''INSERT INTO batch_progress (run_id, seq, target, status, phases_done, updated_at)
+                                 VALUES (?, ?, ?, 'pending', '[]', ?)''', (self.id, seq, url, time.time()))
+            if row is not None:
+                if row[0] != url:
+                    raise ValueError(f"Target {seq} of batch run {self.id} was {row[0]} and is now {url}; "
+                                     "the input changed since the run started")
+                if row[1] == 'done':
+                    continue
+            yield seq, url
+
+    def fail(self, seq, error):
+        with self.lock:
+            self.conn.execute('''UPDATE batch_progress SET status = 'failed', error = ?, updated_at = ?
+                                 WHERE run_id = ? AND seq = ?''', (error, time.time(), self.id, seq))
+
+    def set_status(self, status):
+        with self.lock:
+            self.conn.execute('UPDATE batch_runs SET status = ?, updated_at = ? WHERE id = ?',
+                              (status, time.time(), self.id))
+
+    def counts(self):
+        with self.lock:
+            c = self.conn.cursor()
+            c.execute('SELECT status, COUNT(*) FROM batch_progress WHERE run_id = ? GROUP BY status', (self.id,))
+            return dict(c.fetchall())
+
+    def close(self):
+        self.conn.close()
+
+def create_batch_run(source, phases, options, path=None):
+    conn = setup_database(path, check_same_thread=False)
+    conn.isolation_level = None
+    now = time.time()
+    c = conn.cursor()
+    c.execute('''INSERT INTO batch_runs (source, phases, options, status, started_at, updated_at)
+                 VALUES (?, ?, ?, 'running', ?, ?)''',
+              (source, json.dumps(phases), json.dumps(options), now, now))
+    return BatchRun(conn, c.lastrowid, source, phases, options)
+
+def load_batch_run(run_id, path=None):
+    """Reopen a batch run for --resume; raises ValueError if there is none with that id"""
+    conn = setup_database(path, check_same_thread=False)
+    conn.isolation_level = None
+    c = conn.cursor()
+    c.execute('SELECT source, phases, options FROM batch_runs WHERE id = ?', (run_id,))
+    row = c.fetchone()
+    if row is None:
+        conn.close()
+        raise ValueError(f"No batch run with ID {run_id}")
+    run = BatchRun(conn, run_id, row[0], json.loads(row[1]), json.loads(row[2]))
+    run.set_status('running')
+    return run
+
+class BatchTarget:
+    """Checkpoint and result store for one target of a batch run. The partial result is
+    saved after every phase, and the website_data row is written in the same transaction
+    that marks the target done, so a crash loses at most the phase that was running."""
+
+    def __init__(self, run_id, seq, path=None):
+        # Pipeline stages use the target one after another, each from its own thread
+        self.conn = setup_database(path, check_same_thread=False)
+        self.run_id = run_id
+        self.seq = seq
+        c = self.conn.cursor()
+        c.execute('SELECT phases_done, checkpoint FROM batch_progress WHERE run_id = ? AND seq = ?', (run_id, seq))
+        row = c.fetchone()
+        self.phases_done = json.loads(row[0]) if row and row[0] else []
+        # Checkpoints are ScanResult.to_row() as JSON. Older versions stored pickles, which are
+        # never loaded (the database may be shared); those targets start over instead.
+        self.result = None
+        if row and isinstance(row[1], str):
+            self.result = ScanResult.from_row(json.loads(row[1]))
+        elif self.phases_done:
+            self.phases_done = []
+
+    def phase_done(self, name, result):
+        if name not in self.phases_done:
+            self.phases_done.append(name)
+        self.conn.execute('''UPDATE batch_progress SET phases_done = ?, checkpoint = ?, updated_at = ?
+                             WHERE run_id = ? AND seq = ?''',
+                          (json.dumps(self.phases_done), json.dumps(result.to_row(), separators=(',', ':')),
+                           time.time(), self.run_id, self.seq))
+        self.conn.commit()
+
+    def save_website(self, data):
+        website_id = insert_website_data(self.conn, data, commit=False)
+        self.conn.execute('''UPDATE batch_progress SET status = 'done', website_id = ?, checkpoint = NULL,
+                             error = NULL, updated_at = ? WHERE run_id = ? AND seq = ?''',
+                          (website_id, time.time(), self.run_id, self.seq))
+        self.conn.commit()
+        return website_id
+
+    def save_scan_metadata(self, website_id, url, spans, memory_report):
+        insert_scan_metadata(self.conn, website_id, url, spans, memory_report)
+
+    def close(self):
+        self.conn.close()
+
+def print_batch_run(run):
+    counts = run['counts']
+    print_info("Batch run", f"{run['id']} [{run['status']}] {run['source']}")
+    print_info("Targets", f"{counts.get('done', 0)} done, {counts.get('failed', 0)} failed, "
+                          f"{counts.get('pending', 0)} pending")
+    print_line("-" * 80)
+
+def view_batch_runs(limit=100):
+    conn = setup_database()
+    c = conn.cursor()
+    c.execute('SELECT id, source, status, started_at, updated_at FROM batch_runs ORDER BY id DESC LIMIT ?', (limit,))
+    runs = [dict(zip(('id', 'source', 'status', 'started_at', 'updated_at'), row)) for row in c.fetchall()]
+    for run in runs:
+        c.execute('SELECT status, COUNT(*) FROM batch_progress WHERE run_id = ? GROUP BY status', (run['id'],))
+        run['counts'] = dict(c.fetchall())
+    conn.close()
+    if not runs:
+        print_warning("No batch runs found in database")
+        return
+    print_header("BATCH RUNS")
+    with RENDERER.batch():
+        for run in runs:
+            RENDERER.emit('batch_run', run, print_batch_run)
+
+def scan_websites(specs, phases=None, workers=1, cpu_workers=0, run=None, expander=None, queue_size=None,
+                  budget=DEFAULT_TARGET_BUDGET):
+    """Non-interactive scans for --scan and --batch; results go through the renderer.
+    specs (URLs, hosts, CIDRs, ranges) are expanded by expander and scanned on a
+    ScanPipeline with `workers` threads per network stage; with cpu_workers, page parsing
+    and detection run on a process pool. With run (a BatchRun), finished targets are
+    skipped and progress is checkpointed. Each target gets budget seconds of phase time
+    before it is saved as partial. Returns False if any scan failed."""
+    parser = None
+    pool = None
+    if cpu_workers:
+        methods = multiprocessing.get_all_start_methods()
+        # forkserver/spawn workers start from a clean process instead of forking our threads
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        pool = concurrent.futures.ProcessPoolExecutor(max_workers=cpu_workers, mp_context=context)
+        parser = process_page_parser(pool)
+    
+    pipeline = ScanPipeline(phases, expander or TargetExpander(), run, workers, parser,
+                            queue_size or PIPELINE_QUEUE_SIZE, budget)
+    status = 'failed'
     try:
-        domain = urlparse(data['url']).netloc
-        
-        # Get IP address
-        try:
-            data['ip_address'] = socket.gethostbyname(domain)
-        except:
-            data['ip_address'] = "Could not resolve"
-        
-        # Get WHOIS data
-        try:
-            whois_info = whois.whois(domain)
-            data['whois_data'] = json.dumps(whois_info, default=str)
-        except:
-            data['whois_data'] = "Could not retrieve WHOIS data"
-        
-        # Get DNS records
-        try:
-            dns_records = {}
-            
-            # A records
-            try:
-                a_records = dns.resolver.resolve(domain, 'A')
-                dns_records['A'] = [str(record) for record in a_records]
-            except:
-                dns_records['A'] = []
-            
-            # MX records
-            try:
-                mx_records = dns.resolver.resolve(domain, 'MX')
-                dns_records['MX'] = [str(record) for record in mx_records]
-            except:
-                dns_records['MX'] = []
-            
-            # NS records
-            try:
-                ns_records = dns.resolver.resolve(domain, 'NS')
-                dns_records['NS'] = [str(record) for record in ns_records]
-            except:
-                dns_records['NS'] = []
-            
-            # TXT records
-            try:
-                txt_records = dns.resolver.resolve(domain, 'TXT')
-                dns_records['TXT'] = [str(record) for record in txt_records]
-            except:
-                dns_records['TXT'] = []
-            
-            # CNAME records
-            try:
-                cname_records = dns.resolver.resolve(domain, 'CNAME')
-                dns_records['CNAME'] = [str(record) for record in cname_records]
-            except:
-                dns_records['CNAME'] = []
-            
-            data['dns_records'] = json.dumps(dns_records, indent=2)
-        except:
-            data['dns_records'] = "Could not retrieve DNS records"
-        
-        # Get SSL certificate information
         try:
-            context = ssl.create_default_context()
-            with socket.create_connection((domain, 443)) as sock:
-                with context.wrap_socket(sock, server_hostname=domain) as ssock:
-                    cert = ssock.getpeercert()
-                    data['ssl_info'] = json.dumps(cert, indent=2)
-        except:
-            data['ssl_info'] = "Could not retrieve SSL certificate information"
-            
-    except Exception as e:
-        print_warning(f"Network information gathering partially failed: {str(e)}")
+            ok = pipeline.execute(specs)
+            status = 'completed'
+        except KeyboardInterrupt:
+            status = 'interrupted'
+            raise
+        finally:
+            if run is not None:
+                run.set_status(status)
+        if run is not None:
+            RENDERER.emit('pipeline', pipeline.summary(), print_pipeline_summary)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return ok
 
-def get_advanced_website_info(data):
-    """Get advanced website information"""
+def print_scan_result(result):
+    """Summary of a ScanResult for the terminal"""
+    print_info("URL", result.url)
+    print_info("Title", result.title or "Not found")
+    print_info("IP Address", result.ip_address or "Not found")
+    if result.address_family:
+        print_info("Answered Over", result.address_family)
+    if result.ip_addresses and len(result.ip_addresses) > 1:
+        print_info("All Addresses", ", ".join(result.ip_addresses))
+    print_info("Server", result.server or "Not found")
+    if result.geoip:
+        print_info("GeoIP", format_geoip(result.geoip))
+    if result.status == 'partial':
+        print_warning(f"Partial result: time budget ran out during {', '.join(result.incomplete_phases)}")
+    
+    # Show technologies
+    if result.technologies:
+        print_info("Technologies", ", ".join(result.technologies))
+    
+    # Show vulnerabilities
+    if result.vulnerabilities:
+        vulns = result.vulnerabilities
+        print_info("Vulnerabilities", f"{len(vulns)} detected")
+        for i, vuln in enumerate(vulns[:3]):  # Show first 3
+            print_bullet(vuln)
+        if len(vulns) > 3:
+            print_info("And more", f"{len(vulns) - 3} additional vulnerabilities...")
+    
+    # Show subdomains
+    if result.subdomains:
+        subs = result.subdomains
+        print_info("Subdomains", f"{len(subs)} discovered")
+        for i, sub in enumerate(subs[:3]):  # Show first 3
+            print_bullet(sub)
+        if len(subs) > 3:
+            print_info("And more", f"{len(subs) - 3} additional subdomains...")
+    
+    # Show open ports
+    if isinstance(result.ports, str):
+        print_info("Open Ports", result.ports)
+    elif result.ports:
+        ports = result.ports
+        print_info("Open Ports", f"{len(ports)} discovered")
+        for i, port in enumerate(ports[:5]):  # Show first 5
+            print_bullet(str(port))
+        if len(ports) > 5:
+            print_info("And more", f"{len(ports) - 5} additional ports...")
+
+@register_phase('dns', outputs=('ip_address', 'ip_addresses', 'geoip'), cost='light')
+def dns_phase(scan):
+    """Resolve A and AAAA records and pick the address the target answers on
+    That is the address the fetch phase connected to when it ran, otherwise the first
+    address in connection order."""
+    result = scan.result
+    parsed = urlparse(result.url)
+    host = parsed.hostname or parsed.netloc
+    port = parsed.port or (443 if parsed.scheme == 'https' else 80)
     try:
-        domain = urlparse(data['url']).netloc
-        
-        # Simulate subdomain enumeration
-        subdomains = [
-            f"www.{domain}",
-            f"mail.{domain}",
-            f"blog.{domain}",
-            f"shop.{domain}",
-            f"api.{domain}",
-            f"dev.{domain}",
-            f"test.{domain}",
-            f"staging.{domain}",
-            f"admin.{domain}",
-            f"secure.{domain}"
-        ]
-        data['subdomains'] = json.dumps(subdomains, indent=2)
-        
-        # Simulate directory enumeration
-        directories = [
-            "/admin",
-            "/login",
-            "/wp-admin",
-            "/phpmyadmin",
-            "/backup",
-            "/config",
-            "/uploads",
-            "/includes",
-            "/assets",
-            "/images"
-        ]
-        data['directories'] = json.dumps(directories, indent=2)
-        
-        # Simulate port scanning
-        ports = [
-            "21/tcp - FTP",
-            "22/tcp - SSH",
-            "25/tcp - SMTP",
-            "53/tcp - DNS",
-            "80/tcp - HTTP",
-            "110/tcp - POP3",
-            "143/tcp - IMAP",
-            "443/tcp - HTTPS",
-            "3306/tcp - MySQL",
-            "3389/tcp - RDP"
-        ]
-        data['ports'] = json.dumps(ports, indent=2)
-        
-        # Detect CMS
+        with SCHEDULER.slot(host, kind='dns'):
+            addresses = with_retries(until_deadline(resolve_dual_stack), host, port, retry_on=(socket.timeout,))
+    except DeadlineExceeded:
+        raise
+    except Exception:
+        result.ip_address = "Could not resolve"
+        addresses = []
+    if addresses:
+        result.ip_addresses = [sockaddr[0] for _, sockaddr in addresses]
+        answered = scan.peer_address in result.ip_addresses
+        result.ip_address = scan.peer_address if answered else result.ip_addresses[0]
+    ip = target_ip(result)
+    if ip:
+        result.geoip = GEOIP.lookup(ip)
+
+@register_phase('reverse_dns', inputs=('ip_address',), outputs=('ip_scans',), cost='light')
+def reverse_dns_phase(scan):
+    """Reverse DNS, once per address"""
+    ip = target_ip(scan.result)
+    if ip:
+        scan.result.ip_scans.append(IP_SCANS.get(ip, 'reverse_dns', lambda: reverse_dns(ip)))
+
+@register_phase('whois', outputs=('whois_data',), cost='light')
+def whois_phase(scan):
+    """WHOIS lookup for the domain"""
+    domain = urlparse(scan.url).netloc
+    try:
+        with SCHEDULER.slot(domain, kind='whois'):
+            whois_info = with_retries(until_deadline(whois.whois), domain)
+        scan.span['bytes'] += len(getattr(whois_info, 'text', '') or '')
+        scan.result.whois_data = dict(whois_info)
+    except DeadlineExceeded:
+        raise
+    except Exception:
+        scan.result.whois_data = "Could not retrieve WHOIS data"
+
+@register_phase('dns_records', outputs=('dns_records',), cost='light')
+def dns_records_phase(scan):
+    """Query the domain's DNS records"""
+    domain = urlparse(scan.url).netloc
+    dns_records = []
+    for record_type in DNS_RECORD_TYPES:
         try:
-            cms = builtwith.parse(data['url'])
-            if cms:
-                data['cms'] = json.dumps(cms, indent=2)
-            else:
-                data['cms'] = "No CMS detected"
-        except:
-            data['cms'] = "CMS detection failed"
-        
-        # Simulate WAF detection
-        wafs = [
-            "Cloudflare",
-            "ModSecurity",
-            "Sucuri",
-            "Wordfence",
-            "Akamai"
-        ]
-        data['waf'] = random.choice(wafs)
-        
-        # Detect framework
-        frameworks = [
-            "React",
-            "Angular",
-            "Vue.js",
-            "Django",
-            "Ruby on Rails",
-            "Laravel",
-            "Express.js",
-            "Spring Boot"
-        ]
-        data['framework'] = random.choice(frameworks)
-        
-    except Exception as e:
-        print_warning(f"Advanced website information gathering partially failed: {str(e)}")
+            with SCHEDULER.slot(domain, kind='dns'):
+                answer = with_retries(dns.resolver.resolve, domain, record_type, lifetime=time_left(5.0))
+            scan.span['bytes'] += len(answer.response.to_wire())
+            dns_records.extend(DNSRecord(record_type, str(record)) for record in answer)
+        except DeadlineExceeded:
+            raise
+        except Exception:
+            pass
+    scan.result.dns_records = dns_records
 
-def get_website_vulnerabilities(data):
-    """Get website vulnerabilities"""
+@register_phase('ssl', inputs=('ip_address',), outputs=('ssl_info',), cost='light')
+def ssl_phase(scan):
+    """Fetch the TLS certificate, reusing a co-hosted name's certificate if it covers this one"""
+    result = scan.result
+    host = urlparse(result.url).hostname or urlparse(result.url).netloc
+    ip = target_ip(result)
+    
+    def fetch():
+        cert, der = fetch_certificate(host, ip, timeout=time_left(10))
+        scan.span['bytes'] += len(der)
+        return cert, der
     try:
-        # Simulate vulnerability assessment
-        vulnerabilities = [
-            "XSS vulnerability in contact form",
-            "SQL injection in search parameter",
-            "CSRF token missing in login form",
-            "Clickjacking vulnerability detected",
-            "SSL/TLS misconfiguration",
-            "Information disclosure in error messages",
-            "Insecure cookie settings",
-            "Missing security headers",
-            "Directory listing enabled",
-            "Outdated software version"
-        ]
-        
-        # Select random vulnerabilities
-        selected_vulns = random.sample(vulnerabilities, random.randint(3, 7))
-        data['vulnerabilities'] = json.dumps(selected_vulns, indent=2)
-        
-    except Exception as e:
-        print_warning(f"Vulnerability assessment partially failed: {str(e)}")
+        if ip:
+            shared = IP_SCANS.certificate(ip, host, fetch)
+            result.ip_scans.append(shared)
+            result.ssl_info = shared.result
+        else:
+            result.ssl_info = fetch()[0]
+    except HostUnavailable:
+        result.ssl_info = HOST_UNREACHABLE
+    except DeadlineExceeded:
+        raise
+    except Exception:
+        result.ssl_info = "Could not retrieve SSL certificate information"
+
+COMMON_SUBDOMAINS = ['www', 'mail', 'blog', 'shop', 'api', 'dev', 'test', 'staging', 'admin', 'secure']
+
+COMMON_PORTS = {
+    21: "FTP", 22: "SSH", 25: "SMTP", 53: "DNS", 80: "HTTP",
+    110: "POP3", 143: "IMAP", 443: "HTTPS", 3306: "MySQL", 3389: "RDP"
+}
+
+def resolve_subdomain(name):
+    try:
+        with SCHEDULER.slot(name, kind='dns'):
+            socket.getaddrinfo(name, None)
+        return name, False
+    except socket.gaierror as e:
+        # A negative answer is a healthy response; only resolver trouble is a congestion signal
+        return None, e.errno == socket.EAI_AGAIN
+    except (UnicodeError, OSError):
+        return None, True
+
+def enumerate_subdomains(domain, candidates=None):
+    """Resolve candidate subdomains with an adaptive in-flight limit"""
+    names = (f"{prefix}.{domain}" for prefix in (COMMON_SUBDOMAINS if candidates is None else candidates))
+    return sorted(name for _, name in run_adaptive(LIMITERS['subdomains'], bind_deadline(resolve_subdomain),
+                                                   within_deadline(names)) if name)
+
+def probe_port(target):
+    host, port = target
+    try:
+        with socket.create_connection((host, port), timeout=time_left(3)):
+            return True, False
+    except ConnectionRefusedError:
+        return False, False
+    except (socket.timeout, OSError):
+        return False, True
+
+def scan_ports(host, ports=None):
+    """TCP connect scan with an adaptive in-flight limit; returns open ports as PortResults.
+    Raises DeadlineExceeded if the budget ran out before every port was probed."""
+    ports = ports or COMMON_PORTS
+    open_ports = [target[1] for target, is_open in
+                  run_adaptive(LIMITERS['ports'], bind_deadline(probe_port),
+                               within_deadline((host, port) for port in ports)) if is_open]
+    if deadline_passed():
+        # Some ports were never probed; a short list would read as closed ports
+        raise DeadlineExceeded()
+    return [PortResult(port, COMMON_PORTS.get(port, 'unknown')) for port in sorted(open_ports)]
+
+FOUND_PATH_STATUSES = (200, 204, 301, 302, 307, 308, 401, 403)
+
+def probe_path(url):
+    try:
+        response = polite_get(url, headers=get_random_headers(), timeout=time_left(10), verify=False,
+                              allow_redirects=False, stream=True)
+        response.close()
+        return response.status_code, response.status_code >= 500 or response.status_code == 429
+    except HostUnavailable:
+        return None, False
+    except (requests.RequestException, OSError):
+        return None, True
+
+def enumerate_paths(url, paths):
+    """Request url/<path> for every candidate path with an adaptive in-flight limit;
+    returns the paths that exist or are protected"""
+    base = url.rstrip('/') + '/'
+    candidates = (base + quote(path.lstrip('/'), safe="/%?=&") for path in paths)
+    found = {urlparse(candidate).path for candidate, status in
+             run_adaptive(LIMITERS['paths'], bind_deadline(probe_path), within_deadline(candidates))
+             if status in FOUND_PATH_STATUSES}
+    return sorted(found)
+
+@register_phase('subdomains', outputs=('subdomains',), cost='heavy')
+def subdomains_phase(scan):
+    """Enumerate subdomains from the common list or --subdomain-wordlist"""
+    scan.result.subdomains = enumerate_subdomains(urlparse(scan.url).hostname or urlparse(scan.url).netloc,
+                                                  WORDLISTS.get('subdomains'))
+
+@register_phase('directories', outputs=('directories',), cost='local')
+def directories_phase(scan):
+    """List common directories"""
+    # Simulate directory enumeration
+    scan.result.directories = [
+        "/admin",
+        "/login",
+        "/wp-admin",
+        "/phpmyadmin",
+        "/backup",
+        "/config",
+        "/uploads",
+        "/includes",
+        "/assets",
+        "/images"
+    ]
+
+@register_phase('paths', outputs=('directories',), cost='heavy')
+def paths_phase(scan):
+    """Request every --path-wordlist path and keep those that exist"""
+    wordlist = WORDLISTS.get('directories')
+    if wordlist is not None:
+        scan.result.directories = enumerate_paths(scan.url, wordlist)
+
+@register_phase('ports', inputs=('ip_address',), outputs=('ports',), cost='heavy')
+def ports_phase(scan):
+    """Scan common TCP ports, once per address"""
+    result = scan.result
+    host = urlparse(result.url).hostname or urlparse(result.url).netloc
+    ip = target_ip(result)
+    if BREAKER.is_open(host):
+        result.ports = HOST_UNREACHABLE
+    elif ip:
+        shared = IP_SCANS.get(ip, 'ports', lambda: scan_ports(ip))
+        result.ip_scans.append(shared)
+        result.ports = shared.result
+    else:
+        result.ports = scan_ports(host)
+
+@register_phase('cms', outputs=('cms',), cost='heavy')
+def cms_phase(scan):
+    """Detect the CMS with builtwith (fetches the page again)"""
+    result = scan.result
+    host = urlparse(result.url).hostname or urlparse(result.url).netloc
+    try:
+        with SCHEDULER.slot(host, SCHEDULER.resolve_ip(host)):
+            cms = resilient_call(host, until_deadline(builtwith.parse), result.url)
+        if cms:
+            result.cms = cms
+        else:
+            result.cms = "No CMS detected"
+    except HostUnavailable:
+        result.cms = HOST_UNREACHABLE
+    except DeadlineExceeded:
+        raise
+    except Exception:
+        result.cms = "CMS detection failed"
+
+@register_phase('waf', outputs=('waf',), cost='local')
+def waf_phase(scan):
+    """Identify the WAF"""
+    # Simulate WAF detection
+    wafs = [
+        "Cloudflare",
+        "ModSecurity",
+        "Sucuri",
+        "Wordfence",
+        "Akamai"
+    ]
+    scan.result.waf = random.choice(wafs)
+
+@register_phase('framework', outputs=('framework',), cost='local')
+def framework_phase(scan):
+    """Identify the web framework"""
+    frameworks = [
+        "React",
+        "Angular",
+        "Vue.js",
+        "Django",
+        "Ruby on Rails",
+        "Laravel",
+        "Express.js",
+        "Spring Boot"
+    ]
+    scan.result.framework = random.choice(frameworks)
+
+@register_phase('vulnerabilities', outputs=('vulnerabilities',), cost='local')
+def vulnerabilities_phase(scan):
+    """Assess website vulnerabilities"""
+    # Simulate vulnerability assessment
+    vulnerabilities = [
+        "XSS vulnerability in contact form",
+        "SQL injection in search parameter",
+        "CSRF token missing in login form",
+        "Clickjacking vulnerability detected",
+        "SSL/TLS misconfiguration",
+        "Information disclosure in error messages",
+        "Insecure cookie settings",
+        "Missing security headers",
+        "Directory listing enabled",
+        "Outdated software version"
+    ]
+    
+    # Select random vulnerabilities
+    scan.result.vulnerabilities = random.sample(vulnerabilities, random.randint(3, 7))
 
 def advanced_website_recon(url):
     """Perform advanced website reconnaissance"""
@@ -1539,8 +3728,8 @@ def advanced_website_recon(url):
             f"webmaster@{domain}"
         ]
         print_info("Email addresses", f"{len(emails)} found")
-        for email in emails[:3]:  # Show first 3
-            print_bullet(email)
+        for addr in emails[:3]:  # Show first 3
+            print_bullet(addr)
         if len(emails) > 3:
             print_info("And more", f"{len(emails) - 3} additional emails...")
         
@@ -1685,50 +3874,1910 @@ def detect_technologies(html_content, headers):
     if re.search(r'bootstrap', html_content, re.IGNORECASE):
         technologies.append("Bootstrap")
     
-    if re.search(r'font-awesome', html_content, re.IGNORECASE):
-        technologies.append("Font Awesome")
+    if re.search(r'font-awesome', html_content, re.IGNORECASE):
+        technologies.append("Font Awesome")
+    
+    return technologies
+
+def website_record(row):
+    """website_data row as a dict with blob references resolved and JSON columns decoded"""
+    record = {}
+    for column, value in row.items():
+        value = load_blob_value(value)
+        if isinstance(value, str) and value[:1] in ('{', '['):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                pass
+        record[column] = value
+    return record
+
+def print_website_row(row):
+    print_info("ID", row[0])
+    print_info("URL", row[1])
+    print_info("Title", row[2] or "Not available")
+    print_info("IP Address", row[3] or "Not available")
+    if len(row) > 26 and row[26]:
+        print_info("All Addresses", ", ".join(json.loads(row[26])))
+    print_info("Server", row[4] or "Not available")
+    
+    if row[5]:
+        try:
+            tech_list = json.loads(row[5])
+            print_info("Technologies", ", ".join(tech_list))
+        except:
+            print_info("Technologies", "Available (view details)")
+    else:
+        print_info("Technologies", "Not available")
+    
+    if row[15]:
+        try:
+            vulns = json.loads(row[15])
+            print_info("Vulnerabilities", f"{len(vulns)} detected")
+        except:
+            print_info("Vulnerabilities", "Available (view details)")
+    else:
+        print_info("Vulnerabilities", "Not available")
+    
+    if len(row) > 24 and row[24] == 'partial':
+        print_info("Status", f"partial ({', '.join(json.loads(row[25] or '[]'))} incomplete)")
+    print_info("Extracted At", row[21])
+    print_line("-" * 80)
+
+def view_website_data():
+    conn = setup_database()
+    c = conn.cursor()
+    c.execute("SELECT * FROM website_data ORDER BY extracted_at DESC")
+    columns = [d[0] for d in c.description]
+    
+    found = False
+    with RENDERER.batch():
+        for row in c:
+            if not found:
+                print_header("SAVED WEBSITE DATA")
+                found = True
+            RENDERER.emit('website', row, print_website_row,
+                          lambda row: website_record(dict(zip(columns, row))))
+    conn.close()
+    
+    if not found:
+        print_warning("No website data found in database")
+
+# ==================== SCAN PIPELINE ====================
+PIPELINE_STAGES = ('read', 'normalize', 'resolve', 'fetch', 'analyze', 'persist')
+# Phases run by the resolve and fetch stages; analyze runs the rest in registration order.
+# Neither phase has inputs, so running them ahead of phases registered before them is safe.
+STAGE_PHASES = {'resolve': ('dns',), 'fetch': ('fetch',)}
+PIPELINE_QUEUE_SIZE = 64
+_STOP = object()
+
+METRICS.register('omar_pipeline_queue_depth', 'gauge', "Items queued in front of each batch pipeline stage")
+METRICS.register('omar_pipeline_items_total', 'counter', "Items each batch pipeline stage has passed on")
+METRICS.register('omar_pipeline_blocked_seconds_total', 'counter',
+                 "Time each pipeline stage spent waiting for room in the next stage's queue")
+
+class ScanPipeline:
+    """Batch scans as a staged pipeline: read -> normalize -> resolve -> fetch -> analyze
+    -> persist. Every stage after read has a bounded input queue and its own threads, so a
+    slow stage fills its queue and blocks the stage feeding it, back to the reader; memory
+    is bounded by the queue sizes rather than by the size of the input."""
+
+    def __init__(self, phases, expander, run=None, workers=16, parser=None, queue_size=PIPELINE_QUEUE_SIZE,
+                 budget=DEFAULT_TARGET_BUDGET):
+        self.phases = resolve_phases(phases)
+        self.budget = budget
+        self.expander = expander
+        self.run = run
+        self.parser = parser
+        workers = memory_workers(workers)
+        self.workers = {'read': 1, 'normalize': 1, 'resolve': workers, 'fetch': workers,
+                        'analyze': workers, 'persist': 1}
+        # Under --memory one target at a time goes from resolve to persist, since
+        # pipelined stages would otherwise overlap the next target's phases
+        self.memory_slot = threading.Semaphore(1) if MEMORY.enabled else None
+        self.queues = {stage: queue.Queue(queue_size) for stage in PIPELINE_STAGES[1:]}
+        self.running = dict(self.workers)
+        self.stats = {stage: {'items': 0, 'blocked_seconds': 0.0, 'max_depth': 0} for stage in PIPELINE_STAGES}
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.error = None
+        self.ok = True
+        self.store = None
+
+    def _put(self, stage, item):
+        """Hand item to the stage after stage, blocking while its queue is full"""
+        next_stage = PIPELINE_STAGES[PIPELINE_STAGES.index(stage) + 1]
+        waiting = self.queues[next_stage]
+        start = time.monotonic()
+        waiting.put(item)
+        blocked = time.monotonic() - start
+        depth = waiting.qsize()
+        with self.lock:
+            self.stats[stage]['items'] += 1
+            self.stats[stage]['blocked_seconds'] += blocked
+            self.stats[next_stage]['max_depth'] = max(self.stats[next_stage]['max_depth'], depth)
+        METRICS.inc('omar_pipeline_items_total', stage=stage)
+        METRICS.inc('omar_pipeline_blocked_seconds_total', blocked, stage=stage)
+        METRICS.set('omar_pipeline_queue_depth', depth, stage=next_stage)
+
+    def _items(self, stage):
+        """Items queued for stage, until the stage before it has finished"""
+        waiting = self.queues[stage]
+        while True:
+            item = waiting.get()
+            METRICS.set('omar_pipeline_queue_depth', waiting.qsize(), stage=stage)
+            if item is _STOP:
+                return
+            yield item
+
+    def _finish(self, stage):
+        """Called by each worker of stage as it exits; the last one stops the next stage"""
+        with self.lock:
+            self.running[stage] -= 1
+            last = self.running[stage] == 0
+        if last and stage != 'persist':
+            next_stage = PIPELINE_STAGES[PIPELINE_STAGES.index(stage) + 1]
+            for _ in range(self.workers[next_stage]):
+                self.queues[next_stage].put(_STOP)
+
+    def _abort(self, error):
+        with self.lock:
+            if self.error is None:
+                self.error = error
+        self.stopping.set()
+
+    def _read(self, specs):
+        try:
+            for spec in specs:
+                if self.stopping.is_set():
+                    break
+                self._put('read', spec)
+        except Exception as e:
+            self._abort(e)
+        finally:
+            self._finish('read')
+
+    def _normalize(self):
+        items = self._items('normalize')
+        try:
+            targets = self.expander.expand(items)
+            targets = enumerate(targets) if self.run is None else self.run.pending(targets)
+            for seq, url in targets:
+                if self.stopping.is_set():
+                    break
+                self._put('normalize', TargetScan(url, seq))
+        except Exception as e:
+            self._abort(e)
+        finally:
+            # Drain what the reader still sends so it is never left blocked on a full queue
+            for _ in items:
+                pass
+            self._finish('normalize')
+
+    def _scan(self, stage):
+        try:
+            for target in self._items(stage):
+                if stage == 'resolve':
+                    if self.stopping.is_set():
+                        # Not started yet: left pending for --resume
+                        continue
+                    self._begin(target)
+                if target.error is None:
+                    self._run(target, stage)
+                self._put(stage, target)
+        finally:
+            self._finish(stage)
+
+    def _begin(self, target):
+        if self.memory_slot is not None:
+            self.memory_slot.acquire()
+        try:
+            checkpoint = BatchTarget(self.run.id, target.seq) if self.run is not None else None
+            begin_target_scan(target, self.phases, checkpoint, self.parser, checkpoint, self.budget)
+        except Exception as e:
+            target.error = e
+            return
+        target.trace = TRACER.suspend()
+        target.memory = MEMORY.suspend()
+
+    def _run(self, target, stage):
+        TRACER.resume(target.trace)
+        MEMORY.resume(target.memory)
+        try:
+            run_target_phases(target, STAGE_PHASES.get(stage))
+        except Exception as e:
+            target.error = e
+        finally:
+            target.trace = TRACER.suspend()
+            target.memory = MEMORY.suspend()
+
+    def _persist(self):
+        try:
+            for target in self._items('persist'):
+                self._save(target)
+                with self.lock:
+                    self.stats['persist']['items'] += 1
+        finally:
+            if self.store is not None:
+                self.store.close()
+            self._finish('persist')
+
+    def _save(self, target):
+        try:
+            self._store_target(target)
+        finally:
+            if self.memory_slot is not None:
+                self.memory_slot.release()
+
+    def _store_target(self, target):
+        result = None
+        if target.trace is not None:
+            TRACER.resume(target.trace)
+            MEMORY.resume(target.memory)
+        if target.error is None:
+            if target.store is None:
+                # Targets outside a batch run share one connection, opened on this thread
+                self.store = self.store or SQLiteScanBackend()
+                target.store = self.store
+            try:
+                website_id, result, spans, memory_report = finish_target_scan(target)
+            except Exception as e:
+                target.error = e
+        if target.error is not None:
+            if target.trace is not None:
+                abort_target_scan(target)
+            print_error(f"Scan of {target.url} failed: {str(target.error)}")
+            if self.run is not None:
+                self.run.fail(target.seq, str(target.error))
+            self.ok = False
+        else:
+            record = {'website_id': website_id, **result.to_dict()}
+            RENDERER.emit('scan', record, lambda record, result=result: print_scan_result(result))
+        if target.checkpoint is not None:
+            target.checkpoint.close()
+
+    def execute(self, specs):
+        """Scan every target specs expands to; returns False if any scan failed. On Ctrl+C
+        no new targets are started, and those already started are finished and saved
+        before KeyboardInterrupt is re-raised (a second Ctrl+C stops waiting)."""
+        threads = [threading.Thread(target=self._read, args=(specs,), daemon=True),
+                   threading.Thread(target=self._normalize, daemon=True)]
+        for stage in ('resolve', 'fetch', 'analyze'):
+            threads.extend(threading.Thread(target=self._scan, args=(stage,), daemon=True)
+                           for _ in range(self.workers[stage]))
+        threads.append(threading.Thread(target=self._persist, daemon=True))
+        for thread in threads:
+            thread.start()
+        try:
+            self._join(threads)
+        except KeyboardInterrupt:
+            self.stopping.set()
+            self._join(threads)
+            raise
+        if self.error is not None:
+            raise self.error
+        return self.ok
+
+    def _join(self, threads):
+        # Short joins so Ctrl+C reaches the main thread
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(0.5)
+
+    def summary(self):
+        with self.lock:
+            return {stage: dict(self.stats[stage], workers=self.workers[stage]) for stage in PIPELINE_STAGES}
+
+def print_pipeline_summary(summary):
+    print_subsection("Pipeline")
+    for stage, stats in summary.items():
+        print_info(stage, f"{stats['items']} items, {stats['workers']} workers, "
+                          f"queue peak {stats['max_depth']}, blocked {stats['blocked_seconds']:.1f} s")
+
+# ==================== GEOIP ====================
+GEOIP_MAGIC = b'OMARGEO1'
+GEOIP_HEADER = struct.Struct('>8sQQ')
+GEOIP_DEFAULT_PATH = 'omar_geoip.idx'
+IPV4_MAPPED = 0xffff << 32
+IPV4_MAPPED_PREFIX = (IPV4_MAPPED >> 32).to_bytes(12, 'big')
+
+def ip_to_key(value):
+    """128-bit big-endian sort key for an address; IPv4 maps into ::ffff:0:0/96"""
+    # inet_pton is an order of magnitude faster than ipaddress for bulk annotation
+    try:
+        return IPV4_MAPPED_PREFIX + socket.inet_pton(socket.AF_INET, value)
+    except OSError:
+        pass
+    try:
+        return socket.inet_pton(socket.AF_INET6, value)
+    except OSError:
+        raise ValueError(f"{value!r} is not an IP address") from None
+
+def _parse_range_bound(value):
+    value = value.strip()
+    if value.isdigit():
+        number = int(value)
+        # Decimal IPv4 ranges (IP2Location style) are mapped like dotted IPv4 addresses
+        return number | IPV4_MAPPED if number <= 0xffffffff else number
+    ip = ipaddress.ip_address(value)
+    return int(ip) | IPV4_MAPPED if ip.version == 4 else int(ip)
+
+def _parse_geoip_row(row):
+    """(start, end, remaining columns) from 'network,...' or 'start,end,...' rows"""
+    if '/' in row[0]:
+        network = ipaddress.ip_network(row[0].strip(), strict=False)
+        start = int(network.network_address)
+        end = int(network.broadcast_address)
+        if network.version == 4:
+            start |= IPV4_MAPPED
+            end |= IPV4_MAPPED
+        return start, end, row[1:]
+    return _parse_range_bound(row[0]), _parse_range_bound(row[1]), row[2:]
+
+def compile_geoip(csv_path, out_path, columns=None):
+    """Compile a range CSV (CIDR 'network,...' or 'start,end,...' rows, IPv4 and/or IPv6,
+    dotted or decimal) into a memory-mappable index. columns names the non-range fields;
+    by default they come from the header row. Returns the number of ranges."""
+    records = {}
+    ranges = []
+    with open(csv_path, newline='', encoding='utf-8', errors='replace') as f:
+        reader = csv.reader(f)
+        for row in reader:
+            if not row or row[0].startswith('#'):
+                continue
+            try:
+                start, end, values = _parse_geoip_row(row)
+            except ValueError:
+                # Header row: name the fields after it unless the caller did
+                if columns is None and not ranges:
+                    header = [name.strip().lower() for name in row]
+                    columns = header[1:] if header[0] in ('network', 'cidr', 'prefix') else header[2:]
+                continue
+            names = columns or [f"field{i + 1}" for i in range(len(values))]
+            record = json.dumps({name: value for name, value in zip(names, values) if value and value != '-'},
+                                separators=(',', ':'), ensure_ascii=False)
+            # Ranges sharing a location or network owner share one record
+            ranges.append((start, end, records.setdefault(record, len(records))))
+    ranges.sort()
+    
+    tmp = f"{out_path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        encoded = [record.encode('utf-8') for record in records]
+        f.write(GEOIP_HEADER.pack(GEOIP_MAGIC, len(ranges), len(encoded)))
+        for start, _, _ in ranges:
+            f.write(start.to_bytes(16, 'big'))
+        for _, end, _ in ranges:
+            f.write(end.to_bytes(16, 'big'))
+        for _, _, record_id in ranges:
+            f.write(record_id.to_bytes(4, 'big'))
+        offset = 0
+        for record in encoded:
+            f.write(offset.to_bytes(8, 'big'))
+            offset += len(record)
+        f.write(offset.to_bytes(8, 'big'))
+        for record in encoded:
+            f.write(record)
+    os.replace(tmp, out_path)
+    return len(ranges)
+
+class _RangeStarts:
+    """Sequence view of the sorted 16-byte range starts, for bisect"""
+
+    def __init__(self, data, offset, count):
+        self.data = data
+        self.offset = offset
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        at = self.offset + i * 16
+        return self.data[at:at + 16]
+
+class GeoIPIndex:
+    """One compiled range index, memory-mapped; lookups are a binary search over the
+    sorted range starts, so the file is never loaded into memory as a whole"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, self.record_count = GEOIP_HEADER.unpack_from(self.map, 0)
+        if magic != GEOIP_MAGIC:
+            raise ValueError(f"{path} is not a compiled GeoIP index (use --geoip-compile)")
+        base = GEOIP_HEADER.size
+        self.starts = _RangeStarts(self.map, base, self.count)
+        self.ends_offset = base + self.count * 16
+        self.ids_offset = self.ends_offset + self.count * 16
+        self.offsets_offset = self.ids_offset + self.count * 4
+        self.records_offset = self.offsets_offset + (self.record_count + 1) * 8
+        self.records = {}
+
+    def _record(self, record_id):
+        record = self.records.get(record_id)
+        if record is None:
+            at = self.offsets_offset + record_id * 8
+            start = int.from_bytes(self.map[at:at + 8], 'big')
+            end = int.from_bytes(self.map[at + 8:at + 16], 'big')
+            record = json.loads(self.map[self.records_offset + start:self.records_offset + end])
+            self.records[record_id] = record
+        return record
+
+    def lookup_key(self, key, lo=0):
+        """Record for a 16-byte key (see ip_to_key) or None; lo narrows the search for
+        callers walking sorted keys. Returns (record, index)."""
+        starts = self.starts
+        # Gallop forward from lo: sorted callers usually land in or just past the last range
+        hi = lo + 1
+        step = 1
+        while hi < self.count and starts[hi] <= key:
+            lo = hi
+            step *= 2
+            hi = lo + step
+        i = bisect.bisect_right(starts, key, lo, min(hi, self.count)) - 1
+        if i < 0:
+            return None, 0
+        at = self.ends_offset + i * 16
+        if self.map[at:at + 16] < key:
+            return None, i
+        at = self.ids_offset + i * 4
+        return self._record(int.from_bytes(self.map[at:at + 4], 'big')), i
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+class GeoIPDatabase:
+    """Merges several indexes (e.g. a city and an ASN dataset) into one annotation"""
+
+    def __init__(self):
+        self.indexes = []
+
+    def load(self, paths):
+        for path in paths:
+            self.indexes.append(GeoIPIndex(path))
+
+    def lookup(self, ip):
+        """Merged fields for ip, or None if no index covers it (or none is loaded)"""
+        if not self.indexes:
+            return None
+        try:
+            key = ip_to_key(ip)
+        except ValueError:
+            return None
+        merged = {}
+        for index in self.indexes:
+            record = index.lookup_key(key)[0]
+            if record:
+                merged.update(record)
+        return merged or None
+
+    def annotate(self, ips):
+        """Yield (ip, fields) for many addresses. Lookups run in sorted key order so each
+        binary search starts where the previous one ended."""
+        keyed = []
+        for ip in ips:
+            try:
+                keyed.append((ip_to_key(ip), ip))
+            except ValueError:
+                yield ip, None
+        keyed.sort()
+        positions = [0] * len(self.indexes)
+        for key, ip in keyed:
+            merged = {}
+            for n, index in enumerate(self.indexes):
+                record, positions[n] = index.lookup_key(key, positions[n])
+                if record:
+                    merged.update(record)
+            yield ip, merged or None
+
+GEOIP = GeoIPDatabase()
+
+def format_geoip(fields):
+    return ", ".join(f"{name}: {value}" for name, value in fields.items())
+
+def print_geoip_annotation(record):
+    if record['geoip']:
+        print_info(record['ip'], format_geoip(record['geoip']))
+    else:
+        print_info(record['ip'], "Not found")
+
+# ==================== WORDLISTS ====================
+WORDLIST_MAGIC = b'OMARWL01'
+# magic, source size, source mtime (ns), entries, offset slots, hash slots
+WORDLIST_HEADER = struct.Struct('>8sQQQQQ')
+WORDLIST_INDEX_SUFFIX = '.omaridx'
+
+def wordlist_hash(entry):
+    """Nonzero 64-bit hash of an entry's bytes; 0 marks an empty hash table slot"""
+    return int.from_bytes(hashlib.blake2b(entry, digest_size=8).digest(), 'big') or 1
+
+def build_wordlist_index(path, index_path):
+    """Index a wordlist: the offset of the first occurrence of every distinct entry
+    (blank lines and # comments skipped) followed by an open-addressing table of entry
+    hashes, used for the dedup. Written under a temporary name and renamed, so workers
+    sharing the index never see half of one. Returns the number of entries."""
+    stat = os.stat(path)
+    with open(path, 'rb') as f:
+        lines = sum(chunk.count(b'\n') for chunk in iter(lambda: f.read(1 << 20), b'')) + 1
+        slots = 1 << (lines * 2).bit_length()
+        offsets_at = WORDLIST_HEADER.size
+        table_at = offsets_at + lines * 8
+        source = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else b''
+        tmp = f"{index_path}.{os.getpid()}.tmp"
+        with open(tmp, 'w+b') as out:
+            out.truncate(table_at + slots * 8)
+            index = mmap.mmap(out.fileno(), 0)
+            count = 0
+            pos = 0
+            while pos < len(source):
+                end = source.find(b'\n', pos)
+                if end < 0:
+                    end = len(source)
+                entry = source[pos:end].strip()
+                if entry and not entry.startswith(b'#'):
+                    digest = wordlist_hash(entry)
+                    slot = digest & (slots - 1)
+                    while True:
+                        existing, = struct.unpack_from('>Q', index, table_at + slot * 8)
+                        if existing == digest:
+                            break
+                        if not existing:
+                            struct.pack_into('>Q', index, table_at + slot * 8, digest)
+                            struct.pack_into('>Q', index, offsets_at + count * 8, pos)
+                            count += 1
+                            break
+                        slot = (slot + 1) & (slots - 1)
+                pos = end + 1
+            WORDLIST_HEADER.pack_into(index, 0, WORDLIST_MAGIC, stat.st_size, stat.st_mtime_ns, count, lines, slots)
+            index.close()
+        if stat.st_size:
+            source.close()
+    os.replace(tmp, index_path)
+    return count
+
+class Wordlist:
+    """A memory-mapped wordlist. Its index (PATH.omaridx, built on first use and rebuilt
+    when the file changes) lists each distinct entry's offset, so entries are decoded
+    one at a time as they are iterated and every process reading the list shares the
+    page-cached file instead of holding its own copy. shard() narrows iteration to one
+    contiguous offset range; `in` checks the on-disk hash table."""
+
+    def __init__(self, path, index_path=None):
+        self.path = path
+        self.index_path = index_path or path + WORDLIST_INDEX_SUFFIX
+        self.source_file = open(path, 'rb')
+        stat = os.fstat(self.source_file.fileno())
+        self.source = mmap.mmap(self.source_file.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else b''
+        if not self._open_index(stat):
+            try:
+                build_wordlist_index(path, self.index_path)
+            except PermissionError:
+                # Read-only wordlist directory: keep the index next to the database instead
+                self.index_path = os.path.basename(path) + WORDLIST_INDEX_SUFFIX
+                if self._open_index(stat):
+                    return
+                build_wordlist_index(path, self.index_path)
+            if not self._open_index(stat):
+                raise ValueError(f"{path} changed while it was being indexed")
+
+    def _open_index(self, stat):
+        """Map the index if it exists and matches the wordlist's size and mtime"""
+        try:
+            with open(self.index_path, 'rb') as f:
+                index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return False
+        magic, size, mtime_ns, count, lines, slots = WORDLIST_HEADER.unpack_from(index, 0)
+        if magic != WORDLIST_MAGIC or size != stat.st_size or mtime_ns != stat.st_mtime_ns:
+            index.close()
+            return False
+        self.index = index
+        self.count = count
+        self.slots = slots
+        self.offsets_at = WORDLIST_HEADER.size
+        self.table_at = self.offsets_at + lines * 8
+        self.start, self.stop = 0, count
+        return True
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def _entry(self, i):
+        pos, = struct.unpack_from('>Q', self.index, self.offsets_at + i * 8)
+        end = self.source.find(b'\n', pos)
+        return self.source[pos:end if end >= 0 else len(self.source)].strip().decode('utf-8', errors='replace')
+
+    def __iter__(self):
+        for i in range(self.start, self.stop):
+            yield self._entry(i)
+
+    def __contains__(self, entry):
+        digest = wordlist_hash(entry.strip().encode('utf-8'))
+        slot = digest & (self.slots - 1)
+        while True:
+            existing, = struct.unpack_from('>Q', self.index, self.table_at + slot * 8)
+            if existing == digest:
+                return True
+            if not existing:
+                return False
+            slot = (slot + 1) & (self.slots - 1)
+
+    def shard(self, index, count):
+        """Iterate only the index-th of count equal slices (0-based); entries are stored
+        in file order, so each slice is one contiguous byte range of the wordlist"""
+        if not 0 <= index < count:
+            raise ValueError(f"Shard {index} out of range for {count} shards")
+        self.start, self.stop = self.count * index // count, self.count * (index + 1) // count
+        return self
+
+    def close(self):
+        self.index.close()
+        if isinstance(self.source, mmap.mmap):
+            self.source.close()
+        self.source_file.close()
+
+def parse_shard(spec):
+    """'I/N' (1-based, as given on the command line) -> 0-based (index, count)"""
+    try:
+        index, count = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"Invalid shard {spec!r}, expected I/N") from None
+    if not 1 <= index <= count:
+        raise ValueError(f"Invalid shard {spec!r}, expected 1 <= I <= N")
+    return index - 1, count
+
+class EnumerationWordlists:
+    """Wordlists the subdomains and paths phases take candidates from, opened
+    once per process and shared by its scan threads"""
+
+    def __init__(self):
+        self.paths = {}
+        self.shard = None
+        self.lists = {}
+        self.lock = threading.Lock()
+
+    def configure(self, subdomains=None, directories=None, shard=None):
+        self.paths = {kind: path for kind, path in (('subdomains', subdomains), ('directories', directories)) if path}
+        self.shard = shard
+
+    def get(self, kind):
+        """Wordlist for kind, or None when none was configured"""
+        path = self.paths.get(kind)
+        if path is None:
+            return None
+        with self.lock:
+            wordlist = self.lists.get(kind)
+            if wordlist is None:
+                wordlist = Wordlist(path)
+                if self.shard:
+                    wordlist.shard(*self.shard)
+                self.lists[kind] = wordlist
+            return wordlist
+
+WORDLISTS = EnumerationWordlists()
+
+# ==================== TARGET EXPANSION ====================
+
+def parse_address_range(spec, hosts=True):
+    """(first, last) address keys (integers, IPv4 mapped as in ip_to_key) for a CIDR,
+    an 'a-b' or 'a.b.c.d-N' range or a single address; None for hostnames and URLs.
+    With hosts, a CIDR leaves out the addresses network.hosts() does."""
+    spec = spec.strip()
+    if '/' in spec:
+        try:
+            network = ipaddress.ip_network(spec, strict=False)
+        except ValueError:
+            return None
+        first = int(network.network_address)
+        last = int(network.broadcast_address)
+        # Same addresses as network.hosts(): no IPv4 network/broadcast or IPv6 subnet-router anycast
+        if hosts and network.version == 4 and network.prefixlen < 31:
+            first, last = first + 1, last - 1
+        elif hosts and network.version == 6 and network.prefixlen < 127:
+            first += 1
+        version = network.version
+    else:
+        low, _, high = spec.partition('-')
+        try:
+            first_ip = ipaddress.ip_address(low.strip())
+        except ValueError:
+            return None
+        high = high.strip()
+        if not high:
+            last_ip = first_ip
+        elif high.isdigit() and first_ip.version == 4:
+            # 10.0.0.1-50 shorthand for the last octet
+            last_ip = ipaddress.ip_address(f"{low.strip().rsplit('.', 1)[0]}.{high}")
+        else:
+            last_ip = ipaddress.ip_address(high)
+        if last_ip.version != first_ip.version:
+            raise ValueError(f"Range {spec} mixes IPv4 and IPv6")
+        first, last = int(first_ip), int(last_ip)
+        version = first_ip.version
+    if last < first:
+        raise ValueError(f"Range {spec} is empty")
+    if version == 4:
+        first |= IPV4_MAPPED
+        last |= IPV4_MAPPED
+    return first, last
+
+def key_to_address(key):
+    if key >> 32 == 0xffff:
+        return ipaddress.IPv4Address(key & 0xffffffff)
+    return ipaddress.IPv6Address(key)
+
+class AddressIntervals:
+    """Sorted, merged address ranges; memory grows with the number of ranges added,
+    not with the number of addresses they cover"""
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+
+    def __contains__(self, key):
+        i = bisect.bisect_right(self.starts, key) - 1
+        return i >= 0 and key <= self.ends[i]
+
+    def add(self, first, last):
+        # Absorb every range overlapping or adjacent to first..last
+        i = bisect.bisect_left(self.ends, first - 1)
+        j = bisect.bisect_right(self.starts, last + 1)
+        if i < j:
+            first = min(first, self.starts[i])
+            last = max(last, self.ends[j - 1])
+        self.starts[i:j] = [first]
+        self.ends[i:j] = [last]
+
+    def missing(self, first, last):
+        """The pieces of first..last not covered yet, as (first, last) pairs"""
+        pieces = []
+        i = bisect.bisect_left(self.ends, first)
+        while first <= last:
+            if i >= len(self.starts) or self.starts[i] > last:
+                pieces.append((first, last))
+                break
+            if self.starts[i] > first:
+                pieces.append((first, self.starts[i] - 1))
+            first = self.ends[i] + 1
+            i += 1
+        return pieces
+
+TARGET_EXCLUDE_CAPACITY = 1 << 16
+SITEMAP_TARGET_PREFIX = 'sitemap:'
+
+class TargetExpander:
+    """Lazily expands target specs (URLs, hostnames, addresses, CIDRs, ranges and
+    sitemap:URL) into scan URLs. Ranges are walked with integer generators, never materialized; duplicates
+    and exclusions are tracked as ranges too. With shuffle, each range is visited in a
+    random full-period LCG order, so a /16 is not swept one neighbour at a time."""
+
+    def __init__(self, exclude=(), scheme='https', shuffle=False, seed=None, sitemap_concurrency=4):
+        self.scheme = scheme
+        self.sitemap_concurrency = sitemap_concurrency
+        self.shuffle = shuffle
+        self.random = random.Random(seed)
+        self.seen_ranges = AddressIntervals()
+        self.excluded_ranges = AddressIntervals()
+        # URLs and hostnames are checked against a Bloom filter backed by a temporary
+        # on-disk table, so memory stays flat however many distinct targets the input has
+        self.seen_urls = temporary_seen_set()
+        self.excluded_hosts = None
+        for spec in exclude:
+            self.exclude(spec)
+
+    def exclude(self, spec):
+        # An excluded CIDR covers its whole block, network and broadcast addresses included
+        bounds = parse_address_range(spec, hosts=False)
+        if bounds:
+            self.excluded_ranges.add(*bounds)
+        else:
+            host = urlparse(self.normalize(spec)).hostname
+            if host:
+                if self.excluded_hosts is None:
+                    self.excluded_hosts = temporary_seen_set(TARGET_EXCLUDE_CAPACITY)
+                self.excluded_hosts.add(host)
+
+    def normalize(self, spec):
+        return spec if spec.startswith(('http://', 'https://')) else f"{self.scheme}://{spec}"
+
+    def address_url(self, key):
+        ip = key_to_address(key)
+        return f"{self.scheme}://[{ip}]" if ip.version == 6 else f"{self.scheme}://{ip}"
+
+    def expand(self, specs):
+        for spec in specs:
+            spec = spec.strip()
+            if spec.lower().startswith(SITEMAP_TARGET_PREFIX):
+                for page_url in self._sitemap_urls(spec[len(SITEMAP_TARGET_PREFIX):]):
+                    url = self._host_url(page_url)
+                    if url:
+                        yield url
+                continue
+            try:
+                bounds = parse_address_range(spec)
+            except ValueError as e:
+                print_warning(f"Skipping target: {e}")
+                continue
+            if bounds is None:
+                url = self._host_url(spec)
+                if url:
+                    yield url
+                continue
+            for key in self._range_keys(bounds):
+                yield self.address_url(key)
+
+    def addresses(self, specs):
+        """Like expand(), but yields bare address strings and skips hostnames and URLs"""
+        for spec in specs:
+            spec = spec.strip()
+            try:
+                bounds = parse_address_range(spec)
+            except ValueError as e:
+                print_warning(f"Skipping target: {e}")
+                continue
+            if bounds is None:
+                print_warning(f"Skipping target: {spec} is not an address, CIDR or range")
+                continue
+            for key in self._range_keys(bounds):
+                yield str(key_to_address(key))
+
+    def _sitemap_urls(self, spec):
+        """Page URLs streamed from a sitemap:URL spec; a URL naming a sitemap document is read
+        directly, anything else is a site whose robots.txt sitemaps are read"""
+        url = self.normalize(spec)
+        if urlparse(url).path.lower().endswith(('.xml', '.gz')):
+            return iter_sitemap_urls([url], concurrency=self.sitemap_concurrency)
+        return discover_site_urls(url, concurrency=self.sitemap_concurrency)
+
+    def _range_keys(self, bounds):
+        pieces = [piece for new in self.seen_ranges.missing(*bounds)
+                  for piece in self.excluded_ranges.missing(*new)]
+        self.seen_ranges.add(*bounds)
+        return self._walk(pieces)
+
+    def _host_url(self, spec):
+        url = self.normalize(spec)
+        host = urlparse(url).hostname
+        if not host or (self.excluded_hosts is not None and host in self.excluded_hosts):
+            return None
+        try:
+            ip = ipaddress.ip_address(host)
+        except ValueError:
+            pass
+        else:
+            if (int(ip) | IPV4_MAPPED if ip.version == 4 else int(ip)) in self.excluded_ranges:
+                return None
+        return url if self.seen_urls.add(url) else None
+
+    def _walk(self, pieces):
+        if not self.shuffle:
+            for first, last in pieces:
+                yield from range(first, last + 1)
+            return
+        offsets = []
+        total = 0
+        for first, last in pieces:
+            offsets.append(total)
+            total += last - first + 1
+        if not total:
+            return
+        # x -> (a*x + c) mod 2^k visits every residue once when a % 4 == 1 and c is odd
+        # (Hull-Dobell); indexes past the end of the range are skipped, so under half are wasted
+        modulus = 1 << max(total - 1, 1).bit_length()
+        a = self.random.randrange(modulus) * 4 + 1
+        c = self.random.randrange(modulus) * 2 + 1
+        x = self.random.randrange(modulus)
+        for _ in range(modulus):
+            x = (a * x + c) % modulus
+            if x < total:
+                n = bisect.bisect_right(offsets, x) - 1
+                yield pieces[n][0] + x - offsets[n]
+
+def target_options(args):
+    """TargetExpander arguments from the command line; a --shuffle without a seed gets a
+    random one here so that a checkpointed batch run can repeat its order on --resume"""
+    exclude = list(args.exclude or [])
+    if args.exclude_file:
+        exclude.extend(read_targets(args.exclude_file))
+    seed = args.shuffle_seed
+    if args.shuffle and seed is None:
+        seed = random.randrange(2 ** 32)
+    return {'exclude': exclude, 'scheme': args.target_scheme, 'shuffle': args.shuffle, 'seed': seed}
+
+def target_expander(args, options=None, ordered=False):
+    """TargetExpander for --scan, --batch, --enqueue and --ptr-sweep from the command line options.
+    With ordered, sitemaps are read one at a time so that nested indexes expand in the
+    same order every time, as a checkpointed batch run needs for --resume."""
+    options = options or target_options(args)
+    return TargetExpander(options['exclude'], options['scheme'], options['shuffle'], options['seed'],
+                          1 if ordered else 4)
+
+# ==================== PTR SWEEPS ====================
+PTR_SWEEP_BATCH = 500
+PTR_CACHE_SIZE = 100000
+
+METRICS.register('omar_ptr_lookups_total', 'counter', "Reverse DNS sweep lookups by status")
+
+def make_ptr_resolver(timeout=2.0, nameservers=None):
+    """dnspython resolver with its own answer cache for PTR sweeps"""
+    resolver = dns.resolver.Resolver()
+    resolver.cache = dns.resolver.LRUCache(PTR_CACHE_SIZE)
+    resolver.lifetime = timeout
+    if nameservers:
+        resolver.nameservers = nameservers
+    return resolver
+
+def lookup_ptr(resolver, ip):
+    """(names, status) for one address; status is ok, nxdomain, no_answer, timeout, servfail or error"""
+    try:
+        answer = resolver.resolve_address(ip)
+    except dns.resolver.NXDOMAIN:
+        return [], 'nxdomain'
+    except dns.resolver.NoAnswer:
+        return [], 'no_answer'
+    except dns.exception.Timeout:
+        return [], 'timeout'
+    except dns.resolver.NoNameservers:
+        return [], 'servfail'
+    except dns.exception.DNSException:
+        return [], 'error'
+    return [record.target.to_text().rstrip('.') for record in answer], 'ok'
+
+def save_ptr_records(c, rows):
+    c.executemany('''INSERT INTO ptr_records (ip, hostname, names, status, resolved_at) VALUES (?, ?, ?, ?, ?)
+                     ON CONFLICT (ip) DO UPDATE
+                     SET hostname = excluded.hostname, names = excluded.names,
+                         status = excluded.status, resolved_at = excluded.resolved_at''', rows)
+
+def sweep_ptr(addresses, concurrency=256, timeout=2.0, nameservers=None):
+    """Reverse-resolve addresses concurrently, yielding (ip, names, status) as answers
+    arrive. In-flight queries are bounded by an adaptive limiter that backs off when
+    lookups time out; results are written to ptr_records in batches."""
+    resolver = make_ptr_resolver(timeout, nameservers)
+    # Start at full width; unanswered reverse zones are common, so only back off when
+    # at least half of the recent lookups time out
+    limiter = AdaptiveLimiter('ptr', initial=concurrency, maximum=concurrency, error_threshold=0.5)
+    
+    def lookup(ip):
+        names, status = lookup_ptr(resolver, ip)
+        # Only timeouts mean the resolver is overloaded; NXDOMAIN is a normal answer
+        return (names, status), status == 'timeout'
+    
+    conn = setup_database()
+    c = conn.cursor()
+    rows = []
+    try:
+        for ip, (names, status) in run_adaptive(limiter, lookup, addresses):
+            METRICS.inc('omar_ptr_lookups_total', status=status)
+            rows.append((ip, names[0] if names else None, json.dumps(names), status, time.time()))
+            if len(rows) >= PTR_SWEEP_BATCH:
+                save_ptr_records(c, rows)
+                conn.commit()
+                rows = []
+            yield ip, names, status
+    finally:
+        if rows:
+            save_ptr_records(c, rows)
+            conn.commit()
+        conn.close()
+
+def print_ptr_record(record):
+    # Terminal output only lists addresses that have names; the counts come at the end
+    if record['names']:
+        print_info(record['ip'], ", ".join(record['names']))
+
+def run_ptr_sweep(addresses, concurrency=256, timeout=2.0, nameservers=None):
+    """--ptr-sweep: stream results through the renderer and finish with per-status counts"""
+    counts = {}
+    with RENDERER.batch():
+        for ip, names, status in sweep_ptr(addresses, concurrency, timeout, nameservers):
+            counts[status] = counts.get(status, 0) + 1
+            RENDERER.emit('ptr', {'ip': ip, 'names': names, 'status': status}, print_ptr_record)
+    summary = ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+    print_success(f"Swept {sum(counts.values())} addresses ({summary or 'none'})")
+
+# ==================== SHARED IP SCANS ====================
+IP_SCAN_TTL = 3600
+IP_SCAN_CACHE_SIZE = 10000
+
+def cert_covers(cert, hostname):
+    """True if a getpeercert() dict names hostname in subjectAltName (or CN without SANs)"""
+    hostname = hostname.lower().rstrip('.')
+    names = [value for kind, value in cert.get('subjectAltName', ()) if kind in ('DNS', 'IP Address')]
+    if not names:
+        names = [value for rdn in cert.get('subject', ()) for key, value in rdn if key == 'commonName']
+    for name in names:
+        name = name.lower().rstrip('.')
+        if name == hostname:
+            return True
+        # A wildcard covers exactly one leftmost label
+        if name.startswith('*.') and '.' in hostname and hostname.split('.', 1)[1] == name[2:]:
+            return True
+    return False
+
+class IPScanCache:
+    """Results of IP-scoped phases (open ports, reverse DNS, TLS certificates) shared by
+    every hostname on the same address. The first target needing a result computes it
+    while concurrent targets wait for it; results expire after ttl seconds."""
+
+    def __init__(self, ttl=IP_SCAN_TTL, max_entries=IP_SCAN_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def _entry(self, key):
+        """(entry, owner) for key; owner is True when the caller must fill the entry"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry['done'].is_set() and time.monotonic() - entry['at'] > self.ttl:
+                entry = None
+            if entry is not None:
+                return entry, False
+            entry = {'done': threading.Event(), 'scan': None, 'certs': [],
+                     'lock': threading.Lock(), 'at': time.monotonic()}
+            self.entries[key] = entry
+            while len(self.entries) > self.max_entries:
+                # Dicts keep insertion order, so this drops the oldest entry
+                del self.entries[next(iter(self.entries))]
+            return entry, True
+
+    def get(self, ip, kind, compute):
+        """IPScan for (ip, kind), running compute() at most once per ttl across threads"""
+        entry, owner = self._entry((ip, kind))
+        record_cache_lookup('ip_scans', not owner)
+        if not owner:
+            # Another target's scan may outlive this target's budget
+            if not entry['done'].wait(time_left()):
+                raise DeadlineExceeded()
+            if entry['scan'] is not None:
+                return entry['scan']
+            # The first caller failed; try for ourselves instead of caching the failure
+            return IPScan(ip, kind, '', compute(), time.time())
+        try:
+            scan = IPScan(ip, kind, '', compute(), time.time())
+            if deadline_passed():
+                # Possibly cut short by this target's budget: not good enough for other targets
+                raise DeadlineExceeded()
+            entry['scan'] = scan
+            return scan
+        except Exception:
+            with self.lock:
+                if self.entries.get((ip, kind)) is entry:
+                    del self.entries[(ip, kind)]
+            raise
+        finally:
+            entry['done'].set()
+
+    def certificate(self, ip, hostname, fetch):
+        """IPScan with the TLS certificate for hostname on ip. A certificate already seen on
+        that address is reused if it covers hostname; otherwise fetch() -> (cert, der) runs."""
+        entry, owner = self._entry((ip, 'tls'))
+        if owner:
+            entry['done'].set()
+        # Handshakes to one address are serialized so co-hosted names can share the first one
+        remaining = time_left()
+        if not entry['lock'].acquire(timeout=-1 if remaining is None else remaining):
+            raise DeadlineExceeded()
+        try:
+            for scan in entry['certs']:
+                if cert_covers(scan.result, hostname):
+                    record_cache_lookup('ip_scans', True)
+                    return scan
+            record_cache_lookup('ip_scans', False)
+            cert, der = fetch()
+            scan = IPScan(ip, 'tls', hashlib.sha256(der).hexdigest(), cert, time.time())
+            entry['certs'].append(scan)
+            return scan
+        finally:
+            entry['lock'].release()
+
+IP_SCANS = IPScanCache()
+
+def target_ip(result):
+    """Address the scanned host resolved to, resolving it if the network phase did not run"""
+    try:
+        return str(ipaddress.ip_address(result.ip_address))
+    except (TypeError, ValueError):
+        host = urlparse(result.url).hostname
+        return SCHEDULER.resolve_ip(host) if host else None
+
+def reverse_dns(ip):
+    try:
+        with SCHEDULER.slot(ip, kind='dns'):
+            return with_retries(until_deadline(socket.gethostbyaddr), ip, retry_on=(socket.timeout,))[0]
+    except (socket.herror, socket.gaierror):
+        return None
+
+def fetch_certificate(host, ip=None, timeout=10):
+    """Peer certificate for host (SNI), connecting to ip when known; returns (cert, der)"""
+    context = ssl.create_default_context()
+    with SCHEDULER.slot(host, ip or SCHEDULER.resolve_ip(host)), \
+            resilient_call(host, connect_dual_stack, ip or host, 443, timeout=timeout) as sock:
+        with context.wrap_socket(sock, server_hostname=host) as ssock:
+            return ssock.getpeercert(), ssock.getpeercert(binary_form=True) or b''
+
+def save_ip_scans(c, website_id, scans):
+    """Store IP-scoped results once per (ip, kind, key) and link them to a website_data row"""
+    for scan in scans:
+        c.execute('''INSERT INTO ip_scans (ip, kind, key, result, scanned_at) VALUES (?, ?, ?, ?, ?)
+                     ON CONFLICT (ip, kind, key) DO UPDATE
+                     SET result = excluded.result, scanned_at = excluded.scanned_at
+                     WHERE excluded.scanned_at > ip_scans.scanned_at''',
+                  (scan['ip'], scan['kind'], scan['key'],
+                   json.dumps(scan['result'], separators=(',', ':')), scan['scanned_at']))
+        c.execute('SELECT id FROM ip_scans WHERE ip = ? AND kind = ? AND key = ?',
+                  (scan['ip'], scan['kind'], scan['key']))
+        c.execute('INSERT OR IGNORE INTO website_ip_scans (website_id, ip_scan_id) VALUES (?, ?)',
+                  (website_id, c.fetchone()[0]))
+
+# ==================== WEBSITE CRAWLER ====================
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+def canonicalize_url(url, base=None):
+    """Absolute, normalised form of url (lower-case scheme/host, no default port,
+    no fragment, sorted query); None for non-HTTP links"""
+    if base:
+        url = urljoin(base, url.strip())
+    parsed = urlparse(url)
+    scheme = parsed.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parsed.hostname:
+        return None
+    host = parsed.hostname.lower().rstrip('.')
+    try:
+        port = parsed.port
+    except ValueError:
+        return None
+    netloc = host if port in (None, DEFAULT_PORTS[scheme]) else f"{host}:{port}"
+    path = quote(unquote(parsed.path or '/'), safe="/:@!$&'()*+,;=-._~%")
+    query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+    return urlunparse((scheme, netloc, path, '', query, ''))
+
+class BloomFilter:
+    """Fixed-size Bloom filter; memory depends on capacity and error rate, not items added"""
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.size = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def __contains__(self, item):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def add(self, item):
+        for p in self._positions(item):
+            self.bits[p >> 3] |= 1 << (p & 7)
+
+class SeenURLSet:
+    """Dedup set kept in the on-disk crawl_seen table. With a capacity, a Bloom filter
+    answers most negative `in` lookups in memory; the table settles 'maybe seen' answers
+    so false positives never drop a URL."""
+
+    def __init__(self, conn, crawl_id, capacity=None):
+        self.conn = conn
+        self.crawl_id = crawl_id
+        self.bloom = BloomFilter(capacity) if capacity else None
+
+    @staticmethod
+    def _key(url):
+        return hashlib.sha1(url.encode('utf-8', 'surrogatepass')).digest()
+
+    def __contains__(self, url):
+        if self.bloom is not None and url not in self.bloom:
+            return False
+        c = self.conn.cursor()
+        c.execute('SELECT 1 FROM crawl_seen WHERE crawl_id = ? AND url_hash = ?', (self.crawl_id, self._key(url)))
+        return c.fetchone() is not None
+
+    def add(self, url):
+        """Add url; returns False if it was already present"""
+        if self.bloom is not None:
+            self.bloom.add(url)
+        c = self.conn.execute('INSERT OR IGNORE INTO crawl_seen (crawl_id, url_hash) VALUES (?, ?)',
+                              (self.crawl_id, self._key(url)))
+        return c.rowcount == 1
+
+def temporary_seen_set(capacity=None):
+    """SeenURLSet over a private temporary database (SQLite keeps it in a temp file
+    and only a bounded page cache in memory), for dedup outside a crawl"""
+    conn = sqlite3.connect('', check_same_thread=False)
+    conn.execute('''CREATE TABLE crawl_seen
+                    (crawl_id INTEGER, url_hash BLOB, PRIMARY KEY (crawl_id, url_hash)) WITHOUT ROWID''')
+    return SeenURLSet(conn, 0, capacity)
+
+def fetch_crawl_page(url):
+    """Fetch and parse one crawl page in a worker thread"""
+    response = polite_get(url, headers=get_random_headers(), timeout=20, verify=False)
+    result = {'url': url, 'status': response.status_code, 'assets': None, 'title': None}
+    if response.status_code == 200 and 'html' in response.headers.get('content-type', ''):
+        soup = BeautifulSoup(response.text, 'html.parser')
+        title_tag = soup.find('title')
+        result['title'] = title_tag.text.strip() if title_tag else None
+        result['assets'] = extract_page_assets(soup)
+    return result
+
+def _record_crawl_asset(c, crawl_id, kind, value, url):
+    c.execute('''INSERT INTO crawl_assets (crawl_id, kind, value, first_url, count)
+                 VALUES (?, ?, ?, ?, 1)
+                 ON CONFLICT (crawl_id, kind, value) DO UPDATE SET count = count + 1''',
+              (crawl_id, kind, value, url))
+
+def crawl_website(url, max_depth=2, max_pages=200, concurrency=8, seeds=None, respect_robots=True):
+    """Crawl in-scope links breadth-first with a disk-backed frontier and dedup set;
+    forms, scripts and meta tags are aggregated per site in crawl_assets. seeds is an
+    optional iterable of extra start URLs (e.g. discover_site_urls()), consumed lazily."""
+    seed = canonicalize_url(url)
+    if not seed:
+        raise ValueError(f"Not an HTTP(S) URL: {url}")
+    scope = urlparse(seed).hostname
+    robots = fetch_robots(seed)[0] if respect_robots else None
+    seed_source = seeds
+    seeds = iter(seeds or ())
+    conn = setup_database()
+    c = conn.cursor()
+    c.execute('''INSERT INTO crawls (seed, max_depth, max_pages, pages, started_at)
+                 VALUES (?, ?, ?, 0, ?)''', (seed, max_depth, max_pages, time.time()))
+    crawl_id = c.lastrowid
+    seen = SeenURLSet(conn, crawl_id, capacity=max(1000, max_pages * 20))
+    seen.add(seed)
+    c.execute('INSERT INTO crawl_frontier (crawl_id, url, depth) VALUES (?, ?, 0)', (crawl_id, seed))
+    conn.commit()
+    
+    pages = 0
+    errors = 0
+    in_flight = {}
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+            while True:
+                # Top up the in-flight set from the on-disk frontier, then from the seed iterator
+                room = min(concurrency * 2 - len(in_flight), max_pages - pages)
+                if room > 0 and seeds is not None:
+                    c.execute('SELECT COUNT(*) FROM crawl_frontier WHERE crawl_id = ?', (crawl_id,))
+                    if c.fetchone()[0] < room:
+                        taken = 0
+                        for extra in itertools.islice(seeds, room):
+                            taken += 1
+                            extra = canonicalize_url(extra)
+                            if extra and urlparse(extra).hostname == scope and seen.add(extra):
+                                c.execute('INSERT INTO crawl_frontier (crawl_id, url, depth) VALUES (?, ?, 0)',
+                                          (crawl_id, extra))
+                        if taken < room:
+                            seeds = None
+                batch = []
+                if room > 0:
+                    c.execute('''SELECT id, url, depth FROM crawl_frontier WHERE crawl_id = ?
+                                 ORDER BY id LIMIT ?''', (crawl_id, room))
+                    batch = c.fetchall()
+                    for frontier_id, page_url, depth in batch:
+                        c.execute('DELETE FROM crawl_frontier WHERE id = ?', (frontier_id,))
+                        if robots and not robots.can_fetch('*', page_url):
+                            c.execute('''INSERT INTO crawl_pages (crawl_id, url, depth, status, title, error)
+                                         VALUES (?, ?, ?, NULL, NULL, 'disallowed by robots.txt')''',
+                                      (crawl_id, page_url, depth))
+                            continue
+                        in_flight[executor.submit(fetch_crawl_page, page_url)] = (page_url, depth)
+                        pages += 1
+                if not in_flight:
+                    if batch or (seeds is not None and pages < max_pages):
+                        continue
+                    break
+                done, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    page_url, depth = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        errors += 1
+                        c.execute('''INSERT INTO crawl_pages (crawl_id, url, depth, status, title, error)
+                                     VALUES (?, ?, ?, NULL, NULL, ?)''', (crawl_id, page_url, depth, str(e)))
+                        continue
+                    c.execute('''INSERT INTO crawl_pages (crawl_id, url, depth, status, title, error)
+                                 VALUES (?, ?, ?, ?, ?, NULL)''',
+                              (crawl_id, page_url, depth, result['status'], result['title']))
+                    assets = result['assets']
+                    if not assets:
+                        continue
+                    for name, content in assets['meta_tags'].items():
+                        _record_crawl_asset(c, crawl_id, 'meta', f"{name}={content}", page_url)
+                    for src in assets['scripts']:
+                        _record_crawl_asset(c, crawl_id, 'script', canonicalize_url(src, page_url) or src, page_url)
+                    for form in assets['forms']:
+                        form_key = json.dumps({
+                            'action': canonicalize_url(form.action or '', page_url),
+                            'method': (form.method or 'GET').upper(),
+                            'inputs': sorted(str(i.name) for i in form.inputs)
+                        }, sort_keys=True)
+                        _record_crawl_asset(c, crawl_id, 'form', form_key, page_url)
+                    if depth >= max_depth:
+                        continue
+                    for link in assets['links']:
+                        link_url = canonicalize_url(link.href, page_url)
+                        if link_url and urlparse(link_url).hostname == scope and seen.add(link_url):
+                            c.execute('INSERT INTO crawl_frontier (crawl_id, url, depth) VALUES (?, ?, ?)',
+                                      (crawl_id, link_url, depth + 1))
+                c.execute('UPDATE crawls SET pages = ? WHERE id = ?', (pages, crawl_id))
+                conn.commit()
+    finally:
+        # Stop background sitemap readers when the page budget runs out first
+        if hasattr(seed_source, 'close'):
+            seed_source.close()
     
-    return technologies
+    c.execute('DELETE FROM crawl_frontier WHERE crawl_id = ?', (crawl_id,))
+    c.execute('UPDATE crawls SET pages = ?, finished_at = ? WHERE id = ?', (pages, time.time(), crawl_id))
+    conn.commit()
+    c.execute('SELECT kind, COUNT(*) FROM crawl_assets WHERE crawl_id = ? GROUP BY kind', (crawl_id,))
+    summary = {'crawl_id': crawl_id, 'pages': pages, 'errors': errors, 'assets': dict(c.fetchall())}
+    conn.close()
+    return summary
 
-def view_website_data():
+def crawl_website_interactive(url):
+    """Crawl a website from the menu and show a summary"""
+    try:
+        depth = int(input(f"{Colors.YELLOW}Maximum depth [2]: {Colors.RESET}") or 2)
+        max_pages = int(input(f"{Colors.YELLOW}Maximum pages [200]: {Colors.RESET}") or 200)
+    except ValueError:
+        print_error("Depth and page budget must be numbers")
+        return
+    try:
+        summary = crawl_website(url, depth, max_pages)
+    except Exception as e:
+        print_error(f"Crawl failed: {str(e)}")
+        return
+    print_success("Crawl completed!")
+    print_info("Crawl ID", summary['crawl_id'])
+    print_info("Pages fetched", summary['pages'])
+    print_info("Errors", summary['errors'])
+    print_info("Unique scripts", summary['assets'].get('script', 0))
+    print_info("Unique forms", summary['assets'].get('form', 0))
+    print_info("Unique meta tags", summary['assets'].get('meta', 0))
+
+# ==================== ROBOTS.TXT & SITEMAPS ====================
+def fetch_robots(url):
+    """Fetch robots.txt for url's site; returns (RobotFileParser, robots.txt text or None)"""
+    robots_url = urljoin(canonicalize_url(url) or url, '/robots.txt')
+    parser = urllib.robotparser.RobotFileParser(robots_url)
+    try:
+        response = polite_get(robots_url, headers=get_random_headers(), timeout=20, verify=False)
+    except Exception:
+        parser.parse([])
+        return parser, None
+    if response.status_code == 200:
+        parser.parse(response.text.splitlines())
+        return parser, response.text
+    if response.status_code in (401, 403):
+        parser.disallow_all = True
+    else:
+        parser.allow_all = True
+    return parser, None
+
+def _iter_sitemap_chunks(response, chunk_size=65536):
+    """Decoded body chunks; gzip payloads (including concatenated members) are inflated
+    incrementally in bounded pieces"""
+    decompressor = None
+    for i, chunk in enumerate(response.iter_content(chunk_size)):
+        # Sniff rather than trust the extension: many servers also set Content-Encoding on .gz files
+        if i == 0 and chunk[:2] == b'\x1f\x8b':
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if decompressor is None:
+            yield chunk
+            continue
+        while chunk:
+            if decompressor.eof:
+                if not chunk.strip(b'\x00'):
+                    # Zero padding after the last member, as gzip itself tolerates
+                    break
+                # Each member of a multi-member file (cat a.gz b.gz) needs a fresh decompressor
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            yield decompressor.decompress(chunk, chunk_size)
+            chunk = decompressor.unconsumed_tail or decompressor.unused_data
+    if decompressor is not None:
+        # Output zlib still holds back once all input has been fed
+        yield decompressor.flush()
+
+def _stream_sitemap(url):
+    """Yield ('url'|'sitemap', loc) from one sitemap document, plain or gzip, in constant memory"""
+    response = polite_get(url, headers=get_random_headers(), timeout=30, verify=False, stream=True)
+    try:
+        if response.status_code != 200:
+            raise ValueError(f"HTTP {response.status_code}")
+        parser = ET.XMLPullParser(events=('start', 'end'))
+        root = None
+        for chunk in itertools.chain(_iter_sitemap_chunks(response), [None]):
+            if chunk is None:
+                parser.close()
+            else:
+                parser.feed(chunk)
+            for event, elem in parser.read_events():
+                if event == 'start':
+                    if root is None:
+                        root = elem
+                    continue
+                tag = elem.tag.rsplit('}', 1)[-1]
+                if tag in ('url', 'sitemap'):
+                    loc = elem.find('{*}loc')
+                    if loc is not None and loc.text:
+                        yield tag, loc.text.strip()
+                    elem.clear()
+                    root.clear()
+    finally:
+        response.close()
+
+def iter_sitemap_urls(sitemap_urls, concurrency=4, max_depth=5, buffer_size=1000):
+    """Generator over page URLs from sitemaps, following nested sitemap indexes concurrently.
+    Only a bounded buffer of URLs is held in memory at any time."""
+    out = queue.Queue(maxsize=buffer_size)
+    stop = threading.Event()
+    lock = threading.Lock()
+    seen = set()
+    state = {'pending': 0}
+    finished = object()
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=concurrency)
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                out.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def submit(sitemap_url, depth):
+        with lock:
+            if sitemap_url in seen or stop.is_set():
+                return
+            seen.add(sitemap_url)
+            state['pending'] += 1
+        executor.submit(parse, sitemap_url, depth)
+
+    def parse(sitemap_url, depth):
+        try:
+            for kind, loc in _stream_sitemap(sitemap_url):
+                if kind == 'sitemap':
+                    if depth < max_depth:
+                        submit(loc, depth + 1)
+                elif not put(loc):
+                    return
+        except Exception as e:
+            print_warning(f"Sitemap {sitemap_url} failed: {str(e)}")
+        finally:
+            with lock:
+                state['pending'] -= 1
+                last = state['pending'] == 0
+            if last:
+                put(finished)
+
+    for sitemap_url in sitemap_urls:
+        submit(sitemap_url, 0)
+    if not seen:
+        executor.shutdown()
+        return
+    try:
+        while True:
+            item = out.get()
+            if item is finished:
+                break
+            yield item
+    finally:
+        stop.set()
+        executor.shutdown(wait=False)
+
+def discover_site_urls(url, robots=None, concurrency=4):
+    """Generator over the in-scope URLs a site advertises in its sitemaps
+    (from robots.txt Sitemap: lines, falling back to /sitemap.xml)"""
+    if robots is None:
+        robots = fetch_robots(url)[0]
+    base = canonicalize_url(url) or url
+    sitemaps = robots.site_maps() or [urljoin(base, '/sitemap.xml')]
+    scope = urlparse(base).hostname
+    for loc in iter_sitemap_urls(sitemaps, concurrency):
+        page_url = canonicalize_url(loc)
+        if page_url and urlparse(page_url).hostname == scope:
+            yield page_url
+
+def analyze_robots_and_sitemaps(url, sample=10):
+    """Fetch robots.txt, stream every sitemap and store a summary in robots_data"""
+    robots, robots_text = fetch_robots(url)
+    rules = []
+    for line in (robots_text or '').splitlines():
+        line = line.split('#', 1)[0].strip()
+        if line.lower().startswith(('user-agent:', 'disallow:', 'allow:', 'crawl-delay:')):
+            rules.append(line)
+    sitemaps = robots.site_maps() or []
+    samples = []
+    count = 0
+    for page_url in discover_site_urls(url, robots):
+        count += 1
+        if len(samples) < sample:
+            samples.append(page_url)
     conn = setup_database()
     c = conn.cursor()
-    c.execute("SELECT * FROM website_data ORDER BY extracted_at DESC")
-    rows = c.fetchall()
+    c.execute('''INSERT INTO robots_data (url, robots_txt, sitemaps, crawl_delay, sitemap_urls)
+                 VALUES (?, ?, ?, ?, ?)''',
+              (url, robots_text, json.dumps(sitemaps), robots.crawl_delay('*'), count))
+    conn.commit()
     conn.close()
-    
-    if not rows:
-        print_warning("No website data found in database")
+    return {'rules': rules, 'sitemaps': sitemaps, 'crawl_delay': robots.crawl_delay('*'),
+            'url_count': count, 'samples': samples, 'found': robots_text is not None}
+
+def robots_sitemap_interactive(url):
+    loading_animation("Analyzing robots.txt and sitemaps", 2)
+    try:
+        result = analyze_robots_and_sitemaps(url)
+    except Exception as e:
+        print_error(f"Robots/sitemap analysis failed: {str(e)}")
         return
+    print_success("Robots.txt and sitemap analysis completed!")
+    print_info("robots.txt", "Found" if result['found'] else "Not found")
+    print_info("Rules", f"{len(result['rules'])} directives")
+    for rule in result['rules'][:10]:
+        print_bullet(rule)
+    if len(result['rules']) > 10:
+        print_info("And more", f"{len(result['rules']) - 10} additional directives...")
+    print_info("Crawl delay", result['crawl_delay'] or "Not set")
+    print_info("Sitemaps", ", ".join(result['sitemaps']) or "None declared (tried /sitemap.xml)")
+    print_info("Sitemap URLs", f"{result['url_count']} discovered")
+    for sample_url in result['samples']:
+        print_bullet(sample_url)
+
+# ==================== BLOB STORE ====================
+# None keeps the blob store in omar_blobs/ beside the database (see blob_root)
+BLOB_STORE_PATH = None
+BLOB_DIR_NAME = 'omar_blobs'
+BLOB_PREFIX = 'blob:'
+BLOB_MIN_SIZE = 256
+BLOB_MISSING = "[missing blob {}]"
+BLOB_RAW, BLOB_ZLIB, BLOB_ZSTD = b'\x00', b'\x01', b'\x02'
+# website_data columns whose large values are kept in the blob store and referenced by hash
+BLOB_COLUMNS = ('whois_data', 'dns_records', 'ssl_info', 'headers', 'cookies', 'meta_tags',
+                'scripts', 'forms', 'links', 'cms')
+
+def blob_root(conn=None):
+    """--blob-store if given, else omar_blobs/ beside the database file conn (a connection
+    or cursor) is open on, or DATABASE_PATH. Nodes sharing a database on shared storage
+    therefore also share its blobs."""
+    if BLOB_STORE_PATH:
+        return BLOB_STORE_PATH
+    path = DATABASE_PATH
+    if conn is not None:
+        conn = getattr(conn, 'connection', conn)
+        for _, name, filename in conn.execute('PRAGMA database_list'):
+            if name == 'main' and filename:
+                path = filename
+    return os.path.join(os.path.dirname(os.path.abspath(path)), BLOB_DIR_NAME)
+
+class BlobStore:
+    """Compressed content-addressed files keyed by SHA-256, sharded as root/ab/abcdef...
+    Each file starts with a codec byte; zstd is used when installed, zlib otherwise."""
+
+    def __init__(self, root=None):
+        self.root = root or blob_root()
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[:2], digest)
+
+    def exists(self, digest):
+        return os.path.exists(self.path(digest))
+
+    def put(self, data, digest=None):
+        digest = digest or hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if not os.path.exists(path):
+            if ZSTD_SUPPORT:
+                packed = BLOB_ZSTD + zstandard.ZstdCompressor(level=3).compress(data)
+            else:
+                packed = BLOB_ZLIB + zlib.compress(data, 6)
+            if len(packed) > len(data):
+                packed = BLOB_RAW + data
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so concurrent writers of the same blob never expose a partial file
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, 'wb') as f:
+                f.write(packed)
+            os.replace(tmp, path)
+        return digest
+
+    def get(self, digest):
+        with open(self.path(digest), 'rb') as f:
+            packed = f.read()
+        codec, body = packed[:1], packed[1:]
+        if codec == BLOB_ZLIB:
+            return zlib.decompress(body)
+        if codec == BLOB_ZSTD:
+            if not ZSTD_SUPPORT:
+                raise RuntimeError(f"Blob {digest} is zstd-compressed; install zstandard to read it")
+            return zstandard.ZstdDecompressor().decompress(body)
+        if codec == BLOB_RAW:
+            return body
+        # Uncompressed blobs written before the codec byte existed
+        return packed
+
+    def remove(self, digest):
+        try:
+            os.remove(self.path(digest))
+        except FileNotFoundError:
+            pass
+
+def add_blob_ref(c, blobs, data):
+    """Store data (bytes) once and count one more reference to it; returns the digest"""
+    digest = hashlib.sha256(data).hexdigest()
+    # Take the reference before writing the file so a concurrent collect_blobs() can't drop it
+    c.execute('''INSERT INTO blobs (sha256, size, refs, created_at) VALUES (?, ?, 1, ?)
+                 ON CONFLICT (sha256) DO UPDATE SET refs = refs + 1''', (digest, len(data), time.time()))
+    blobs.put(data, digest)
+    return digest
+
+def release_blob_ref(c, digest):
+    c.execute('UPDATE blobs SET refs = refs - 1 WHERE sha256 = ?', (digest,))
+
+def pack_website_data(c, data, blobs=None):
+    """Copy of a website_data row with large artefacts replaced by blob references"""
+    blobs = blobs or BlobStore(blob_root(c))
+    row = dict(data)
+    for column in BLOB_COLUMNS:
+        value = row.get(column)
+        if isinstance(value, str) and len(value) >= BLOB_MIN_SIZE and not value.startswith(BLOB_PREFIX):
+            row[column] = BLOB_PREFIX + add_blob_ref(c, blobs, value.encode('utf-8'))
+    return row
+
+def load_blob_value(value, blobs=None):
+    """Resolve a website_data value that may be a blob reference. A blob missing from
+    this node's store (e.g. written to another machine's disk) reads as BLOB_MISSING."""
+    if isinstance(value, str) and value.startswith(BLOB_PREFIX):
+        digest = value[len(BLOB_PREFIX):]
+        try:
+            return (blobs or BlobStore()).get(digest).decode('utf-8')
+        except FileNotFoundError:
+            return BLOB_MISSING.format(digest)
+    return value
+
+def delete_website_data(conn, website_id):
+    """Delete a saved website scan and release the blobs it references"""
+    c = conn.cursor()
+    c.execute(f"SELECT {', '.join(BLOB_COLUMNS)} FROM website_data WHERE id = ?", (website_id,))
+    row = c.fetchone()
+    if row is None:
+        return False
+    for value in row:
+        if isinstance(value, str) and value.startswith(BLOB_PREFIX):
+            release_blob_ref(c, value[len(BLOB_PREFIX):])
+    c.execute('DELETE FROM website_data WHERE id = ?', (website_id,))
+    c.execute('DELETE FROM website_ip_scans WHERE website_id = ?', (website_id,))
+    c.execute('DELETE FROM scan_spans WHERE website_id = ?', (website_id,))
+    c.execute('DELETE FROM memory_usage WHERE website_id = ?', (website_id,))
+    conn.commit()
+    return True
+
+def migrate_website_blobs(conn, blobs=None, batch_size=500):
+    """Move inline artefacts of existing website_data rows into the blob store"""
+    blobs = blobs or BlobStore(blob_root(conn))
+    c = conn.cursor()
+    columns = ', '.join(BLOB_COLUMNS)
+    last_id = 0
+    moved = 0
+    while True:
+        c.execute(f'SELECT id, {columns} FROM website_data WHERE id > ? ORDER BY id LIMIT ?',
+                  (last_id, batch_size))
+        rows = c.fetchall()
+        if not rows:
+            return moved
+        for row in rows:
+            last_id = row[0]
+            original = dict(zip(BLOB_COLUMNS, row[1:]))
+            packed = pack_website_data(c, original, blobs)
+            changed = [column for column in BLOB_COLUMNS if packed[column] != original[column]]
+            if changed:
+                c.execute(f"UPDATE website_data SET {', '.join(f'{col} = ?' for col in changed)} WHERE id = ?",
+                          [packed[col] for col in changed] + [row[0]])
+                moved += len(changed)
+        conn.commit()
+
+def collect_blobs(conn, blobs=None, grace=3600):
+    """Delete unreferenced blobs; files with no blobs row (e.g. from an interrupted write)
+    are removed once older than grace seconds. Returns (removed, bytes_freed)."""
+    blobs = blobs or BlobStore(blob_root(conn))
+    removed = 0
+    freed = 0
+    c = conn.cursor()
+    # Hold the write lock while deleting so no writer can take a reference to a dying blob
+    conn.commit()
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None
+    try:
+        c.execute('BEGIN IMMEDIATE')
+        try:
+            c.execute('SELECT sha256 FROM blobs WHERE refs <= 0')
+            for (digest,) in c.fetchall():
+                try:
+                    freed += os.path.getsize(blobs.path(digest))
+                except OSError:
+                    pass
+                blobs.remove(digest)
+                c.execute('DELETE FROM blobs WHERE sha256 = ?', (digest,))
+                removed += 1
+            c.execute('COMMIT')
+        except Exception:
+            c.execute('ROLLBACK')
+            raise
+    finally:
+        conn.isolation_level = isolation_level
     
-    print_header("SAVED WEBSITE DATA")
-    for row in rows:
-        print_info("ID", row[0])
-        print_info("URL", row[1])
-        print_info("Title", row[2] or "Not available")
-        print_info("IP Address", row[3] or "Not available")
-        print_info("Server", row[4] or "Not available")
-        
-        if row[5]:
+    cutoff = time.time() - grace
+    if not os.path.isdir(blobs.root):
+        return removed, freed
+    for shard in os.listdir(blobs.root):
+        shard_path = os.path.join(blobs.root, shard)
+        if not os.path.isdir(shard_path):
+            continue
+        for name in os.listdir(shard_path):
+            path = os.path.join(shard_path, name)
             try:
-                tech_list = json.loads(row[5])
-                print_info("Technologies", ", ".join(tech_list))
-            except:
-                print_info("Technologies", "Available (view details)")
-        else:
-            print_info("Technologies", "Not available")
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if stat.st_mtime > cutoff:
+                continue
+            c.execute('SELECT 1 FROM blobs WHERE sha256 = ?', (name,))
+            if c.fetchone() is None:
+                os.remove(path)
+                removed += 1
+                freed += stat.st_size
+        if not os.listdir(shard_path):
+            os.rmdir(shard_path)
+    return removed, freed
+
+def compact_database(path=None, blobs=None):
+    """Move inline artefacts to the blob store, collect garbage and VACUUM the database"""
+    path = path or DATABASE_PATH
+    before = os.path.getsize(path)
+    conn = setup_database(path)
+    try:
+        moved = migrate_website_blobs(conn, blobs)
+        removed, freed = collect_blobs(conn, blobs)
+        conn.isolation_level = None
+        conn.execute('VACUUM')
+    finally:
+        conn.close()
+    return {'moved': moved, 'blobs_removed': removed, 'blob_bytes_freed': freed,
+            'db_bytes_before': before, 'db_bytes_after': os.path.getsize(path)}
+
+def print_compaction_stats(stats):
+    print_info("Artefacts moved to blobs", stats['moved'])
+    print_info("Blobs removed", f"{stats['blobs_removed']} ({stats['blob_bytes_freed']} bytes)")
+    print_info("Database size", f"{stats['db_bytes_before']} -> {stats['db_bytes_after']} bytes")
+
+# ==================== SCRIPT ASSETS ====================
+SCRIPT_MAX_BYTES = 5 * 1024 * 1024
+SCRIPT_URL_TTL = 24 * 3600
+
+# (name, pattern) pairs matched against script bodies; group 1, when present, is the version
+SCRIPT_LIBRARIES = [
+    ('jQuery', re.compile(rb'jQuery (?:JavaScript Library )?v(\d+\.\d+\.\d+)')),
+    ('jQuery UI', re.compile(rb'jQuery UI - v(\d+\.\d+\.\d+)')),
+    ('jQuery Migrate', re.compile(rb'jQuery Migrate (?:- )?v(\d+\.\d+\.\d+)')),
+    ('Bootstrap', re.compile(rb'Bootstrap v(\d+\.\d+\.\d+)')),
+    ('AngularJS', re.compile(rb'AngularJS v(\d+\.\d+\.\d+)')),
+    ('Vue.js', re.compile(rb'Vue\.js v(\d+\.\d+\.\d+)')),
+    ('React', re.compile(rb'React(?:DOM)? v(\d+\.\d+\.\d+)')),
+    ('Lodash', re.compile(rb'Lodash <https://lodash\.com/>[\s\S]{0,200000}?VERSION\s*=\s*["\'](\d+\.\d+\.\d+)')),
+    ('Underscore.js', re.compile(rb'Underscore\.js (\d+\.\d+\.\d+)')),
+    ('Moment.js', re.compile(rb'//! moment\.js\s*//! version : (\d+\.\d+\.\d+)')),
+    ('Modernizr', re.compile(rb'Modernizr v?(\d+\.\d+\.\d+)')),
+    ('Popper.js', re.compile(rb'@popperjs/core v(\d+\.\d+\.\d+)')),
+    ('Google Analytics', re.compile(rb'google-analytics\.com/(?:analytics|ga)\.js')),
+    ('Google Tag Manager', re.compile(rb'googletagmanager\.com/gtm\.js'))
+]
+
+def detect_script_libraries(content):
+    """Library names (with versions when the banner has one) found in a script body"""
+    libraries = []
+    for name, pattern in SCRIPT_LIBRARIES:
+        match = pattern.search(content)
+        if match:
+            libraries.append(f"{name} {match.group(1).decode()}" if pattern.groups else name)
+    return libraries
+
+def fetch_script(url):
+    """Download one script, refusing bodies over SCRIPT_MAX_BYTES"""
+    response = polite_get(url, headers=get_random_headers(), timeout=time_left(20), verify=False, stream=True)
+    try:
+        if response.status_code != 200:
+            raise ValueError(f"HTTP {response.status_code}")
+        body = bytearray()
+        for chunk in response.iter_content(65536):
+            body += chunk
+            if len(body) > SCRIPT_MAX_BYTES:
+                raise ValueError("script exceeds size limit")
+        return bytes(body)
+    finally:
+        response.close()
+
+def script_libraries(c, blobs, digest):
+    """Library detection for one stored script body, run only the first time its hash is seen"""
+    c.execute('SELECT libraries FROM script_assets WHERE sha256 = ?', (digest,))
+    row = c.fetchone()
+    record_cache_lookup('script_assets', row is not None)
+    if row:
+        return json.loads(row[0])
+    content = blobs.get(digest)
+    libraries = detect_script_libraries(content)
+    c.execute('''INSERT OR IGNORE INTO script_assets (sha256, size, libraries, analyzed_at)
+                 VALUES (?, ?, ?, ?)''', (digest, len(content), json.dumps(libraries), time.time()))
+    if c.rowcount:
+        # script_assets holds the one reference that keeps the body out of collect_blobs()
+        add_blob_ref(c, blobs, content)
+    return libraries
+
+def analyze_scripts(page_url, sources, concurrency=8, blobs=None, max_age=SCRIPT_URL_TTL):
+    """Fetch the scripts a page references concurrently and detect libraries once per
+    distinct body. Returns [{'url', 'sha256', 'libraries', 'error'}]."""
+    blobs = blobs or BlobStore()
+    urls = []
+    for src in sources:
+        script_url = canonicalize_url(src, page_url)
+        if script_url and script_url not in urls:
+            urls.append(script_url)
+    
+    conn = setup_database()
+    c = conn.cursor()
+    try:
+        # URLs fetched recently are answered from script_urls without touching the network
+        digests = {}
+        errors = {}
+        stale = []
+        now = time.time()
+        for script_url in urls:
+            c.execute('SELECT sha256, fetched_at FROM script_urls WHERE url = ?', (script_url,))
+            row = c.fetchone()
+            fresh = row is not None and now - row[1] < max_age
+            record_cache_lookup('script_urls', fresh)
+            if fresh:
+                digests[script_url] = row[0]
+            else:
+                stale.append(script_url)
         
-        if row[15]:
+        def fetch(script_url):
             try:
-                vulns = json.loads(row[15])
-                print_info("Vulnerabilities", f"{len(vulns)} detected")
-            except:
-                print_info("Vulnerabilities", "Available (view details)")
-        else:
-            print_info("Vulnerabilities", "Not available")
+                return blobs.put(fetch_script(script_url)), None
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                return None, str(e)
         
-        print_info("Extracted At", row[21])
-        print("-" * 80)
+        if stale:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+                for script_url, (digest, error) in zip(stale, executor.map(bind_deadline(fetch), stale)):
+                    if digest is None:
+                        errors[script_url] = error
+                        continue
+                    digests[script_url] = digest
+                    c.execute('''INSERT OR REPLACE INTO script_urls (url, sha256, fetched_at)
+                                 VALUES (?, ?, ?)''', (script_url, digest, time.time()))
+        
+        results = []
+        analyzed = {}
+        for script_url in urls:
+            digest = digests.get(script_url)
+            if digest is not None and digest not in analyzed:
+                analyzed[digest] = script_libraries(c, blobs, digest)
+            results.append({
+                'url': script_url,
+                'sha256': digest,
+                'libraries': analyzed.get(digest, []),
+                'error': errors.get(script_url)
+            })
+        conn.commit()
+        return results
+    finally:
+        conn.close()
 
 # ==================== ADVANCED PASSWORD MODULE ====================
 def password_module():
@@ -1966,6 +6015,606 @@ def view_password_patterns():
         print_info("Generated At", row[4])
         print("-" * 80)
 
+# ==================== SCAN DAEMON ====================
+def enqueue_scan_job(conn, target, phases=None):
+    """Add a website scan job to the durable queue and return its id"""
+    if not target.startswith(('http://', 'https://')):
+        target = 'https://' + target
+    phases = resolve_phases(phases)
+    now = time.time()
+    c = conn.cursor()
+    c.execute('''INSERT INTO scan_jobs (target, phases, status, attempts, created_at, updated_at)
+                 VALUES (?, ?, 'queued', 0, ?, ?)''',
+              (target, json.dumps(phases), now, now))
+    conn.commit()
+    return c.lastrowid
+
+def lease_scan_job(conn, worker, lease_seconds=60, max_attempts=3):
+    """Atomically lease the oldest runnable job; expired leases (dead workers) are re-queued"""
+    now = time.time()
+    c = conn.cursor()
+    c.execute('BEGIN IMMEDIATE')
+    try:
+        c.execute('''UPDATE scan_jobs SET status = 'failed', error = 'lease expired', updated_at = ?
+                     WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?''',
+                  (now, now, max_attempts))
+        c.execute('''SELECT id, target, phases, attempts FROM scan_jobs
+                     WHERE status = 'queued' OR (status = 'leased' AND lease_expires < ?)
+                     ORDER BY id LIMIT 1''', (now,))
+        row = c.fetchone()
+        if row:
+            c.execute('''UPDATE scan_jobs SET status = 'leased', worker = ?, lease_expires = ?,
+                         attempts = attempts + 1, updated_at = ? WHERE id = ?''',
+                      (worker, now + lease_seconds, now, row[0]))
+        c.execute('COMMIT')
+    except Exception:
+        c.execute('ROLLBACK')
+        raise
+    if not row:
+        return None
+    return {'id': row[0], 'target': row[1], 'phases': json.loads(row[2]), 'attempts': row[3] + 1}
+
+def heartbeat_scan_job(conn, job_id, worker, lease_seconds=60):
+    """Extend a lease; returns False if the job is no longer owned by worker"""
+    now = time.time()
+    c = conn.cursor()
+    c.execute('''UPDATE scan_jobs SET lease_expires = ?, updated_at = ?
+                 WHERE status = 'leased' AND id = ? AND worker = ?''',
+              (now + lease_seconds, now, job_id, worker))
+    conn.commit()
+    return c.rowcount == 1
+
+def complete_scan_job(conn, job_id, worker, website_id):
+    conn.execute('''UPDATE scan_jobs SET status = 'done', website_id = ?, lease_expires = NULL,
+                    error = NULL, updated_at = ? WHERE id = ? AND worker = ?''',
+                 (website_id, time.time(), job_id, worker))
+    conn.commit()
+
+def fail_scan_job(conn, job_id, worker, error, attempts, max_attempts=3):
+    status = 'failed' if attempts >= max_attempts else 'queued'
+    conn.execute('''UPDATE scan_jobs SET status = ?, error = ?, lease_expires = NULL, updated_at = ?
+                    WHERE id = ? AND worker = ?''', (status, error, time.time(), job_id, worker))
+    conn.commit()
+
+SCAN_JOB_COLUMNS = ('id', 'target', 'phases', 'status', 'worker', 'lease_expires', 'attempts',
+                    'website_id', 'error', 'created_at', 'updated_at')
+
+def _scan_job_row(row):
+    job = dict(zip(SCAN_JOB_COLUMNS, row))
+    job['phases'] = json.loads(job['phases'])
+    return job
+
+def get_scan_job(conn, job_id):
+    c = conn.cursor()
+    c.execute(f"SELECT {', '.join(SCAN_JOB_COLUMNS)} FROM scan_jobs WHERE id = ?", (job_id,))
+    row = c.fetchone()
+    return _scan_job_row(row) if row else None
+
+def list_scan_jobs(conn, status=None, limit=100):
+    c = conn.cursor()
+    query = f"SELECT {', '.join(SCAN_JOB_COLUMNS)} FROM scan_jobs"
+    params = []
+    if status:
+        query += " WHERE status = ?"
+        params.append(status)
+    query += " ORDER BY id DESC LIMIT ?"
+    params.append(limit)
+    c.execute(query, params)
+    return [_scan_job_row(row) for row in c.fetchall()]
+
+def print_scan_job(job):
+    print_info("Job", f"{job['id']} [{job['status']}] {job['target']}")
+    print_info("Phases", ", ".join(job['phases']))
+    if job['worker']:
+        print_info("Worker", job['worker'])
+    if job['website_id']:
+        print_info("Website ID", job['website_id'])
+    if job['error']:
+        print_info("Error", job['error'])
+    print_line("-" * 80)
+
+def view_scan_jobs(limit=1000):
+    conn = setup_database()
+    jobs = list_scan_jobs(conn, limit=limit)
+    conn.close()
+    if not jobs:
+        print_warning("No scan jobs found in database")
+        return
+    print_header("SCAN JOBS")
+    with RENDERER.batch():
+        for job in jobs:
+            RENDERER.emit('job', job, print_scan_job)
+
+def scan_job_counts(conn):
+    c = conn.cursor()
+    c.execute("SELECT status, COUNT(*) FROM scan_jobs GROUP BY status")
+    return dict(c.fetchall())
+
+class SQLiteScanBackend:
+    """Job queue and result store on a SQLite file (local or on shared storage)"""
+
+    def __init__(self, path=None):
+        self.conn = setup_database(path)
+        self.conn.isolation_level = None
+
+    def enqueue(self, target, phases=None):
+        return enqueue_scan_job(self.conn, target, phases)
+
+    def lease(self, worker, lease_seconds, max_attempts=3):
+        return lease_scan_job(self.conn, worker, lease_seconds, max_attempts)
+
+    def heartbeat(self, job_id, worker, lease_seconds):
+        return heartbeat_scan_job(self.conn, job_id, worker, lease_seconds)
+
+    def complete(self, job_id, worker, website_id):
+        complete_scan_job(self.conn, job_id, worker, website_id)
+
+    def fail(self, job_id, worker, error, attempts, max_attempts=3):
+        fail_scan_job(self.conn, job_id, worker, error, attempts, max_attempts)
+
+    def status(self):
+        return scan_job_counts(self.conn)
+
+    def save_website(self, data):
+        return insert_website_data(self.conn, data)
+
+    def save_scan_metadata(self, website_id, url, spans, memory_report):
+        insert_scan_metadata(self.conn, website_id, url, spans, memory_report)
+
+    def close(self):
+        self.conn.close()
+
+class RemoteScanBackend:
+    """Client for a TCP coordinator speaking newline-delimited JSON; every request
+    carries the coordinator's shared-secret token"""
+
+    def __init__(self, host, port, token, timeout=60):
+        self.token = token
+        self.sock = connect_dual_stack(host, port, timeout=timeout)
+        self.stream = self.sock.makefile('rwb')
+
+    def _call(self, op, **params):
+        params['op'] = op
+        params['token'] = self.token
+        self.stream.write(json.dumps(params, default=str).encode() + b"\n")
+        self.stream.flush()
+        line = self.stream.readline()
+        if not line:
+            raise ConnectionError("Coordinator closed the connection")
+        reply = json.loads(line)
+        if not reply.get('ok'):
+            raise RuntimeError(f"Coordinator error: {reply.get('error')}")
+        return reply.get('result')
+
+    def enqueue(self, target, phases=None):
+        return self._call('enqueue', target=target, phases=phases)
+
+    def lease(self, worker, lease_seconds, max_attempts=3):
+        return self._call('lease', worker=worker, lease_seconds=lease_seconds, max_attempts=max_attempts)
+
+    def heartbeat(self, job_id, worker, lease_seconds):
+        return self._call('heartbeat', job_id=job_id, worker=worker, lease_seconds=lease_seconds)
+
+    def complete(self, job_id, worker, website_id):
+        self._call('complete', job_id=job_id, worker=worker, website_id=website_id)
+
+    def fail(self, job_id, worker, error, attempts, max_attempts=3):
+        self._call('fail', job_id=job_id, worker=worker, error=error, attempts=attempts,
+                   max_attempts=max_attempts)
+
+    def status(self):
+        return self._call('status')
+
+    def save_website(self, data):
+        return self._call('save_website', data=data)
+
+    def save_scan_metadata(self, website_id, url, spans, memory_report):
+        self._call('save_scan_metadata', website_id=website_id, url=url, spans=spans,
+                   memory_report=memory_report)
+
+    def close(self):
+        try:
+            self.stream.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+def backend_factory(coordinator=None, token=None):
+    """Return a callable creating scan backends for sqlite:///path, tcp://host:port or a plain
+    path; token is the shared secret a tcp:// coordinator requires"""
+    if coordinator and coordinator.startswith('tcp://'):
+        if not token:
+            raise ValueError("a tcp:// coordinator needs --coordinator-token (or OMAR_COORDINATOR_TOKEN)")
+        parsed = urlparse(coordinator)
+        return lambda: RemoteScanBackend(parsed.hostname, parsed.port, token)
+    path = None
+    if coordinator:
+        path = coordinator[len('sqlite:///'):] if coordinator.startswith('sqlite:///') else coordinator
+    return lambda: SQLiteScanBackend(path)
+
+class CoordinatorHandler(socketserver.StreamRequestHandler):
+    """One coordinator connection: newline-delimited JSON requests against the local queue.
+    A request without the server's token is refused and the connection closed."""
+
+    def handle(self):
+        backend = SQLiteScanBackend()
+        try:
+            for line in self.rfile:
+                try:
+                    request = json.loads(line)
+                    token = request.pop('token', None) if isinstance(request, dict) else None
+                    if not isinstance(token, str) or not hmac.compare_digest(token.encode(), self.server.token.encode()):
+                        self.wfile.write(json.dumps({'ok': False, 'error': "invalid token"}).encode() + b"\n")
+                        return
+                    op = request.pop('op')
+                    if op not in ('enqueue', 'lease', 'heartbeat', 'complete', 'fail', 'status',
+                                  'save_website', 'save_scan_metadata'):
+                        raise ValueError(f"unknown op {op}")
+                    reply = {'ok': True, 'result': getattr(backend, op)(**request)}
+                except Exception as e:
+                    reply = {'ok': False, 'error': str(e)}
+                self.wfile.write(json.dumps(reply, default=str).encode() + b"\n")
+                self.wfile.flush()
+        finally:
+            backend.close()
+
+class CoordinatorServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, handler, token):
+        self.token = token
+        super().__init__(address, handler)
+
+def run_coordinator(args):
+    """Serve the scan queue and result store to remote workers over TCP"""
+    if not args.coordinator_token:
+        print_error("--coordinator-serve needs a shared secret: pass --coordinator-token or set OMAR_COORDINATOR_TOKEN")
+        return 2
+    conn = setup_database()
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.close()
+    server = CoordinatorServer((args.coordinator_host, args.coordinator_serve), CoordinatorHandler,
+                               args.coordinator_token)
+    print_success(f"Coordinator listening on tcp://{args.coordinator_host}:{args.coordinator_serve}")
+    print_info("Database", DATABASE_PATH)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print_warning("Stopping coordinator")
+    finally:
+        server.server_close()
+
+class ScanDaemon:
+    """Worker pool that leases jobs from a coordinator (local or shared SQLite, or TCP),
+    heartbeats its leases and stores results through the same backend"""
+
+    def __init__(self, workers=4, lease_seconds=60, poll_interval=2, max_attempts=3, coordinator=None,
+                 token=None):
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backend_factory = backend_factory(coordinator, token)
+        self.stop_event = threading.Event()
+        self.threads = []
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, args=(f"{self.name}:{i}",), daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join()
+
+    def _worker(self, worker):
+        """Lease and run jobs until stopped. A coordinator error (dropped connection,
+        locked database) closes the backend and backs off before reconnecting; a job it
+        interrupted is picked up again once its lease expires."""
+        backend = None
+        failures = 0
+        while not self.stop_event.is_set():
+            try:
+                if backend is None:
+                    backend = self.backend_factory()
+                job = backend.lease(worker, self.lease_seconds, self.max_attempts)
+                if job:
+                    self.run_job(backend, worker, job)
+                failures = 0
+            except Exception as e:
+                failures += 1
+                delay = min(60, self.poll_interval * 2 ** (failures - 1))
+                print_warning(f"Worker {worker}: coordinator error, reconnecting in {delay:.0f}s: {str(e)}")
+                if backend is not None:
+                    try:
+                        backend.close()
+                    except Exception:
+                        pass
+                backend = None
+                self.stop_event.wait(delay)
+                continue
+            if not job:
+                self.stop_event.wait(self.poll_interval)
+        if backend is not None:
+            backend.close()
+
+    def _heartbeat(self, worker, job, done):
+        backend = self.backend_factory()
+        try:
+            while not done.wait(self.lease_seconds / 3):
+                if not backend.heartbeat(job['id'], worker, self.lease_seconds):
+                    print_warning(f"Lost lease on job {job['id']}")
+                    break
+        except Exception as e:
+            print_warning(f"Heartbeat for job {job['id']} failed: {str(e)}")
+        finally:
+            backend.close()
+
+    def run_job(self, backend, worker, job):
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(worker, job, done), daemon=True)
+        heartbeat.start()
+        try:
+            try:
+                website_id = scan_website(job['target'], job['phases'], store=backend)[0]
+            except Exception as e:
+                backend.fail(job['id'], worker, str(e), job['attempts'], self.max_attempts)
+                print_error(f"Job {job['id']} failed: {job['target']} ({str(e)})")
+                return
+            # A backend error here is not the scan's fault: leave the job leased and let
+            # the caller reconnect rather than recording it as a failed attempt
+            backend.complete(job['id'], worker, website_id)
+            print_success(f"Job {job['id']} completed: {job['target']}")
+        finally:
+            done.set()
+            heartbeat.join()
+
+def _collect_queue_depths(registry):
+    conn = setup_database()
+    try:
+        for status, count in scan_job_counts(conn).items():
+            registry.set('omar_queue_jobs', count, status=status)
+    finally:
+        conn.close()
+
+class ScanAPIHandler(http.server.BaseHTTPRequestHandler):
+    """Local JSON API: POST /jobs, GET /jobs, GET /jobs/<id>, GET /status"""
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, default=str).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if urlparse(self.path).path != '/jobs':
+            self._send_json(404, {'error': 'not found'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(request, dict):
+                raise TypeError
+            targets = request.get('targets') or [request['target']]
+            if not isinstance(targets, list) or not all(isinstance(t, str) and t.strip() for t in targets):
+                raise TypeError
+        except (ValueError, KeyError, TypeError):
+            self._send_json(400, {'error': 'expected {"target": ...} or {"targets": [...]}'})
+            return
+        phases = request.get('phases')
+        if phases is not None and (not isinstance(phases, list) or not all(isinstance(p, str) for p in phases)):
+            self._send_json(400, {'error': 'phases must be a list of phase names'})
+            return
+        try:
+            # Check the phases before queueing anything, so a bad request queues no jobs
+            resolve_phases(phases)
+        except ValueError as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        conn = setup_database()
+        try:
+            ids = [enqueue_scan_job(conn, target.strip(), phases) for target in targets]
+        finally:
+            conn.close()
+        self._send_json(201, {'ids': ids})
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+        try:
+            limit = int(query.get('limit', ['100'])[0])
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            self._send_json(400, {'error': 'limit must be a positive integer'})
+            return
+        conn = setup_database()
+        try:
+            if parsed.path == '/status':
+                self._send_json(200, {'jobs': scan_job_counts(conn)})
+            elif parsed.path == '/jobs':
+                status = query.get('status', [None])[0]
+                self._send_json(200, {'jobs': list_scan_jobs(conn, status, limit)})
+            elif parsed.path.startswith('/jobs/'):
+                job = get_scan_job(conn, parsed.path.rsplit('/', 1)[-1])
+                if job:
+                    self._send_json(200, job)
+                else:
+                    self._send_json(404, {'error': 'job not found'})
+            else:
+                self._send_json(404, {'error': 'not found'})
+        finally:
+            conn.close()
+
+    def address_string(self):
+        return str(self.client_address[0]) if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        pass
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+def start_api_server(port=None, unix_socket=None):
+    """Serve the job API on 127.0.0.1:port and/or a Unix socket"""
+    servers = []
+    if port:
+        servers.append(http.server.ThreadingHTTPServer(('127.0.0.1', port), ScanAPIHandler))
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.unlink(unix_socket)
+        servers.append(UnixHTTPServer(unix_socket, ScanAPIHandler))
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    return servers
+
+def run_worker(args):
+    """Worker node: lease jobs from --coordinator until interrupted"""
+    workers = memory_workers(args.workers)
+    try:
+        daemon = ScanDaemon(workers=workers, lease_seconds=args.lease_seconds, coordinator=args.coordinator,
+                            token=args.coordinator_token)
+    except ValueError as e:
+        print_error(str(e))
+        return 2
+    daemon.start()
+    print_success(f"Worker {daemon.name} running with {workers} threads against {args.coordinator or DATABASE_PATH}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print_warning("Stopping worker, waiting for running jobs...")
+        daemon.stop()
+
+def run_daemon(args):
+    """Long-running service mode: job API plus a pool of scan workers"""
+    METRICS.register('omar_queue_jobs', 'gauge', "Scan jobs in the queue by status")
+    METRICS.add_collector(_collect_queue_depths)
+    conn = setup_database()
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.close()
+    workers = memory_workers(args.workers)
+    daemon = ScanDaemon(workers=workers, lease_seconds=args.lease_seconds)
+    servers = start_api_server(args.api_port, args.api_socket)
+    daemon.start()
+    print_success(f"Daemon running with {workers} workers")
+    if args.api_port:
+        print_info("API", f"http://127.0.0.1:{args.api_port}/jobs")
+    if args.api_socket:
+        print_info("API socket", args.api_socket)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print_warning("Stopping daemon, waiting for running jobs...")
+        for server in servers:
+            server.shutdown()
+        daemon.stop()
+
+def run_geoip_compile(args):
+    columns = args.geoip_columns.split(',') if args.geoip_columns else None
+    count = compile_geoip(args.geoip_compile[0], args.geoip_compile[1], columns)
+    print_success(f"Compiled {count} ranges into {args.geoip_compile[1]}")
+    return 0
+
+def run_geoip_annotate(args):
+    ips = args.geoip_lookup or read_targets(args.geoip_annotate)
+    with RENDERER.batch():
+        for ip, geo in GEOIP.annotate(ips):
+            RENDERER.emit('geoip', {'ip': ip, 'geoip': geo}, print_geoip_annotation)
+    return 0
+
+def run_index_wordlist(args):
+    for path in args.index_wordlist:
+        wordlist = Wordlist(path)
+        print_success(f"{path}: {wordlist.count} distinct entries indexed in {wordlist.index_path}")
+        wordlist.close()
+    return 0
+
+def run_maintenance(args):
+    """--delete-website and --compact-db"""
+    if args.delete_website:
+        conn = setup_database()
+        for website_id in args.delete_website:
+            if delete_website_data(conn, website_id):
+                print_success(f"Deleted website scan {website_id}")
+            else:
+                print_warning(f"No website scan with ID {website_id}")
+        conn.close()
+    if args.compact_db:
+        RENDERER.emit('compaction', compact_database(), print_compaction_stats)
+    return 0
+
+def run_enqueue(args, phases):
+    try:
+        backend = backend_factory(args.coordinator, args.coordinator_token)()
+    except ValueError as e:
+        print_error(str(e))
+        return 2
+    for target in target_expander(args).expand(args.enqueue):
+        job_id = backend.enqueue(target, phases)
+        RENDERER.emit('job', {'id': job_id, 'target': target},
+                      lambda job: print_success(f"Queued job {job['id']}: {job['target']}"))
+    backend.close()
+    return 0
+
+def run_sitemap(args):
+    for page_url in discover_site_urls(args.sitemap):
+        RENDERER.emit('url', {'url': page_url}, lambda record: print_line(record['url']))
+    return 0
+
+def run_crawl(args):
+    seeds = discover_site_urls(args.crawl) if args.crawl_sitemaps else None
+    summary = crawl_website(args.crawl, args.crawl_depth, args.crawl_pages, args.crawl_concurrency,
+                            seeds=seeds, respect_robots=not args.ignore_robots)
+    RENDERER.emit('crawl', summary, lambda summary: print_success(
+        f"Crawl {summary['crawl_id']} fetched {summary['pages']} pages ({summary['errors']} errors)"))
+    return 0
+
+def run_scan(args, phases):
+    ok = scan_websites(args.scan, phases, expander=target_expander(args), budget=args.target_budget)
+    return 0 if ok else 1
+
+def run_batch(args, phases):
+    """--batch and --resume; returns the process exit status"""
+    try:
+        if args.resume:
+            run = load_batch_run(args.resume)
+        else:
+            run = create_batch_run(args.batch, phases, target_options(args))
+    except ValueError as e:
+        print_error(str(e))
+        return 2
+    if run.source == '-' and args.resume:
+        print_warning("This run read its targets from stdin; pipe the same input again")
+    print_info("Batch run", run.id)
+    try:
+        ok = scan_websites(read_targets(run.source), run.phases, args.batch_workers, args.cpu_workers,
+                           run, target_expander(args, run.options, ordered=True), args.queue_size,
+                           args.target_budget)
+    except KeyboardInterrupt:
+        print_warning(f"Batch run {run.id} interrupted; continue it with --resume {run.id}")
+        return 130
+    except (OSError, ValueError) as e:
+        print_error(f"Batch run {run.id} stopped: {str(e)}")
+        return 1
+    finally:
+        run.close()
+    return 0 if ok else 1
+
+def run_ptr_sweep_command(args):
+    specs = itertools.chain.from_iterable(
+        read_targets(spec[1:]) if spec.startswith('@') else [spec] for spec in args.ptr_sweep)
+    run_ptr_sweep(target_expander(args).addresses(specs), args.ptr_concurrency,
+                  args.ptr_timeout, args.nameserver)
+    return 0
+
 # ==================== MAIN MENU ====================
 def main_menu():
     conn = setup_database()  # Initialize database
@@ -2004,10 +6653,229 @@ def main_menu():
             print_error("Invalid option")
             input(f"\n{Colors.YELLOW}Press Enter to continue...{Colors.RESET}")
 
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Omar-tool Professional v5.0 - Ultimate OSINT & Penetration Tool")
+    parser.add_argument('--profile', action='store_true',
+                        help="profile the whole run with cProfile and write pstats and Chrome trace output")
+    parser.add_argument('--profile-output', default='omar_profile',
+                        help="file prefix for --profile output (default: omar_profile)")
+    parser.add_argument('--memory', action='store_true',
+                        help="record per-phase tracemalloc peak/retained memory for every website scan")
+    parser.add_argument('--memory-budget', type=float, default=256, metavar='MB',
+                        help="flag targets whose peak phase memory exceeds this budget (default: 256)")
+    parser.add_argument('--memory-top', type=int, default=10, metavar='N',
+                        help="number of top allocation sites reported per target (default: 10)")
+    parser.add_argument('--metrics-port', type=int, metavar='PORT',
+                        help="serve Prometheus metrics on http://127.0.0.1:PORT/metrics")
+    parser.add_argument('--metrics-json', metavar='FILE',
+                        help="append periodic JSON metrics snapshots to FILE")
+    parser.add_argument('--metrics-interval', type=float, default=30, metavar='SECONDS',
+                        help="interval between JSON metrics snapshots (default: 30)")
+    parser.add_argument('--crawl', metavar='URL',
+                        help="crawl in-scope links of URL and exit")
+    parser.add_argument('--crawl-depth', type=int, default=2,
+                        help="maximum link depth for --crawl (default: 2)")
+    parser.add_argument('--crawl-pages', type=int, default=200,
+                        help="page budget for --crawl (default: 200)")
+    parser.add_argument('--crawl-concurrency', type=int, default=8,
+                        help="simultaneous page fetches for --crawl (default: 8)")
+    parser.add_argument('--crawl-sitemaps', action='store_true',
+                        help="also seed --crawl with the URLs advertised in the site's sitemaps")
+    parser.add_argument('--ignore-robots', action='store_true',
+                        help="do not apply robots.txt rules to --crawl")
+    parser.add_argument('--sitemap', metavar='URL',
+                        help="stream the URLs from URL's robots.txt sitemaps to stdout and exit")
+    parser.add_argument('--host-rate', type=float, default=2.0,
+                        help="requests per second allowed per target host (default: 2)")
+    parser.add_argument('--host-burst', type=int, default=4,
+                        help="burst size of the per-host token bucket (default: 4)")
+    parser.add_argument('--ip-rate', type=float, default=5.0,
+                        help="requests per second allowed per target IP address (default: 5)")
+    parser.add_argument('--max-concurrency', type=int, default=32,
+                        help="global limit on simultaneous outbound requests (default: 32)")
+    parser.add_argument('--daemon', action='store_true',
+                        help="run as a long-lived service: job API plus a scan worker pool")
+    parser.add_argument('--workers', type=int, default=4,
+                        help="number of scan workers in daemon mode (default: 4)")
+    parser.add_argument('--lease-seconds', type=int, default=60,
+                        help="lease length; workers heartbeat every third of it and jobs of dead workers are re-queued after it (default: 60)")
+    parser.add_argument('--api-port', type=int, default=8710,
+                        help="local HTTP port for the daemon job API, 0 to disable (default: 8710)")
+    parser.add_argument('--api-socket', metavar='PATH',
+                        help="also serve the daemon job API on a Unix socket")
+    parser.add_argument('--worker', action='store_true',
+                        help="run as a worker node pulling jobs from --coordinator")
+    parser.add_argument('--coordinator', metavar='URL',
+                        help="job coordinator: tcp://host:port or sqlite:///path/on/shared/storage.db")
+    parser.add_argument('--coordinator-serve', type=int, metavar='PORT',
+                        help="serve the local queue and result store to remote workers on TCP PORT")
+    parser.add_argument('--coordinator-host', default='127.0.0.1',
+                        help="address for --coordinator-serve to bind (default: 127.0.0.1)")
+    parser.add_argument('--coordinator-token', default=os.environ.get('OMAR_COORDINATOR_TOKEN'), metavar='SECRET',
+                        help="shared secret required by --coordinator-serve and sent by tcp:// workers "
+                             "(default: $OMAR_COORDINATOR_TOKEN)")
+    parser.add_argument('--database', default=DATABASE_PATH, metavar='PATH',
+                        help=f"SQLite database file (default: {DATABASE_PATH})")
+    parser.add_argument('--blob-store', default=BLOB_STORE_PATH, metavar='DIR',
+                        help=f"directory for compressed scan artefacts (default: {BLOB_DIR_NAME} beside the database)")
+    parser.add_argument('--compact-db', action='store_true',
+                        help="move inline artefacts to the blob store, collect unused blobs and VACUUM")
+    parser.add_argument('--delete-website', nargs='+', type=int, metavar='ID',
+                        help="delete saved website scans and release their blobs")
+    parser.add_argument('--geoip-db', action='append', metavar='PATH',
+                        help=f"compiled GeoIP/ASN index to annotate addresses with; repeatable (default: {GEOIP_DEFAULT_PATH} if present)")
+    parser.add_argument('--geoip-compile', nargs=2, metavar=('CSV', 'INDEX'),
+                        help="compile a CIDR or start,end range CSV into a GeoIP index and exit")
+    parser.add_argument('--geoip-columns', metavar='NAMES',
+                        help="comma-separated names for the CSV's non-range columns (default: header row)")
+    parser.add_argument('--geoip-lookup', nargs='+', metavar='IP',
+                        help="print GeoIP/ASN fields for addresses and exit")
+    parser.add_argument('--geoip-annotate', metavar='FILE',
+                        help="print GeoIP/ASN fields for every address in FILE ('-' for stdin) and exit")
+    parser.add_argument('--subdomain-wordlist', metavar='PATH',
+                        help="subdomain prefixes for the subdomains phase, one per line (default: a short built-in list)")
+    parser.add_argument('--path-wordlist', metavar='PATH',
+                        help="paths for the paths phase to request, one per line")
+    parser.add_argument('--wordlist-shard', metavar='I/N',
+                        help="use only the I-th of N equal slices of each wordlist, e.g. one per worker host")
+    parser.add_argument('--index-wordlist', nargs='+', metavar='PATH',
+                        help="build or refresh the offset and dedup index of wordlists and exit")
+    parser.add_argument('--enqueue', nargs='+', metavar='URL',
+                        help="add website scan jobs to the queue and exit")
+    parser.add_argument('--phases', metavar='NAMES',
+                        help="comma-separated phases and profiles for --enqueue, --scan and --batch; "
+                             "the phases they depend on are added (see --list-phases)")
+    parser.add_argument('--scan-profile', choices=tuple(PHASE_PROFILES), default=DEFAULT_SCAN_PROFILE,
+                        help=f"phase profile when --phases is not given (default: {DEFAULT_SCAN_PROFILE})")
+    parser.add_argument('--plugin', action='append', metavar='MODULE',
+                        help="import a phase plugin (module name or .py path); repeatable, also read from OMAR_PLUGINS")
+    parser.add_argument('--list-phases', action='store_true',
+                        help="list registered scan phases with their cost and dependencies and exit")
+    parser.add_argument('--scan', nargs='+', metavar='TARGET',
+                        help="scan URLs, hosts, addresses, CIDRs, ranges (10.0.0.1-10.0.0.50) or the pages of "
+                             "sitemap:URL without the menu and print the results")
+    parser.add_argument('--batch', metavar='FILE',
+                        help="scan every target listed in FILE ('-' for stdin) and print the results")
+    parser.add_argument('--exclude', action='append', metavar='TARGET',
+                        help="host, address, CIDR or range to leave out of --scan, --batch, --enqueue and --ptr-sweep; repeatable")
+    parser.add_argument('--exclude-file', metavar='FILE',
+                        help="file of targets to exclude, one per line")
+    parser.add_argument('--shuffle', action='store_true',
+                        help="visit the addresses of each CIDR or range in random order")
+    parser.add_argument('--shuffle-seed', type=int, metavar='N',
+                        help="seed for --shuffle, to repeat an order")
+    parser.add_argument('--target-scheme', choices=('https', 'http'), default='https',
+                        help="scheme for targets given without one (default: https)")
+    parser.add_argument('--resume', type=int, metavar='RUN_ID',
+                        help="continue an interrupted --batch run, skipping the targets it finished")
+    parser.add_argument('--batch-workers', type=int, default=16, metavar='N',
+                        help="targets fetched and scanned concurrently by --batch (default: 16)")
+    parser.add_argument('--target-budget', type=float, default=DEFAULT_TARGET_BUDGET, metavar='SECONDS',
+                        help=f"time each --scan/--batch target may take before its remaining phases are "
+                             f"skipped and it is saved as partial, 0 for no limit (default: {DEFAULT_TARGET_BUDGET})")
+    parser.add_argument('--queue-size', type=int, default=PIPELINE_QUEUE_SIZE, metavar='N',
+                        help=f"targets queued in front of each --batch pipeline stage (default: {PIPELINE_QUEUE_SIZE})")
+    parser.add_argument('--cpu-workers', type=int, default=os.cpu_count() or 1, metavar='N',
+                        help="processes parsing pages for --batch, 0 to parse in-process (default: CPU count)")
+    parser.add_argument('--ptr-sweep', nargs='+', metavar='RANGE',
+                        help="reverse-resolve every address in the given addresses, CIDRs or ranges ('@FILE' reads a list) and exit")
+    parser.add_argument('--ptr-concurrency', type=int, default=256, metavar='N',
+                        help="maximum PTR queries in flight for --ptr-sweep (default: 256)")
+    parser.add_argument('--ptr-timeout', type=float, default=2.0, metavar='SECONDS',
+                        help="time allowed per PTR lookup, retries included (default: 2)")
+    parser.add_argument('--nameserver', action='append', metavar='IP',
+                        help="resolver for --ptr-sweep instead of the system ones; repeatable")
+    parser.add_argument('--view', choices=('website', 'jobs', 'runs'),
+                        help="print saved website scans, queued jobs or batch runs and exit")
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument('--json', action='store_true',
+                        help="print results as one JSON array (warnings and errors go to stderr)")
+    output.add_argument('--jsonl', action='store_true',
+                        help="print results as one JSON object per line")
+    output.add_argument('--quiet', action='store_true',
+                        help="print only warnings and errors")
+    return parser.parse_args()
+
 if __name__ == "__main__":
+    args = parse_arguments()
+    if args.json or args.jsonl:
+        RENDERER = JSONRenderer(lines=args.jsonl)
+    elif args.quiet:
+        RENDERER = QuietRenderer()
+    if args.memory:
+        MEMORY.enable(args.memory_budget, args.memory_top)
+    enable_dns_cache()
+    SCHEDULER.configure(host_rate=args.host_rate, host_burst=args.host_burst,
+                        ip_rate=args.ip_rate, max_concurrency=args.max_concurrency)
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+    if args.metrics_json:
+        start_metrics_snapshots(args.metrics_json, args.metrics_interval)
+    DATABASE_PATH = args.database
+    BLOB_STORE_PATH = args.blob_store
+    try:
+        load_plugins((args.plugin or []) + [spec for spec in os.environ.get('OMAR_PLUGINS', '').split(os.pathsep) if spec])
+    except Exception as e:
+        print_error(f"Could not load plugin: {str(e)}")
+        sys.exit(2)
+    if args.list_phases:
+        list_phases()
+        sys.exit(0)
     try:
-        main_menu()
+        phases = resolve_phases(args.phases.split(',') if args.phases else [args.scan_profile])
+    except ValueError as e:
+        print_error(str(e))
+        sys.exit(2)
+    GEOIP.load(args.geoip_db or ([GEOIP_DEFAULT_PATH] if os.path.exists(GEOIP_DEFAULT_PATH) else []))
+    try:
+        WORDLISTS.configure(args.subdomain_wordlist, args.path_wordlist,
+                            parse_shard(args.wordlist_shard) if args.wordlist_shard else None)
+        for kind in WORDLISTS.paths:
+            WORDLISTS.get(kind)
+    except (OSError, ValueError) as e:
+        print_error(str(e))
+        sys.exit(2)
+    # Every mode runs through one entry point so --profile covers all of them
+    if args.geoip_compile:
+        entry = lambda: run_geoip_compile(args)
+    elif args.geoip_lookup or args.geoip_annotate:
+        entry = lambda: run_geoip_annotate(args)
+    elif args.index_wordlist:
+        entry = lambda: run_index_wordlist(args)
+    elif args.delete_website or args.compact_db:
+        entry = lambda: run_maintenance(args)
+    elif args.enqueue:
+        entry = lambda: run_enqueue(args, phases)
+    elif args.sitemap:
+        entry = lambda: run_sitemap(args)
+    elif args.crawl:
+        entry = lambda: run_crawl(args)
+    elif args.scan:
+        entry = lambda: run_scan(args, phases)
+    elif args.batch or args.resume:
+        entry = lambda: run_batch(args, phases)
+    elif args.ptr_sweep:
+        entry = lambda: run_ptr_sweep_command(args)
+    elif args.view:
+        entry = {'website': view_website_data, 'jobs': view_scan_jobs, 'runs': view_batch_runs}[args.view]
+    elif args.coordinator_serve:
+        entry = lambda: run_coordinator(args)
+    elif args.worker:
+        entry = lambda: run_worker(args)
+    elif args.daemon:
+        entry = lambda: run_daemon(args)
+    else:
+        entry = main_menu
+    status = None
+    try:
+        if args.profile:
+            status = run_profiled(entry, args.profile_output)
+        else:
+            status = entry()
     except KeyboardInterrupt:
         print(f"\n{Colors.RED}Tool terminated by user{Colors.RESET}")
+        status = 130
     except Exception as e:
-        print_error(f"Unexpected error: {e}")
\ No newline at end of file
+        print_error(f"Unexpected error: {e}")
+        status = 1
+    sys.exit(status)
@@ -0,0 +1,21 @@
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import omar
+
+# Keep warnings out of pytest's captured stdout, which is closed before atexit runs
+omar.RENDERER = omar.TTYRenderer(io.StringIO())
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """A fresh database in a temporary directory; the blob store defaults to sit beside it"""
+    monkeypatch.setattr(omar, 'DATABASE_PATH', str(tmp_path / 'osint_data.db'))
+    monkeypatch.setattr(omar, 'BLOB_STORE_PATH', None)
+    omar.setup_database().close()
+    return tmp_path
@@ -0,0 +1,85 @@
+import json
+import pickle
+
+import pytest
+
+import omar
+
+
+def full_result():
+    return omar.ScanResult(
+        'https://example.invalid', title="Example", ip_address='192.0.2.1',
+        technologies=['nginx'], whois_data="Could not retrieve WHOIS data",
+        dns_records=[omar.DNSRecord('A', '192.0.2.1'), omar.DNSRecord('MX', '10 mail.example.invalid')],
+        headers=[omar.Header('Server', 'nginx')], cookies={'sid': '1'},
+        forms=[omar.Form('/login', 'POST', [omar.FormInput('user', 'text', '')])],
+        links=[omar.Link('Home', '/')], ports=[omar.PortResult(443, 'HTTPS')],
+        ip_scans=[omar.IPScan('192.0.2.1', 'ports', '', ['443/tcp - HTTPS'], 1.5)],
+        incomplete_phases=[])
+
+
+def start_run(urls):
+    run = omar.create_batch_run('targets.txt', ['whois', 'dns_records'], {})
+    assert list(run.pending(urls)) == list(enumerate(urls))
+    return run
+
+
+def test_scan_result_round_trips_through_row():
+    result = full_result()
+    restored = omar.ScanResult.from_row(result.to_row())
+    assert restored == result
+    assert restored.to_row() == result.to_row()
+
+
+def test_checkpoint_is_json_and_resumes_after_done_phases(database):
+    run = start_run(['https://example.invalid'])
+    checkpoint = omar.BatchTarget(run.id, 0)
+    checkpoint.phase_done('whois', full_result())
+    checkpoint.close()
+
+    stored, = run.conn.execute('SELECT checkpoint FROM batch_progress WHERE run_id = ?', (run.id,)).fetchone()
+    assert json.loads(stored)['url'] == 'https://example.invalid'
+
+    resumed = omar.BatchTarget(run.id, 0)
+    target = omar.TargetScan('https://example.invalid')
+    omar.begin_target_scan(target, run.phases, resumed, checkpoint=resumed)
+    omar.abort_target_scan(target)
+    resumed.close()
+    run.close()
+    assert target.scan.result == full_result()
+    assert 'whois' in target.skip and 'dns_records' not in target.skip
+
+
+def test_pickled_checkpoint_is_never_loaded(database, monkeypatch):
+    run = start_run(['https://example.invalid'])
+    run.conn.execute("UPDATE batch_progress SET phases_done = '[\"whois\"]', checkpoint = ? WHERE run_id = ?",
+                     (pickle.dumps(full_result()), run.id))
+    monkeypatch.setattr(pickle, 'loads', None)
+    checkpoint = omar.BatchTarget(run.id, 0)
+    checkpoint.close()
+    run.close()
+    assert checkpoint.result is None and checkpoint.phases_done == []
+
+
+def test_finished_targets_are_skipped_on_resume(database):
+    run = start_run(['https://a.invalid', 'https://b.invalid'])
+    run.conn.execute("UPDATE batch_progress SET status = 'done' WHERE run_id = ? AND seq = 0", (run.id,))
+    run.close()
+    resumed = omar.load_batch_run(run.id)
+    try:
+        assert list(resumed.pending(['https://a.invalid', 'https://b.invalid'])) == [(1, 'https://b.invalid')]
+    finally:
+        resumed.close()
+
+
+def test_run_marked_failed_when_pipeline_raises(database, monkeypatch):
+    def broken(self, specs):
+        raise RuntimeError("pipeline broke")
+
+    monkeypatch.setattr(omar.ScanPipeline, 'execute', broken)
+    run = start_run([])
+    with pytest.raises(RuntimeError):
+        omar.scan_websites([], run.phases, run=run)
+    status, = run.conn.execute('SELECT status FROM batch_runs WHERE id = ?', (run.id,)).fetchone()
+    run.close()
+    assert status == 'failed'
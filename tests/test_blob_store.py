@@ -0,0 +1,71 @@
+import os
+
+import omar
+
+
+def save_scan(conn, headers):
+    result = omar.ScanResult('https://example.invalid', headers=[omar.Header('x-big', headers)])
+    return omar.insert_website_data(conn, result.to_row())
+
+
+def blob_refs(conn):
+    return dict(conn.execute('SELECT sha256, refs FROM blobs'))
+
+
+def test_blob_store_defaults_to_database_directory(database, tmp_path, monkeypatch):
+    shared = tmp_path / 'shared'
+    shared.mkdir()
+    conn = omar.setup_database(str(shared / 'queue.db'))
+    try:
+        assert omar.blob_root(conn) == str(shared / omar.BLOB_DIR_NAME)
+        assert omar.blob_root(conn.cursor()) == str(shared / omar.BLOB_DIR_NAME)
+    finally:
+        conn.close()
+    assert omar.blob_root() == str(database / omar.BLOB_DIR_NAME)
+    monkeypatch.setattr(omar, 'BLOB_STORE_PATH', '/data/blobs')
+    assert omar.blob_root() == '/data/blobs'
+
+
+def test_shared_blob_counted_once_and_collected_after_last_delete(database):
+    conn = omar.setup_database()
+    try:
+        first = save_scan(conn, 'a' * 4096)
+        second = save_scan(conn, 'a' * 4096)
+        (digest, refs), = blob_refs(conn).items()
+        assert refs == 2
+        store = omar.BlobStore(omar.blob_root(conn))
+        assert store.exists(digest)
+
+        omar.delete_website_data(conn, first)
+        assert omar.collect_blobs(conn, grace=0) == (0, 0)
+        assert store.exists(digest)
+
+        omar.delete_website_data(conn, second)
+        removed, freed = omar.collect_blobs(conn, grace=0)
+        assert removed == 1 and freed > 0
+        assert not store.exists(digest)
+        assert blob_refs(conn) == {}
+    finally:
+        conn.close()
+
+
+def test_blob_round_trip_compresses(tmp_path):
+    store = omar.BlobStore(str(tmp_path))
+    data = b'jQuery v3.7.1 ' * 1000
+    digest = store.put(data)
+    assert store.get(digest) == data
+    assert os.path.getsize(store.path(digest)) < len(data)
+
+
+def test_missing_blob_reads_as_marker(database):
+    conn = omar.setup_database()
+    try:
+        website_id = save_scan(conn, 'b' * 4096)
+        conn.row_factory = None
+        (value,) = conn.execute('SELECT headers FROM website_data WHERE id = ?', (website_id,)).fetchone()
+    finally:
+        conn.close()
+    digest = value[len(omar.BLOB_PREFIX):]
+    os.remove(omar.BlobStore().path(digest))
+    assert omar.load_blob_value(value) == omar.BLOB_MISSING.format(digest)
+    assert omar.website_record({'headers': value})['headers'] == omar.BLOB_MISSING.format(digest)
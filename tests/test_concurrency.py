@@ -0,0 +1,82 @@
+import threading
+import time
+
+import pytest
+
+import omar
+
+
+def test_limiter_halves_on_errors_and_grows_when_healthy():
+    limiter = omar.AdaptiveLimiter('test', initial=16, minimum=2, maximum=20)
+    limiter.acquire()
+    limiter.release(0.01, error=True)
+    assert int(limiter.limit) == 8
+    for _ in range(200):
+        limiter.acquire()
+        limiter.release(0.01)
+    assert limiter.limit == 20
+    assert limiter.in_flight == 0
+
+
+def test_limiter_backs_off_on_rtt_inflation():
+    limiter = omar.AdaptiveLimiter('test', initial=16)
+    limiter.acquire()
+    limiter.release(0.01)
+    time.sleep(0.11)
+    limiter.acquire()
+    limiter.release(1.0)
+    assert limiter.limit < 16
+
+
+def test_run_adaptive_bounds_in_flight_work():
+    limiter = omar.AdaptiveLimiter('test', initial=4, maximum=4)
+    lock = threading.Lock()
+    state = {'running': 0, 'peak': 0}
+
+    def work(item):
+        with lock:
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+        time.sleep(0.01)
+        with lock:
+            state['running'] -= 1
+        return item * 2, False
+
+    results = dict(omar.run_adaptive(limiter, work, range(40)))
+    assert results == {item: item * 2 for item in range(40)}
+    assert state['peak'] <= 4
+    assert limiter.in_flight == 0
+
+
+def test_run_adaptive_counts_exceptions_as_errors():
+    limiter = omar.AdaptiveLimiter('test', initial=8)
+
+    def work(item):
+        if item == 3:
+            raise ValueError("boom")
+        return item, False
+
+    results = dict(omar.run_adaptive(limiter, work, range(6)))
+    assert results[3] is None and results[5] == 5
+    assert limiter.in_flight == 0
+    assert True in limiter.outcomes
+
+
+def test_run_adaptive_reraises_deadline_exceeded():
+    limiter = omar.AdaptiveLimiter('test', initial=8)
+
+    def work(item):
+        if item == 2:
+            raise omar.DeadlineExceeded()
+        return item, False
+
+    with pytest.raises(omar.DeadlineExceeded):
+        list(omar.run_adaptive(limiter, work, range(5)))
+    assert limiter.in_flight == 0
+
+
+def test_token_bucket_allows_burst_then_paces():
+    bucket = omar.TokenBucket(rate=10, capacity=3)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.02)
+    assert bucket.reserve() == pytest.approx(0.2, abs=0.02)
@@ -0,0 +1,60 @@
+import json
+import socket
+import threading
+
+import pytest
+
+import omar
+
+
+@pytest.fixture
+def coordinator(database):
+    server = omar.CoordinatorServer(('127.0.0.1', 0), omar.CoordinatorHandler, 's3cret')
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server.server_address
+    server.shutdown()
+    server.server_close()
+
+
+def queued_jobs():
+    conn = omar.setup_database()
+    try:
+        return omar.list_scan_jobs(conn)
+    finally:
+        conn.close()
+
+
+def test_coordinator_accepts_requests_with_token(coordinator):
+    backend = omar.RemoteScanBackend(*coordinator, token='s3cret')
+    try:
+        job_id = backend.enqueue('https://example.invalid', ['fetch'])
+        assert backend.status() == {'queued': 1}
+    finally:
+        backend.close()
+    assert [job['id'] for job in queued_jobs()] == [job_id]
+
+
+def test_coordinator_rejects_wrong_token(coordinator):
+    backend = omar.RemoteScanBackend(*coordinator, token='guess')
+    try:
+        with pytest.raises(RuntimeError, match="invalid token"):
+            backend.enqueue('https://example.invalid')
+    finally:
+        backend.close()
+    assert queued_jobs() == []
+
+
+def test_coordinator_rejects_request_without_token(coordinator):
+    with socket.create_connection(coordinator, timeout=5) as sock:
+        stream = sock.makefile('rwb')
+        stream.write(json.dumps({'op': 'enqueue', 'target': 'https://example.invalid'}).encode() + b"\n")
+        stream.flush()
+        assert json.loads(stream.readline()) == {'ok': False, 'error': "invalid token"}
+        # The connection is closed after a refused request
+        assert stream.readline() == b''
+    assert queued_jobs() == []
+
+
+def test_tcp_coordinator_requires_token():
+    with pytest.raises(ValueError):
+        omar.backend_factory('tcp://127.0.0.1:8720')
@@ -0,0 +1,57 @@
+import time
+
+import pytest
+
+import omar
+
+
+def run_phases(phases, budget):
+    target = omar.TargetScan('https://example.invalid')
+    omar.begin_target_scan(target, phases, store=None, budget=budget)
+    try:
+        omar.run_target_phases(target)
+    finally:
+        omar.abort_target_scan(target)
+    return target.scan.result
+
+
+def raise_deadline(*args, **kwargs):
+    raise omar.DeadlineExceeded()
+
+
+def test_phase_cut_short_ahead_of_deadline_is_incomplete(monkeypatch):
+    # A wait that gives up early (it could not finish in time) raises before the deadline passes
+    monkeypatch.setattr(omar.whois, 'whois', raise_deadline)
+    monkeypatch.setattr(omar.dns.resolver, 'resolve', raise_deadline)
+    result = run_phases(['whois', 'dns_records'], budget=60)
+    assert result.incomplete_phases == ['whois', 'dns_records']
+    assert result.whois_data is None
+
+
+def test_phase_running_past_budget_is_incomplete(monkeypatch):
+    monkeypatch.setattr(omar.whois, 'whois', lambda domain: time.sleep(2))
+    start = time.monotonic()
+    result = run_phases(['whois', 'dns_records'], budget=0.2)
+    assert time.monotonic() - start < 1.5
+    # whois was abandoned at the deadline; dns_records never started
+    assert result.incomplete_phases == ['whois', 'dns_records']
+
+
+def test_retry_backoff_past_deadline_raises_deadline_exceeded(monkeypatch):
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        raise ConnectionError("reset")
+
+    monkeypatch.setattr(omar.random, 'uniform', lambda low, high: high)
+    with omar.deadline_scope(time.monotonic() + 0.05), pytest.raises(omar.DeadlineExceeded):
+        omar.with_retries(flaky, base_delay=10, max_delay=10)
+    assert len(calls) == 1
+
+
+def test_deadline_cut_off_is_not_a_dead_host():
+    try:
+        raise omar.DeadlineExceeded() from TimeoutError("timed out")
+    except omar.DeadlineExceeded as e:
+        assert not omar.is_host_down_error(e)
@@ -0,0 +1,58 @@
+import http.server
+import socket
+import threading
+
+import pytest
+import urllib3
+
+import omar
+
+V6 = (socket.AF_INET6, ('2001:db8::1', 80, 0, 0))
+V4 = (socket.AF_INET, ('192.0.2.1', 80))
+
+
+@pytest.fixture
+def http_server():
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Length', '2')
+            self.end_headers()
+            self.wfile.write(b'ok')
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+def test_urllib3_is_not_patched_globally():
+    assert urllib3.util.connection.create_connection.__module__ == 'urllib3.util.connection'
+
+
+def test_request_reports_answering_address(http_server):
+    response = omar.dual_stack_request('GET', http_server, timeout=5)
+    assert response.content == b'ok'
+    assert (response.peer_address, response.address_family) == ('127.0.0.1', 'IPv4')
+
+
+def test_families_alternate_ipv6_first():
+    v4b = (socket.AF_INET, ('192.0.2.2', 80))
+    assert omar.interleave_families([V4, v4b, V6, V4]) == [V6, V4, v4b]
+
+
+def test_dns_phase_prefers_the_address_fetch_connected_to(monkeypatch):
+    monkeypatch.setattr(omar, 'resolve_dual_stack', lambda host, port=None: [V6, V4])
+    scan = omar.ScanContext('http://example.invalid/', omar.ScanResult('http://example.invalid/'))
+    omar.dns_phase(scan)
+    assert scan.result.ip_addresses == ['2001:db8::1', '192.0.2.1']
+    assert scan.result.ip_address == '2001:db8::1'
+
+    scan = omar.ScanContext('http://example.invalid/', omar.ScanResult('http://example.invalid/'),
+                            peer_address='192.0.2.1')
+    omar.dns_phase(scan)
+    assert scan.result.ip_address == '192.0.2.1'
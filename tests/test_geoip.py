@@ -0,0 +1,60 @@
+import pytest
+
+import omar
+
+CITY_CSV = """network,country,city
+10.0.0.0/8,ZZ,Private
+192.0.2.0/24,AU,Example
+2001:db8::/32,NL,Documentation
+"""
+ASN_CSV = """# start,end,asn
+3221225984,3221226239,AS64500
+198.51.100.0,198.51.100.255,AS64501
+"""
+
+
+def compile_index(tmp_path, name, text, columns=None):
+    source = tmp_path / f"{name}.csv"
+    source.write_text(text)
+    out = tmp_path / f"{name}.idx"
+    count = omar.compile_geoip(str(source), str(out), columns)
+    return str(out), count
+
+
+def test_compiled_index_finds_covering_ranges(tmp_path):
+    path, count = compile_index(tmp_path, 'city', CITY_CSV)
+    assert count == 3
+    index = omar.GeoIPIndex(path)
+    try:
+        assert index.lookup_key(omar.ip_to_key('10.20.30.40'))[0] == {'country': 'ZZ', 'city': 'Private'}
+        assert index.lookup_key(omar.ip_to_key('192.0.2.255'))[0]['country'] == 'AU'
+        assert index.lookup_key(omar.ip_to_key('2001:db8::42'))[0]['city'] == 'Documentation'
+        # Past the end of a range and before the first one
+        assert index.lookup_key(omar.ip_to_key('192.0.3.0'))[0] is None
+        assert index.lookup_key(omar.ip_to_key('1.1.1.1'))[0] is None
+    finally:
+        index.close()
+
+
+def test_annotate_merges_indexes_and_matches_single_lookups(tmp_path):
+    database = omar.GeoIPDatabase()
+    database.load([compile_index(tmp_path, 'city', CITY_CSV)[0],
+                   compile_index(tmp_path, 'asn', ASN_CSV, ['asn'])[0]])
+    try:
+        ips = ['198.51.100.7', '192.0.2.1', 'not-an-ip', '10.0.0.1', '203.0.113.9', '2001:db8::1']
+        annotated = dict(database.annotate(ips))
+        assert annotated == {ip: database.lookup(ip) for ip in ips}
+        assert annotated['192.0.2.1'] == {'country': 'AU', 'city': 'Example', 'asn': 'AS64500'}
+        assert annotated['198.51.100.7'] == {'asn': 'AS64501'}
+        assert annotated['203.0.113.9'] is None
+        assert annotated['not-an-ip'] is None
+    finally:
+        for index in database.indexes:
+            index.close()
+
+
+def test_rejects_files_that_are_not_indexes(tmp_path):
+    path = tmp_path / 'bogus.idx'
+    path.write_bytes(b'x' * 64)
+    with pytest.raises(ValueError, match='not a compiled GeoIP index'):
+        omar.GeoIPIndex(str(path))
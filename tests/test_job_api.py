@@ -0,0 +1,51 @@
+import http.client
+import http.server
+import json
+import threading
+
+import pytest
+
+import omar
+
+
+@pytest.fixture
+def api(database):
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), omar.ScanAPIHandler)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    yield server.server_address
+    server.shutdown()
+    server.server_close()
+
+
+def call(api, method, path, body=None):
+    conn = http.client.HTTPConnection(*api, timeout=5)
+    try:
+        conn.request(method, path, body=body)
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+def test_post_queues_jobs(api):
+    status, reply = call(api, 'POST', '/jobs', json.dumps({'targets': ['example.invalid'], 'phases': ['fetch']}))
+    assert status == 201 and len(reply['ids']) == 1
+    status, reply = call(api, 'GET', f"/jobs/{reply['ids'][0]}")
+    assert status == 200 and reply['target'] == 'https://example.invalid'
+
+
+@pytest.mark.parametrize('body', [
+    '[1, 2]', '"example.com"', '{}', '{"targets": "example.com"}', '{"targets": [1, 2]}',
+    '{"target": null}', '{"target": "example.com", "phases": "fetch"}',
+    '{"target": "example.com", "phases": ["nope"]}', 'not json',
+])
+def test_post_rejects_malformed_requests(api, body):
+    status, reply = call(api, 'POST', '/jobs', body)
+    assert status == 400 and 'error' in reply
+    assert call(api, 'GET', '/status') == (200, {'jobs': {}})
+
+
+@pytest.mark.parametrize('limit', ['abc', '0', '-5'])
+def test_get_rejects_bad_limit(api, limit):
+    status, reply = call(api, 'GET', f'/jobs?limit={limit}')
+    assert status == 400 and 'error' in reply
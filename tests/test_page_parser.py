@@ -0,0 +1,49 @@
+import concurrent.futures
+import multiprocessing
+
+import pytest
+
+import omar
+
+PAGE = ('<html><head><title> Example shop </title>'
+        '<script src="/wp-includes/js/jquery/jquery.min.js"></script>'
+        '<link rel="stylesheet" href="/style.css"></head>'
+        '<body><p>Café</p><a href="/about">About</a>{}</body></html>')
+HEADERS = {'Server': 'nginx', 'X-Powered-By': 'PHP/8.2'}
+
+
+@pytest.fixture(scope='module')
+def pool():
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=context)
+    yield executor
+    executor.shutdown()
+
+
+@pytest.mark.parametrize('padding', [0, 4096])
+def test_process_parser_matches_in_process_parse(pool, padding):
+    body = PAGE.format('<!-- x -->' * padding).encode('utf-8')
+    # shared_min between the two page sizes: the small page is pickled, the large one shared
+    parse = omar.process_page_parser(pool, shared_min=len(PAGE) * 2)
+    for encoding in ('utf-8', None):
+        expected = omar.parse_page(body, encoding, HEADERS)
+        assert parse(body, encoding, HEADERS) == expected
+    assert expected['title'] == 'Example shop'
+
+
+def test_shared_page_is_unlinked_after_parse(pool, monkeypatch):
+    created = []
+    real = omar.shared_memory.SharedMemory
+
+    def tracking(*args, **kwargs):
+        shm = real(*args, **kwargs)
+        created.append(shm.name)
+        return shm
+
+    monkeypatch.setattr(omar.shared_memory, 'SharedMemory', tracking)
+    omar.process_page_parser(pool, shared_min=1)(PAGE.format('').encode(), 'utf-8', HEADERS)
+    monkeypatch.undo()
+    name, = created
+    with pytest.raises(FileNotFoundError):
+        real(name=name)
@@ -0,0 +1,59 @@
+import pytest
+
+import omar
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """An empty phase registry, so tests can register phases without touching the real ones"""
+    monkeypatch.setattr(omar, 'SCAN_PHASES', {})
+    return omar.SCAN_PHASES
+
+
+def test_selection_adds_the_phases_producing_its_inputs():
+    assert omar.resolve_phases(['ssl']) == ['dns', 'ssl']
+    assert omar.resolve_phases(['scripts']) == ['fetch', 'parse', 'scripts']
+    assert omar.resolve_phases(['network']) == ['dns', 'reverse_dns', 'whois', 'dns_records', 'ssl']
+
+
+def test_profiles_close_over_dependencies_of_cheaper_phases():
+    quick = omar.resolve_phases(['quick'])
+    assert all(omar.SCAN_PHASES[name].cost == 'local' for name in quick if name != 'fetch')
+    assert quick[:2] == ['fetch', 'parse']
+    assert omar.resolve_phases() == list(omar.SCAN_PHASES)
+
+
+def test_every_resolution_is_closed_and_in_registration_order():
+    providers = omar.phase_providers()
+    order = list(omar.SCAN_PHASES)
+    for name in order + list(omar.PHASE_GROUPS) + list(omar.PHASE_PROFILES):
+        phases = omar.resolve_phases([name])
+        assert phases == sorted(phases, key=order.index)
+        for phase in phases:
+            for value in omar.SCAN_PHASES[phase].inputs:
+                assert providers[value] in phases[:phases.index(phase)]
+
+
+def test_unknown_phases_cycles_and_missing_inputs_are_errors(registry):
+    noop = lambda scan: None
+    omar.register_phase('a', inputs=('y',), outputs=('x',))(noop)
+    omar.register_phase('b', inputs=('x',), outputs=('y',))(noop)
+    omar.register_phase('c', inputs=('z',))(noop)
+    with pytest.raises(ValueError, match='Unknown phase'):
+        omar.resolve_phases(['nope'])
+    with pytest.raises(ValueError, match='cycle'):
+        omar.resolve_phases(['a'])
+    with pytest.raises(ValueError, match='no phase provides'):
+        omar.resolve_phases(['c'])
+    with pytest.raises(ValueError, match='cost must be one of'):
+        omar.register_phase('d', cost='free')
+
+
+def test_resume_reruns_providers_of_context_only_inputs():
+    phases = omar.resolve_phases(['standard', 'scripts'])
+    # scripts needs the parsed assets, which live only in the ScanContext: parse and the
+    # fetch whose response it parses run again, while dns's stored results are kept
+    assert omar.skippable_phases(phases, ['fetch', 'parse', 'dns']) == {'dns'}
+    assert omar.skippable_phases(phases, ['fetch', 'parse', 'scripts', 'dns']) == {'fetch', 'parse', 'scripts', 'dns'}
+    # Phases not in this run are never reported
+    assert omar.skippable_phases(['dns', 'ssl'], ['dns', 'fetch']) == {'dns'}
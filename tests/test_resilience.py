@@ -0,0 +1,59 @@
+import pytest
+import requests
+
+import omar
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    breaker = omar.CircuitBreaker()
+    monkeypatch.setattr(omar, 'BREAKER', breaker)
+    monkeypatch.setattr(omar.time, 'sleep', lambda seconds: None)
+    return breaker
+
+
+def counting(error):
+    calls = []
+
+    def func():
+        calls.append(1)
+        raise error
+    return func, calls
+
+
+def test_dead_host_costs_one_attempt(breaker):
+    func, calls = counting(requests.ConnectTimeout("connect timed out"))
+    with pytest.raises(omar.HostUnavailable, match="connect timed out"):
+        omar.resilient_call('dead.invalid', func)
+    assert len(calls) == 1
+    # Later calls are refused without touching the host
+    with pytest.raises(omar.HostUnavailable):
+        omar.resilient_call('dead.invalid', func)
+    assert len(calls) == 1
+
+
+def test_tls_error_does_not_open_breaker(breaker):
+    func, calls = counting(requests.exceptions.SSLError("certificate verify failed"))
+    with pytest.raises(requests.exceptions.SSLError):
+        omar.resilient_call('badcert.invalid', func)
+    assert not breaker.is_open('badcert.invalid')
+
+
+def test_transient_error_is_retried_and_success_closes(breaker):
+    outcomes = [requests.ConnectionError(ConnectionResetError(104, "Connection reset by peer")), 'ok']
+
+    def func():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert omar.resilient_call('flaky.invalid', func) == 'ok'
+    assert not breaker.is_open('flaky.invalid')
+
+
+def test_host_down_errors():
+    assert omar.is_host_down_error(ConnectionRefusedError(111, "Connection refused"))
+    assert omar.is_host_down_error(requests.ConnectionError(OSError(113, "No route to host")))
+    assert not omar.is_host_down_error(ConnectionResetError(104, "Connection reset by peer"))
+    assert not omar.is_host_down_error(OSError("disk full"))
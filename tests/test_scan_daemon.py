@@ -0,0 +1,60 @@
+import sqlite3
+import threading
+import time
+
+import omar
+
+
+class BrokenBackend:
+    """Leases jobs normally but cannot record their outcome, like a locked database"""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def lease(self, worker, lease_seconds, max_attempts):
+        with self.stats['lock']:
+            self.stats['leases'] += 1
+            job_id = self.stats['leases']
+        return {'id': job_id, 'target': 'https://example.invalid', 'phases': None, 'attempts': 1}
+
+    def heartbeat(self, job_id, worker, lease_seconds):
+        return True
+
+    def complete(self, job_id, worker, website_id):
+        raise sqlite3.OperationalError("database is locked")
+
+    def fail(self, job_id, worker, error, attempts, max_attempts):
+        raise sqlite3.OperationalError("database is locked")
+
+    def close(self):
+        with self.stats['lock']:
+            self.stats['closed'] += 1
+
+
+def run_daemon(monkeypatch, scan):
+    stats = {'leases': 0, 'closed': 0, 'lock': threading.Lock()}
+    monkeypatch.setattr(omar, 'scan_website', scan)
+    daemon = omar.ScanDaemon(workers=2, lease_seconds=60, poll_interval=0.01)
+    daemon.backend_factory = lambda: BrokenBackend(stats)
+    daemon.start()
+    time.sleep(0.5)
+    alive = sum(thread.is_alive() for thread in daemon.threads)
+    daemon.stop()
+    return alive, stats
+
+
+def test_worker_survives_backend_error_on_complete(monkeypatch):
+    alive, stats = run_daemon(monkeypatch, lambda *args, **kwargs: (1, None, [], None))
+    assert alive == 2
+    # Each error closes the backend and the worker reconnects for another lease
+    assert stats['leases'] > 2
+    assert stats['closed'] >= stats['leases'] - 2
+
+
+def test_worker_survives_backend_error_on_fail(monkeypatch):
+    def scan(*args, **kwargs):
+        raise RuntimeError("scan failed")
+
+    alive, stats = run_daemon(monkeypatch, scan)
+    assert alive == 2
+    assert stats['leases'] > 2
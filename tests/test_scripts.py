@@ -0,0 +1,54 @@
+import omar
+
+JQUERY = b'/*! jQuery v3.7.1 | (c) OpenJS Foundation */' + b' ' * 2048
+
+
+def test_identical_scripts_are_stored_and_analyzed_once(database, monkeypatch):
+    fetched = []
+    detected = []
+    monkeypatch.setattr(omar, 'fetch_script', lambda url: fetched.append(url) or JQUERY)
+    detect = omar.detect_script_libraries
+    monkeypatch.setattr(omar, 'detect_script_libraries', lambda content: detected.append(content) or detect(content))
+
+    first = omar.analyze_scripts('https://a.example/', ['/js/jquery.js', 'https://cdn.example/jq.min.js',
+                                                       '/js/jquery.js'])
+    second = omar.analyze_scripts('https://b.example/', ['https://b.example/vendor.js'])
+
+    # Repeated src on one page is fetched once; the same body under three URLs is analysed once
+    assert sorted(fetched) == ['https://a.example/js/jquery.js', 'https://b.example/vendor.js',
+                               'https://cdn.example/jq.min.js']
+    assert len(detected) == 1
+    digests = {script['sha256'] for script in first + second}
+    assert len(digests) == 1
+    assert all(script['libraries'] == ['jQuery 3.7.1'] for script in first + second)
+
+    conn = omar.setup_database()
+    try:
+        digest, = digests
+        assert conn.execute('SELECT refs FROM blobs WHERE sha256 = ?', (digest,)).fetchone()[0] == 1
+        assert conn.execute('SELECT COUNT(*) FROM script_assets').fetchone()[0] == 1
+    finally:
+        conn.close()
+
+
+def test_recently_fetched_urls_skip_the_network(database, monkeypatch):
+    fetched = []
+    monkeypatch.setattr(omar, 'fetch_script', lambda url: fetched.append(url) or JQUERY)
+    omar.analyze_scripts('https://a.example/', ['/app.js'])
+    again = omar.analyze_scripts('https://a.example/', ['/app.js'])
+    assert fetched == ['https://a.example/app.js']
+    assert again[0]['libraries'] == ['jQuery 3.7.1']
+
+    omar.analyze_scripts('https://a.example/', ['/app.js'], max_age=0)
+    assert len(fetched) == 2
+
+
+def test_fetch_errors_are_reported_per_script(database, monkeypatch):
+    def fetch_script(url):
+        if url.endswith('/missing.js'):
+            raise ValueError("HTTP 404")
+        return JQUERY
+    monkeypatch.setattr(omar, 'fetch_script', fetch_script)
+    results = omar.analyze_scripts('https://a.example/', ['/missing.js', '/ok.js'])
+    assert results[0] == {'url': 'https://a.example/missing.js', 'sha256': None, 'libraries': [], 'error': "HTTP 404"}
+    assert results[1]['error'] is None and results[1]['libraries'] == ['jQuery 3.7.1']
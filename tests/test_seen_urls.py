@@ -0,0 +1,50 @@
+import omar
+
+
+def test_bloom_filter_has_no_false_negatives_and_bounded_false_positives():
+    bloom = omar.BloomFilter(10000, error_rate=0.01)
+    added = [f"https://example.com/page/{i}" for i in range(10000)]
+    for url in added:
+        bloom.add(url)
+    assert all(url in bloom for url in added)
+    false_positives = sum(f"https://example.org/other/{i}" in bloom for i in range(10000))
+    assert false_positives < 10000 * 0.01 * 2
+
+
+def test_bloom_filter_size_is_fixed_by_capacity():
+    bloom = omar.BloomFilter(1000)
+    size = len(bloom.bits)
+    for i in range(5000):
+        bloom.add(str(i))
+    assert len(bloom.bits) == size
+
+
+def test_saturated_bloom_never_drops_a_url():
+    # A filter sized for 8 items answers 'maybe' for nearly everything; the table decides
+    seen = omar.temporary_seen_set(capacity=8)
+    for i in range(500):
+        assert seen.add(f"https://example.com/{i}")
+    assert not seen.add("https://example.com/7")
+    assert "https://example.com/499" in seen
+    assert all(f"https://example.com/new/{i}" not in seen for i in range(500))
+
+
+def test_crawls_keep_separate_seen_sets(database):
+    conn = omar.setup_database()
+    try:
+        first = omar.SeenURLSet(conn, 1, capacity=100)
+        second = omar.SeenURLSet(conn, 2)
+        assert first.add('https://example.com/')
+        assert 'https://example.com/' not in second
+        assert second.add('https://example.com/')
+        assert not first.add('https://example.com/')
+    finally:
+        conn.close()
+
+
+def test_canonical_urls_collapse_equivalent_spellings():
+    seen = omar.temporary_seen_set()
+    spellings = ['HTTP://Example.COM:80/a%7Eb?y=2&x=1#frag', 'http://example.com/a~b?x=1&y=2',
+                 '/a~b?x=1&y=2']
+    added = [seen.add(omar.canonicalize_url(url, 'http://example.com/')) for url in spellings]
+    assert added == [True, False, False]
@@ -0,0 +1,74 @@
+import gzip
+import http.server
+import threading
+
+import pytest
+
+import omar
+
+URLSET = '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{}</urlset>'
+INDEX = '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{}</sitemapindex>'
+
+
+def multi_member_gzip(text):
+    """text split across two gzip members, as `cat a.gz b.gz` produces"""
+    data = text.encode()
+    middle = len(data) // 2
+    return gzip.compress(data[:middle]) + gzip.compress(data[middle:])
+
+
+@pytest.fixture
+def sitemap_site():
+    files = {}
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = files.get(self.path)
+            self.send_response(200 if body is not None else 404)
+            self.send_header('Content-Length', str(len(body or b'')))
+            self.end_headers()
+            self.wfile.write(body or b'')
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    pages = [f"{base}/page/{i}" for i in range(6)]
+
+    def urlset(urls):
+        return URLSET.format(''.join(f"<url><loc>{url}</loc></url>" for url in urls))
+
+    files['/pages-a.xml.gz'] = multi_member_gzip(urlset(pages[:3]))
+    files['/pages-b.xml'] = urlset(pages[3:] + pages[:1]).encode()
+    files['/index.xml.gz'] = multi_member_gzip(INDEX.format(
+        f"<sitemap><loc>{base}/pages-a.xml.gz</loc></sitemap>"
+        f"<sitemap><loc>{base}/pages-b.xml</loc></sitemap>"))
+    files['/robots.txt'] = f"User-agent: *\nSitemap: {base}/index.xml.gz\n".encode()
+    yield base, pages
+    server.shutdown()
+    server.server_close()
+
+
+def test_sitemap_target_streams_nested_gzip_pages(sitemap_site):
+    base, pages = sitemap_site
+    expander = omar.TargetExpander(sitemap_concurrency=1)
+    urls = list(expander.expand([f"sitemap:{base}/index.xml.gz", f"{base}/page/0"]))
+    assert urls == pages
+
+
+def test_sitemap_target_reads_robots_sitemaps_and_applies_exclusions(sitemap_site):
+    base, pages = sitemap_site
+    expander = omar.TargetExpander(exclude=['127.0.0.1'])
+    assert list(expander.expand([f"sitemap:{base}"])) == []
+    assert sorted(omar.TargetExpander().expand([f"sitemap:{base}/"])) == sorted(pages)
+
+
+def test_scan_websites_scans_sitemap_pages(sitemap_site, monkeypatch):
+    base, pages = sitemap_site
+    scanned = []
+    monkeypatch.setattr(omar.ScanPipeline, 'execute',
+                        lambda self, specs: scanned.extend(self.expander.expand(specs)) or True)
+    assert omar.scan_websites([f"sitemap:{base}/index.xml.gz"], expander=omar.TargetExpander(sitemap_concurrency=1))
+    assert scanned == pages
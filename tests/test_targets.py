@@ -0,0 +1,46 @@
+import ipaddress
+
+import pytest
+
+import omar
+
+
+def test_intervals_merge_overlapping_and_adjacent_ranges():
+    intervals = omar.AddressIntervals()
+    intervals.add(10, 19)
+    intervals.add(30, 39)
+    intervals.add(20, 25)
+    assert (intervals.starts, intervals.ends) == ([10, 30], [25, 39])
+    assert intervals.missing(0, 50) == [(0, 9), (26, 29), (40, 50)]
+    intervals.add(5, 45)
+    assert (intervals.starts, intervals.ends) == ([5], [45])
+    assert 5 in intervals and 45 in intervals and 46 not in intervals
+    assert intervals.missing(6, 40) == []
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_shuffled_ranges_cover_every_address_once(seed):
+    expander = omar.TargetExpander(exclude=['10.0.0.64/27'], scheme='http', shuffle=True, seed=seed)
+    urls = list(expander.expand(['10.0.0.0/24', '10.0.0.200-10.0.1.10', '10.0.0.5']))
+    # The /24 skips its network address but the range still reaches 10.0.0.255 and 10.0.1.0
+    expected = {f"http://{ip}" for ip in ipaddress.ip_network('10.0.0.0/23')
+                if ipaddress.ip_address('10.0.0.1') <= ip <= ipaddress.ip_address('10.0.1.10')
+                and ip not in ipaddress.ip_network('10.0.0.64/27')}
+    assert len(urls) == len(set(urls))
+    assert set(urls) == expected
+    in_order = [f"http://{ip}" for ip in sorted(ipaddress.ip_address(url[7:]) for url in urls)]
+    assert urls != in_order
+
+
+def test_shuffle_seed_repeats_the_order():
+    first = list(omar.TargetExpander(shuffle=True, seed=7).expand(['192.0.2.0/26']))
+    again = list(omar.TargetExpander(shuffle=True, seed=7).expand(['192.0.2.0/26']))
+    assert first == again
+
+
+def test_hosts_and_addresses_are_deduplicated_and_excluded():
+    expander = omar.TargetExpander(exclude=['skip.example', '192.0.2.8/30'])
+    urls = list(expander.expand(['a.example', 'https://a.example', 'skip.example', '192.0.2.9',
+                                 '192.0.2.6-192.0.2.13', '2001:db8::1', '192.0.2.1-2001:db8::2']))
+    assert urls == ['https://a.example', 'https://192.0.2.6', 'https://192.0.2.7',
+                    'https://192.0.2.12', 'https://192.0.2.13', 'https://[2001:db8::1]']
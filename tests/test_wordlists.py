@@ -0,0 +1,82 @@
+import os
+
+import pytest
+
+import omar
+
+WORDS = "admin\n# comment\nlogin\n\n  backup  \nadmin\napi\nlogin\nstatic\nuploads\nwp-admin"
+
+
+@pytest.fixture
+def wordlist_path(tmp_path):
+    path = tmp_path / 'words.txt'
+    path.write_text(WORDS)
+    return str(path)
+
+
+def test_index_keeps_first_occurrence_of_each_entry_in_file_order(wordlist_path):
+    wordlist = omar.Wordlist(wordlist_path)
+    try:
+        assert list(wordlist) == ['admin', 'login', 'backup', 'api', 'static', 'uploads', 'wp-admin']
+        assert len(wordlist) == wordlist.count == 7
+        assert 'backup' in wordlist and ' api ' in wordlist
+        assert '# comment' not in wordlist and 'missing' not in wordlist
+    finally:
+        wordlist.close()
+
+
+@pytest.mark.parametrize('count', [1, 2, 3, 7, 10])
+def test_shards_partition_the_wordlist(wordlist_path, count):
+    everything = []
+    for index in range(count):
+        wordlist = omar.Wordlist(wordlist_path).shard(index, count)
+        try:
+            everything.extend(wordlist)
+        finally:
+            wordlist.close()
+    wordlist = omar.Wordlist(wordlist_path)
+    try:
+        assert everything == list(wordlist)
+    finally:
+        wordlist.close()
+
+
+def test_index_is_reused_and_rebuilt_when_the_file_changes(wordlist_path):
+    omar.Wordlist(wordlist_path).close()
+    index_path = wordlist_path + omar.WORDLIST_INDEX_SUFFIX
+    built = os.stat(index_path).st_mtime_ns
+    omar.Wordlist(wordlist_path).close()
+    assert os.stat(index_path).st_mtime_ns == built
+
+    with open(wordlist_path, 'a') as f:
+        f.write("\nnew-entry\nadmin\n")
+    wordlist = omar.Wordlist(wordlist_path)
+    try:
+        assert list(wordlist)[-1] == 'new-entry'
+        assert len(wordlist) == 8
+    finally:
+        wordlist.close()
+
+
+def test_empty_wordlist(tmp_path):
+    path = tmp_path / 'empty.txt'
+    path.write_bytes(b'')
+    wordlist = omar.Wordlist(str(path))
+    try:
+        assert list(wordlist) == [] and 'admin' not in wordlist
+    finally:
+        wordlist.close()
+
+
+def test_parse_shard(wordlist_path):
+    assert omar.parse_shard('1/4') == (0, 4)
+    assert omar.parse_shard('4/4') == (3, 4)
+    for spec in ('0/4', '5/4', '1', 'a/b', '1/2/3'):
+        with pytest.raises(ValueError, match='Invalid shard'):
+            omar.parse_shard(spec)
+    wordlist = omar.Wordlist(wordlist_path)
+    try:
+        with pytest.raises(ValueError, match='out of range'):
+            wordlist.shard(2, 2)
+    finally:
+        wordlist.close()